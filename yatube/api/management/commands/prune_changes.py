@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.models import Change
+from core.utils import iter_pk_chunks
+
+KEEP_DAYS = 30
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из журнала изменений API записи старше --days дней. '
+        'Клиенты с более старым курсором получают 410 и загружают '
+        'данные заново.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=KEEP_DAYS,
+            help='Сколько дней хранить журнал.',
+        )
+
+    def handle(self, *args, **options):
+        last = Change.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first()
+        # Последняя запись остаётся всегда: по ней /changes/ узнаёт
+        # границу почищенного журнала.
+        stale = Change.objects.filter(
+            created__lt=timezone.now() - timedelta(days=options['days']),
+            id__lt=last or 0,
+        )
+        deleted = 0
+        for pks in iter_pk_chunks(stale):
+            with transaction.atomic():
+                deleted += Change.objects.filter(pk__in=pks).delete()[0]
+        self.stdout.write(f'Удалено записей журнала: {deleted}')
@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class Change(models.Model):
+    """Запись журнала изменений для дельта-синхронизации клиентов.
+
+    Номер записи (id) служит курсором: клиент запрашивает всё, что
+    изменилось после последнего известного ему номера.
+    """
+    UPSERT = 'u'
+    DELETE = 'd'
+    ACTIONS = (
+        (UPSERT, 'Создание или изменение'),
+        (DELETE, 'Удаление'),
+    )
+
+    model = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    action = models.CharField(max_length=1, choices=ACTIONS)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Изменения'
+
+    def __str__(self):
+        return f'{self.action} {self.model} {self.object_id}'
+
+    @classmethod
+    def record(cls, model, pks, action=UPSERT):
+        """Записи журнала для изменений, прошедших мимо сигналов.
+
+        Массовые UPDATE и _raw_delete не отправляют post_save и
+        post_delete, поэтому такие записи отмечаются в журнале явно.
+        """
+        cls.objects.bulk_create([
+            cls(model=model._meta.model_name, object_id=pk, action=action)
+            for pk in pks
+        ])
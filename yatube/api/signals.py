@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+
+from posts.models import Comment, Follow, Group, Post
+
+from .models import Change
+
+TRACKED_MODELS = (Post, Comment, Group, Follow)
+
+
+def record_upsert(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Change.objects.create(
+            model=sender._meta.model_name,
+            object_id=instance.pk,
+            action=Change.UPSERT,
+        )
+
+
+def record_delete(sender, instance, archived=False, **kwargs):
+    # Перенос в архив пишет журнал сам, в транзакции удаления.
+    if archived:
+        return
+    Change.objects.create(
+        model=sender._meta.model_name,
+        object_id=instance.pk,
+        action=Change.DELETE,
+    )
+
+
+# Подписываемся на конкретные модели: глобальный обработчик post_delete
+# отключил бы быстрое удаление для всех моделей проекта.
+for model in TRACKED_MODELS:
+    post_save.connect(record_upsert, sender=model)
+    post_delete.connect(record_delete, sender=model)
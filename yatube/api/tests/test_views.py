@@ -0,0 +1,169 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.deletion import schedule_deletion
+from posts.engagement import buffer, counters, like
+from posts.models import Comment, Follow, Group, Post, User
+
+from ..models import Change
+
+
+class ApiViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {number}', group=cls.group
+            )
+            for number in range(5)
+        ]
+        cls.comment = Comment.objects.create(
+            author=cls.reader, post=cls.posts[0], text='Комментарий'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_post_list_cursor_pagination(self):
+        """Лента постов отдаётся страницами по курсору."""
+        url = reverse('api:posts')
+        first = self.client.get(url, {'limit': 3}).json()
+        self.assertEqual(
+            [post['id'] for post in first['results']],
+            [post.id for post in reversed(self.posts)][:3]
+        )
+        second = self.client.get(
+            url, {'limit': 3, 'cursor': first['next']}
+        ).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+
+    def test_fields_projection(self):
+        """Параметр fields ограничивает набор полей."""
+        response = self.client.get(
+            reverse('api:posts'), {'fields': 'text,author'}
+        )
+        self.assertEqual(
+            set(response.json()['results'][0]), {'text', 'author'}
+        )
+        response = self.client.get(reverse('api:posts'), {'fields': 'x'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_not_modified(self):
+        """Повторный запрос с тем же ETag получает 304."""
+        url = reverse('api:post_detail', args=(self.posts[0].id,))
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comments_and_profile(self):
+        """Комментарии поста и профиль автора."""
+        response = self.client.get(
+            reverse('api:comments', args=(self.posts[0].id,))
+        )
+        self.assertEqual(
+            response.json()['results'][0]['text'], self.comment.text
+        )
+        response = self.client.get(
+            reverse('api:profile', args=(self.user.username,))
+        )
+        self.assertEqual(response.json()['posts'], len(self.posts))
+
+    def test_follow_requires_login(self):
+        """Лента подписок доступна только авторизованным."""
+        response = self.client.get(reverse('api:follow'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        Follow.objects.create(user=self.reader, author=self.user)
+        response = self.authorized_client.get(reverse('api:follow'))
+        self.assertEqual(len(response.json()['results']), len(self.posts))
+
+    def test_changes_since_cursor(self):
+        """Дельта содержит только изменения после курсора."""
+        url = reverse('api:changes')
+        cursor = self.client.get(url).json()['cursor']
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        deleted_id = self.posts[1].id
+        Post.objects.get(id=deleted_id).delete()
+        data = self.client.get(url, {'since': cursor}).json()
+        self.assertEqual(
+            [row['id'] for row in data['posts']['upserted']], [post.id]
+        )
+        self.assertEqual(data['posts']['deleted'], [deleted_id])
+        self.assertNotEqual(data['cursor'], cursor)
+
+    def test_changes_include_own_follows(self):
+        """Подписки попадают в дельту только к самому подписчику."""
+        url = reverse('api:changes')
+        cursor = self.client.get(url).json()['cursor']
+        follow = Follow.objects.create(user=self.reader, author=self.user)
+        data = self.authorized_client.get(url, {'since': cursor}).json()
+        self.assertEqual(
+            data['follows']['upserted'],
+            [{'id': follow.id, 'author': self.user.username}],
+        )
+        data = self.client.get(url, {'since': cursor}).json()
+        self.assertEqual(data['follows']['upserted'], [])
+
+    def test_changes_hide_pending_deletion(self):
+        """Записи автора в очереди на удаление приходят как удалённые."""
+        url = reverse('api:changes')
+        cursor = self.client.get(url).json()['cursor']
+        author = User.objects.create_user(username='leaving')
+        post = Post.objects.create(author=author, text='Скрываемый пост')
+        comment = Comment.objects.create(
+            author=author, post=self.posts[0], text='Скрываемый'
+        )
+        schedule_deletion(author)
+        data = self.client.get(url, {'since': cursor}).json()
+        self.assertEqual(data['posts']['upserted'], [])
+        self.assertEqual(data['posts']['deleted'], [post.pk])
+        self.assertEqual(data['comments']['upserted'], [])
+        self.assertEqual(data['comments']['deleted'], [comment.pk])
+
+    def test_flushed_likes_in_changes(self):
+        """Лайки, сброшенные пачкой, попадают в дельту и меняют ETag."""
+        counters().clear()
+        url = reverse('api:changes')
+        response = self.client.get(url)
+        cursor = response.json()['cursor']
+        like(self.reader, self.posts[0])
+        buffer.flush(force=True)
+        response_after = self.client.get(url, {'since': cursor})
+        self.assertNotEqual(response_after['ETag'], response['ETag'])
+        self.assertEqual(
+            [(row['id'], row['likes'])
+             for row in response_after.json()['posts']['upserted']],
+            [(self.posts[0].pk, 1)],
+        )
+
+    def test_pruned_cursor_gone(self):
+        """После чистки журнала старый курсор требует полной загрузки."""
+        url = reverse('api:changes')
+        initial = self.client.get(url).json()['cursor']
+        Post.objects.create(author=self.user, text='Новый пост')
+        Post.objects.create(author=self.user, text='Ещё пост')
+        Change.objects.update(created=timezone.now() - timedelta(days=60))
+        call_command('prune_changes', stdout=StringIO())
+        self.assertEqual(Change.objects.count(), 1)
+        response = self.client.get(url, {'since': initial})
+        self.assertEqual(response.status_code, HTTPStatus.GONE)
+        cursor = self.client.get(url).json()['cursor']
+        response = self.client.get(url, {'since': cursor})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
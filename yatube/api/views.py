@@ -0,0 +1,296 @@
+import base64
+import binascii
+from functools import wraps
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from posts.models import (Comment, Follow, Group, Post, pending_deletion,
+                          visible_users)
+
+from .models import Change
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CHANGES_LIMIT = 500
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'html': 'text_html',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'image_width': 'image_width',
+    'image_height': 'image_height',
+    'image_placeholder': 'image_placeholder',
+    'likes': 'stats__likes',
+}
+# Счётчики без строки PostStats приходят из values() как None.
+COUNTER_FIELDS = {'likes'}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'html': 'text_html',
+    'created': 'created',
+}
+GROUP_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'description': 'description',
+}
+FOLLOW_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+}
+
+
+def visible_comments():
+    return Comment.objects.filter(post__in=Post.objects.visible()).exclude(
+        author_id__in=pending_deletion()
+    )
+
+
+# Выборки для дельты — те же, что у списков: объекты, скрытые удалением
+# автора, попадают в deleted.
+CHANGE_MODELS = {
+    'post': (Post.objects.visible, POST_FIELDS),
+    'comment': (visible_comments, COMMENT_FIELDS),
+    'group': (Group.objects.all, GROUP_FIELDS),
+    'follow': (Follow.objects.all, FOLLOW_FIELDS),
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def last_change_etag(request, *args, **kwargs):
+    """ETag для всех ответов API: номер последнего изменения и пользователь.
+
+    Журнал пишется при любой записи постов, комментариев, групп и подписок,
+    так что совпадение номера означает, что ответ не изменился.
+    """
+    last = Change.objects.order_by('-id').values_list('id', flat=True).first()
+    user_id = request.user.pk if request.user.is_authenticated else 0
+    return f'{last or 0}-{user_id}'
+
+
+def api_view(view):
+    """GET-представление API с условными запросами и ошибками в JSON."""
+    @wraps(view)
+    @require_GET
+    @condition(etag_func=last_change_etag)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as exc:
+            return error(str(exc), 400)
+    return wrapper
+
+
+def get_fields(request, field_map):
+    """Имена полей из ?fields=a,b,c (по умолчанию все)."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(field_map)
+    names = fields.split(',')
+    unknown = set(names) - set(field_map)
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(sorted(unknown))}')
+    return names
+
+
+def project(queryset, field_map, names):
+    """Строки выборки в виде словарей только с запрошенными полями.
+
+    Модели не создаются: данные берутся через values() одним запросом.
+    """
+    columns = [field_map[name] for name in names]
+    rows = []
+    for row in queryset.values(*columns):
+        item = {name: row[field_map[name]] for name in names}
+        for name in COUNTER_FIELDS.intersection(item):
+            item[name] = item[name] or 0
+        if item.get('image'):
+            item['image'] = default_storage.url(item['image'])
+        rows.append(item)
+    return rows
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeError, ValueError):
+        raise BadRequest('Некорректный курсор')
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('Некорректный limit')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def cursor_page(request, queryset, field_map):
+    """Страница выборки по курсору (keyset по убыванию id).
+
+    Посты и комментарии получают id в порядке публикации, поэтому
+    порядок по id совпадает с порядком лент, а курсор не зависит от
+    вставки новых записей, в отличие от номера страницы.
+    """
+    names = get_fields(request, field_map)
+    limit = get_limit(request)
+    queryset = queryset.order_by('-id')
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = queryset.filter(id__lt=decode_cursor(cursor))
+    columns = names if 'id' in names else names + ['id']
+    rows = project(queryset[:limit + 1], field_map, columns)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['id'])
+    if 'id' not in names:
+        for row in rows:
+            del row['id']
+    return JsonResponse({'results': rows, 'next': next_cursor})
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.visible()
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return cursor_page(request, posts, POST_FIELDS)
+
+
+@api_view
+def post_detail(request, post_id):
+    names = get_fields(request, POST_FIELDS)
+    rows = project(
+        Post.objects.visible().filter(id=post_id), POST_FIELDS, names
+    )
+    if not rows:
+        return error('Пост не найден', 404)
+    return JsonResponse(rows[0])
+
+
+@api_view
+def comment_list(request, post_id):
+    get_object_or_404(Post.objects.visible().only('id'), id=post_id)
+    comments = Comment.objects.filter(post_id=post_id).exclude(
+        author_id__in=pending_deletion()
+    )
+    return cursor_page(request, comments, COMMENT_FIELDS)
+
+
+@api_view
+def group_list(request):
+    names = get_fields(request, GROUP_FIELDS)
+    return JsonResponse(
+        {'results': project(Group.objects.order_by('id'), GROUP_FIELDS,
+                            names)}
+    )
+
+
+@api_view
+def group_detail(request, slug):
+    names = get_fields(request, GROUP_FIELDS)
+    rows = project(Group.objects.filter(slug=slug), GROUP_FIELDS, names)
+    if not rows:
+        return error('Группа не найдена', 404)
+    return JsonResponse(rows[0])
+
+
+@api_view
+def profile(request, username):
+    author = get_object_or_404(
+        visible_users().only('id', 'username', 'first_name', 'last_name'),
+        username=username,
+    )
+    return JsonResponse({
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts': author.posts.count(),
+        'followers': author.following.count(),
+        'following': author.follower.count(),
+    })
+
+
+@api_view
+def follow(request):
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', 401)
+    authors = Follow.objects.filter(user=request.user).values('author_id')
+    posts = Post.objects.visible().filter(author_id__in=authors)
+    return cursor_page(request, posts, POST_FIELDS)
+
+
+@api_view
+def changes(request):
+    """Изменения постов, комментариев, групп и подписок после ?since=.
+
+    Без since возвращается только текущий курсор: клиент загружает данные
+    списками, а дальше запрашивает лишь изменения. Подписки отдаются
+    только свои; посты и комментарии авторов, ожидающих удаления,
+    отдаются как удалённые. Если журнал после курсора уже почищен
+    (prune_changes), ответ 410: клиенту нужно загрузить данные заново.
+    """
+    since = request.GET.get('since')
+    if not since:
+        last = Change.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first()
+        return JsonResponse({'cursor': encode_cursor(last or 0),
+                             'has_more': False})
+    since = decode_cursor(since)
+    oldest = Change.objects.order_by('id').values_list(
+        'id', flat=True
+    ).first()
+    if oldest is not None and since < oldest - 1:
+        return error('Курсор устарел, загрузите данные заново', 410)
+    log = list(
+        Change.objects.filter(id__gt=since)
+        .values_list('id', 'model', 'object_id', 'action')[:CHANGES_LIMIT]
+    )
+    # Из нескольких записей об одном объекте важна только последняя.
+    final = {}
+    for _, model, object_id, action in log:
+        final[model, object_id] = action
+    data = {}
+    for name, (objects, field_map) in CHANGE_MODELS.items():
+        upserted = [pk for (label, pk), action in final.items()
+                    if label == name and action == Change.UPSERT]
+        deleted = [pk for (label, pk), action in final.items()
+                   if label == name and action == Change.DELETE]
+        rows = []
+        if upserted:
+            queryset = objects().filter(id__in=upserted)
+            if name == 'follow':
+                queryset = queryset.filter(user_id=request.user.pk)
+            rows = project(queryset, field_map, list(field_map))
+            found = {row['id'] for row in rows}
+            deleted += [pk for pk in upserted if pk not in found]
+        data[f'{name}s'] = {'upserted': rows, 'deleted': deleted}
+    cursor = log[-1][0] if log else since
+    data['cursor'] = encode_cursor(cursor)
+    data['has_more'] = len(log) == CHANGES_LIMIT
+    return JsonResponse(data)
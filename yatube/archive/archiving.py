@@ -0,0 +1,159 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.http import Http404
+from django.utils.functional import cached_property
+
+from api.models import Change
+from core.utils import iter_pk_chunks
+from posts.models import (Comment, Group, Like, Mention, Post, PostStats,
+                          PostTag, visible_users)
+
+from .models import ArchivedPost, ArchiveSummary
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_posts(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит посты старше cutoff с комментариями в архивную базу.
+
+    Пачка сначала пишется в архив (повторная запись игнорируется), затем
+    одной транзакцией удаляется из основной базы вместе с обновлением
+    ArchiveSummary, так что прерванный перенос можно запустить снова.
+    Удаление идёт без каскадов, но post_delete постов и комментариев
+    отправляется (см. send_archived). Теги, упоминания, лайки и
+    просмотры в архив не переносятся. Возвращает число перенесённых
+    постов.
+    """
+    moved = 0
+    for pks in iter_pk_chunks(Post.objects.filter(pub_date__lt=cutoff),
+                              batch_size):
+        posts = list(
+            Post.objects.filter(pk__in=pks).select_related('author', 'group')
+        )
+        comments = defaultdict(list)
+        for comment in Comment.objects.filter(post_id__in=pks):
+            comments[comment.post_id].append(comment)
+        ArchivedPost.objects.bulk_create(
+            [ArchivedPost.from_post(post, comments[post.pk])
+             for post in posts],
+            ignore_conflicts=True,
+        )
+        counts = Counter(post.author_id for post in posts)
+        with transaction.atomic():
+            for model in (Comment, PostTag, Mention, Like, PostStats):
+                model.objects.filter(post_id__in=pks)._raw_delete(
+                    model.objects.db
+                )
+            Post.objects.filter(pk__in=pks)._raw_delete(Post.objects.db)
+            # _raw_delete идёт мимо сигналов журнала API; запись в той же
+            # транзакции, что и удаление, не теряется при сбое переноса.
+            Change.record(Comment, [
+                comment.pk for post in posts for comment in comments[post.pk]
+            ], Change.DELETE)
+            Change.record(Post, [post.pk for post in posts], Change.DELETE)
+            for author_id, count in counts.items():
+                ArchiveSummary.objects.get_or_create(author_id=author_id)
+                ArchiveSummary.objects.filter(author_id=author_id).update(
+                    posts=F('posts') + count
+                )
+        send_archived(Comment, [
+            comment for post in posts for comment in comments[post.pk]
+        ])
+        send_archived(Post, posts)
+        moved += len(posts)
+    return moved
+
+
+def send_archived(model, objs):
+    """post_delete для строк, удалённых из основной базы переносом.
+
+    Ленты, счётчики, кеш страниц и статические копии обновляются теми
+    же обработчиками, что и при обычном удалении; журнал API уже
+    записан в транзакции переноса.
+    archived=True оставляет картинку поста: на неё ссылается архив.
+    """
+    for obj in objs:
+        post_delete.send(
+            sender=model, instance=obj, using=model.objects.db,
+            archived=True,
+        )
+
+
+def archived_count(author):
+    return ArchiveSummary.objects.filter(author=author).values_list(
+        'posts', flat=True
+    ).first() or 0
+
+
+def hydrate(archived_posts):
+    """Post из архивных записей с авторами, группами и комментариями."""
+    posts = [archived.to_post() for archived in archived_posts]
+    user_ids = {post.author_id for post in posts}
+    user_ids.update(
+        comment.author_id for post in posts
+        for comment in post.archived_comments
+    )
+    users = visible_users().in_bulk(user_ids)
+    groups = Group.objects.in_bulk(
+        {post.group_id for post in posts if post.group_id}
+    )
+    result = []
+    for post in posts:
+        if post.author_id not in users:
+            continue
+        post.author = users[post.author_id]
+        post.group = groups.get(post.group_id)
+        post.archived_comments = [
+            comment for comment in post.archived_comments
+            if comment.author_id in users
+        ]
+        for comment in post.archived_comments:
+            comment.author = users[comment.author_id]
+        result.append(post)
+    return result
+
+
+def get_archived_post_or_404(post_id):
+    """Пост из архива; к архивной базе обращается, только если он не пуст."""
+    if not ArchiveSummary.objects.exists():
+        raise Http404('Пост не найден')
+    posts = hydrate(ArchivedPost.objects.filter(pk=post_id))
+    if not posts:
+        raise Http404('Пост не найден')
+    return posts[0]
+
+
+class ArchiveChain:
+    """Посты автора: сначала из основной базы, за ними — из архива.
+
+    В архив уходят только посты старше любого оставшегося, поэтому
+    склейка двух выборок сохраняет порядок по дате. Поддерживает len()
+    и срезы, которых достаточно пагинатору.
+    """
+
+    def __init__(self, posts, author, archived):
+        self.posts = posts
+        self.author = author
+        self.archived = archived
+
+    @cached_property
+    def hot_count(self):
+        return self.posts.count()
+
+    def __len__(self):
+        return self.hot_count + self.archived
+
+    def __getitem__(self, index):
+        start, stop = index.start or 0, index.stop
+        result = []
+        if start < self.hot_count:
+            result += list(self.posts[start:min(stop, self.hot_count)])
+        if stop > self.hot_count:
+            archived = ArchivedPost.objects.filter(
+                author_id=self.author.pk
+            )[max(start - self.hot_count, 0):stop - self.hot_count]
+            result += hydrate(archived)
+        return result
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from archive.archiving import archive_posts
+
+ARCHIVE_AFTER_DAYS = 3 * 365
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше --days дней вместе с комментариями '
+        'в архивную базу. Страницы постов и профили читают их оттуда.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ARCHIVE_AFTER_DAYS,
+            help='Возраст постов, уходящих в архив.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        moved = archive_posts(cutoff)
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
@@ -0,0 +1,104 @@
+import json
+import zlib
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+POST_FIELDS = (
+    'text', 'text_html', 'text_html_version', 'image', 'image_width',
+    'image_height', 'image_placeholder', 'thumbnail_manifest',
+)
+COMMENT_FIELDS = (
+    'id', 'author_id', 'text', 'text_html', 'text_html_version', 'created',
+)
+
+
+class ArchivedPost(models.Model):
+    """Старый пост с комментариями в архивной базе.
+
+    Ключи совпадают с ключами поста в основной базе. Всё, что не нужно
+    для выборок (текст, картинка, комментарии), лежит одним сжатым
+    JSON в payload.
+    """
+    id = models.IntegerField(primary_key=True)
+    author_id = models.IntegerField()
+    group_id = models.IntegerField(null=True)
+    pub_date = models.DateTimeField()
+    payload = models.BinaryField()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = [models.Index(fields=('author_id', '-pub_date'))]
+
+    @classmethod
+    def from_post(cls, post, comments):
+        data = {field: getattr(post, field) for field in POST_FIELDS}
+        data['image'] = post.image.name
+        data['comments'] = [
+            {field: getattr(comment, field) for field in COMMENT_FIELDS}
+            for comment in comments
+        ]
+        return cls(
+            id=post.pk,
+            author_id=post.author_id,
+            group_id=post.group_id,
+            pub_date=post.pub_date,
+            payload=zlib.compress(
+                json.dumps(data, cls=DjangoJSONEncoder).encode()
+            ),
+        )
+
+    @property
+    def data(self):
+        return json.loads(zlib.decompress(self.payload))
+
+    def to_post(self):
+        """Несохраняемый Post для шаблонов.
+
+        Комментарии кладутся в archived_comments, а авторов и группы
+        подставляет archive.archiving.hydrate.
+        """
+        data = self.data
+        comments = data.pop('comments')
+        post = Post(
+            id=self.id,
+            author_id=self.author_id,
+            group_id=self.group_id,
+            pub_date=self.pub_date,
+            **data
+        )
+        post.archived = True
+        post.archived_comments = [
+            Comment(
+                id=comment['id'],
+                post_id=self.id,
+                author_id=comment['author_id'],
+                text=comment['text'],
+                text_html=comment.get('text_html', ''),
+                text_html_version=comment.get('text_html_version', 0),
+                created=parse_datetime(comment['created']),
+            )
+            for comment in comments
+        ]
+        return post
+
+
+class ArchiveSummary(models.Model):
+    """Число архивных постов автора; хранится в основной базе, чтобы
+    профили без архива не обращались к архивной."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='archive_summary'
+    )
+    posts = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.author}: {self.posts}'
@@ -0,0 +1,34 @@
+ARCHIVE_DB = 'archive'
+ARCHIVE_MODELS = {'archivedpost'}
+
+
+class ArchiveRouter:
+    """Архивные посты живут в отдельной базе ARCHIVE_DB, всё остальное —
+    в основной (включая ArchiveSummary, который читают горячие страницы).
+    """
+
+    def is_archived(self, model):
+        return (
+            model._meta.app_label == 'archive'
+            and model._meta.model_name in ARCHIVE_MODELS
+        )
+
+    def db_for_read(self, model, **hints):
+        if self.is_archived(model):
+            return ARCHIVE_DB
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if self.is_archived(obj1) or self.is_archived(obj2):
+            return False
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archived = app_label == 'archive' and model_name in ARCHIVE_MODELS
+        if db == ARCHIVE_DB:
+            return archived
+        if archived:
+            return False
+        return None
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from api.models import Change
+from core.models import DirtyPath
+from posts.deletion import run_job, schedule_deletion
+from posts.models import Comment, Post, User
+
+from ..archiving import archive_posts
+from ..models import ArchivedPost, ArchiveSummary
+
+
+class ArchiveTests(TestCase):
+    databases = {'default', 'archive'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_posts = [
+            Post.objects.create(author=cls.author, text=f'Старый пост {n}')
+            for n in range(3)
+        ]
+        for number, post in enumerate(cls.old_posts):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=1000 - number)
+            )
+        Comment.objects.create(
+            author=cls.reader, post=cls.old_posts[0], text='Старый ответ'
+        )
+        cls.new_posts = [
+            Post.objects.create(author=cls.author, text=f'Новый пост {n}')
+            for n in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def archive(self):
+        return archive_posts(timezone.now() - timedelta(days=365))
+
+    def test_old_posts_moved(self):
+        """Старые посты с комментариями уходят в архив."""
+        self.assertEqual(self.archive(), 3)
+        self.assertEqual(
+            set(Post.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.new_posts},
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+        self.assertEqual(
+            ArchiveSummary.objects.get(author=self.author).posts, 3
+        )
+        self.assertEqual(self.archive(), 0)
+
+    def test_delete_receivers_notified(self):
+        """Перенос в архив попадает в журнал изменений и сбрасывает кеши."""
+        self.client.get(reverse('posts:index'))
+        self.archive()
+        self.assertEqual(
+            set(Change.objects.filter(
+                model='post', action=Change.DELETE
+            ).values_list('object_id', flat=True)),
+            {post.pk for post in self.old_posts},
+        )
+        # Журнал пишет перенос, сигнал post_delete его не дублирует.
+        self.assertEqual(
+            Change.objects.filter(model='post', action=Change.DELETE).count(),
+            len(self.old_posts),
+        )
+        self.assertTrue(Change.objects.filter(
+            model='comment', action=Change.DELETE
+        ).exists())
+        self.assertTrue(DirtyPath.objects.filter(
+            path=reverse('posts:post_detail', args=(self.old_posts[0].pk,))
+        ).exists())
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_archived_image_kept(self):
+        """Картинка архивного поста не освобождается при переносе."""
+        Post.objects.filter(pk=self.old_posts[0].pk).update(
+            image='posts/old.gif'
+        )
+        with mock.patch.object(
+            Post.image.field.storage, 'delete'
+        ) as delete:
+            self.archive()
+        delete.assert_not_called()
+
+    def test_profile_reads_through(self):
+        """Профиль показывает архивные посты после горячих."""
+        self.archive()
+        response = self.client.get(
+            reverse('posts:profile', args=(self.author.username,))
+        )
+        self.assertEqual(response.context['post_count'], 5)
+        self.assertEqual(
+            [post.text for post in response.context['page_obj']],
+            ['Новый пост 1', 'Новый пост 0',
+             'Старый пост 2', 'Старый пост 1', 'Старый пост 0'],
+        )
+        index = self.client.get(reverse('posts:index'))
+        self.assertEqual(len(index.context['page_obj']), 2)
+
+    def test_post_detail_reads_through(self):
+        """Страница архивного поста открывается с комментариями."""
+        self.archive()
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.old_posts[0].pk,))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Старый пост 0')
+        self.assertContains(response, 'Старый ответ')
+        self.assertEqual(response.context['post_count'], 5)
+
+    def test_missing_post_404(self):
+        """Поста нет ни в основной базе, ни в архиве."""
+        self.archive()
+        response = self.client.get(reverse('posts:post_detail', args=(999,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_command_and_deletion(self):
+        """Команда архивирует, а удаление пользователя чистит архив."""
+        call_command('archive_posts', '--days', '365', stdout=StringIO())
+        job = run_job(schedule_deletion(self.author))
+        self.assertEqual(job.posts_deleted, 5)
+        self.assertFalse(ArchivedPost.objects.exists())
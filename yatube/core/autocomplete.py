@@ -0,0 +1,146 @@
+import threading
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+VERSION_KEY = 'autocomplete:{}'
+CHANGE_KEY = 'autocomplete:{}:{}'
+# Сколько версий журнал изменений хранит и сколько из них процесс готов
+# догонять по одной; отставшая сильнее копия перестраивается заново.
+CHANGE_TIMEOUT = 60 * 60
+MAX_CHANGES = 100
+DEFAULT_LIMIT = 10
+
+
+class PrefixIndex:
+    """Отсортированный в памяти процесса список ключей для автодополнения.
+
+    Каждой записи соответствуют несколько ключей в нижнем регистре
+    (имя, слова названия); поиск — бинарный поиск начала префикса и
+    проход до первого ключа без него, без запросов к базе. Записи
+    процесса меняются сразу через update и remove. Каждое изменение
+    получает номер версии в общем кеше и кладётся туда же под этим
+    номером, так что остальные процессы применяют к своей копии только
+    пропущенные изменения. Загрузчиком loader копия перестраивается,
+    лишь если журнал неполон (запись в обход сигналов, вытеснение,
+    сильное отставание); загрузка идёт без блокировки, и поиск до
+    подмены пользуется старой копией.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.RLock()
+        self.version = None
+        self.keys = []
+        self.entries = {}
+
+    def __len__(self):
+        self.ensure_fresh()
+        return len(self.entries)
+
+    def ensure_fresh(self):
+        version = cache.get(VERSION_KEY.format(self.name))
+        if version is None:
+            version = 0
+            cache.add(VERSION_KEY.format(self.name), version, None)
+        with self.lock:
+            current = self.version
+        if version == current:
+            return
+        if current is not None and 0 < version - current <= MAX_CHANGES:
+            keys = [
+                CHANGE_KEY.format(self.name, number)
+                for number in range(current + 1, version + 1)
+            ]
+            changes = cache.get_many(keys)
+            if len(changes) == len(keys):
+                with self.lock:
+                    if self.version == current:
+                        for key in keys:
+                            self._apply(*changes[key])
+                        self.version = version
+                return
+        entries = {}
+        for pk, terms, item in self.loader():
+            entries[pk] = ({term.lower() for term in terms if term}, item)
+        keys = sorted(
+            (term, pk) for pk, (terms, _) in entries.items() for term in terms
+        )
+        with self.lock:
+            # Копию могли обновить, пока шла загрузка: тогда она новее.
+            if self.version == current:
+                self.keys, self.entries = keys, entries
+                self.version = version
+
+    def _apply(self, action, pk, *args):
+        self._remove(pk)
+        if action == 'update':
+            self._insert(pk, *args)
+
+    def _insert(self, pk, terms, item):
+        terms = {term.lower() for term in terms if term}
+        self.entries[pk] = (terms, item)
+        for term in terms:
+            insort(self.keys, (term, pk))
+
+    def _remove(self, pk):
+        terms, _ = self.entries.pop(pk, (set(), None))
+        for term in terms:
+            index = bisect_left(self.keys, (term, pk))
+            if index < len(self.keys) and self.keys[index] == (term, pk):
+                del self.keys[index]
+
+    def changed(self, fresh=True, change=None):
+        """Сообщает другим процессам, что индекс изменился.
+
+        change — само изменение для журнала, ('update', pk, terms, item)
+        или ('remove', pk). Без него другие процессы перестроят копию.
+        С fresh=False копия процесса тоже перестраивается: так делают
+        после записей в обход сигналов (bulk_create, update).
+        """
+        key = VERSION_KEY.format(self.name)
+        try:
+            version = cache.incr(key)
+        except ValueError:
+            version = None
+        if change is not None and version is not None:
+            cache.set(
+                CHANGE_KEY.format(self.name, version), change, CHANGE_TIMEOUT
+            )
+        with self.lock:
+            # Своя копия уже обновлена, перестраивать её не нужно.
+            if fresh and version is not None and self.version == version - 1:
+                self.version = version
+            elif not fresh:
+                self.version = None
+
+    def update(self, pk, terms, item):
+        self.ensure_fresh()
+        terms = sorted({term.lower() for term in terms if term})
+        with self.lock:
+            self._apply('update', pk, terms, item)
+        self.changed(change=('update', pk, terms, item))
+
+    def remove(self, pk):
+        self.ensure_fresh()
+        with self.lock:
+            self._apply('remove', pk)
+        self.changed(change=('remove', pk))
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Первые limit записей, у которых есть ключ с таким началом."""
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        found = {}
+        with self.lock:
+            index = bisect_left(self.keys, (prefix,))
+            while index < len(self.keys) and len(found) < limit:
+                term, pk = self.keys[index]
+                if not term.startswith(prefix):
+                    break
+                found.setdefault(pk, self.entries[pk][1])
+                index += 1
+        return list(found.values())
@@ -0,0 +1,206 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+LOCAL_MAX_ENTRIES = 1000
+LOCAL_TIMEOUT = 5
+
+_missing = object()
+
+# Локальный уровень общий для всех потоков процесса: экземпляры бэкендов
+# в django.core.cache.caches создаются на каждый поток.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalEntry:
+    __slots__ = ('value', 'expires')
+
+    def __init__(self, value, expires):
+        self.value = value
+        self.expires = expires
+
+
+class LocalTier:
+    """LRU-словарь процесса с ограничением по числу записей и времени."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, timeout):
+        expires = time.monotonic() + timeout
+        with self.lock:
+            self.entries[key] = LocalEntry(value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class TwoTierCache(BaseCache):
+    """Бэкенд кеша: LRU процесса перед общим кешем.
+
+    Горячие ключи (метаданные групп, первая страница ленты, фрагменты)
+    читаются из памяти процесса без обращения к общему кешу. Значения
+    хранятся локально в pickle, как в LocMemCache, чтобы вызывающий код
+    не мог испортить чужую копию. Локальная копия живёт не дольше
+    LOCAL_TIMEOUT секунд: записи через этот же процесс видны сразу,
+    записи других процессов — с этой задержкой.
+
+    Настройки (OPTIONS): SHARED_ALIAS — алиас общего кеша,
+    LOCAL_MAX_ENTRIES и LOCAL_TIMEOUT — границы локального уровня.
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS', {}))
+        self.shared_alias = options.pop('SHARED_ALIAS')
+        max_entries = options.pop('LOCAL_MAX_ENTRIES', LOCAL_MAX_ENTRIES)
+        self.local_timeout = options.pop('LOCAL_TIMEOUT', LOCAL_TIMEOUT)
+        super().__init__(dict(params, OPTIONS=options))
+        with _tiers_lock:
+            self.tier = _tiers.setdefault(
+                location or self.shared_alias, LocalTier(max_entries)
+            )
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def local_timeout_for(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def local_key(self, key, version):
+        # make_key подставляет self.version вместо None: get(key) и
+        # get(key, version=1) при VERSION=1 — одна и та же запись.
+        return self.make_key(key, version=version)
+
+    def remember(self, key, version, value, timeout=DEFAULT_TIMEOUT):
+        local_timeout = self.local_timeout_for(timeout)
+        if local_timeout > 0:
+            self.tier.set(self.local_key(key, version),
+                          pickle.dumps(value, -1), local_timeout)
+
+    def get(self, key, default=None, version=None):
+        pickled = self.tier.get(self.local_key(key, version))
+        if pickled is not None:
+            return pickle.loads(pickled)
+        value = self.shared.get(key, _missing, version=version)
+        if value is _missing:
+            self.tier.shared_misses += 1
+            return default
+        self.tier.shared_hits += 1
+        self.remember(key, version, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self.tier.get(self.local_key(key, version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(pickled)
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            self.tier.shared_hits += len(shared)
+            self.tier.shared_misses += len(missing) - len(shared)
+            for key, value in shared.items():
+                self.remember(key, version, value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.remember(key, version, value, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self.remember(key, version, value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.remember(key, version, value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.tier.delete(self.local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.tier.delete(self.local_key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        if self.tier.get(self.local_key(key, version)) is not None:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.tier.delete(self.local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self.tier.delete(self.local_key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self.tier.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        # Общий кеш сам стоит в CACHES и закрывается close_caches; обращение
+        # к caches[...] здесь создало бы его посреди обхода caches.all().
+        pass
+
+    def stats(self):
+        """Счётчики попаданий локального и общего уровней."""
+        tier = self.tier
+        return {
+            'local_entries': len(tier.entries),
+            'local_hits': tier.hits,
+            'local_misses': tier.misses,
+            'shared_hits': tier.shared_hits,
+            'shared_misses': tier.shared_misses,
+        }
@@ -0,0 +1,89 @@
+"""SQLite с настройками для одновременных читателей и писателя.
+
+ENGINE = 'core.db'. Прагмы по умолчанию можно дополнить или
+переопределить в OPTIONS['PRAGMAS'], а OPTIONS['IMMEDIATE'] = False
+возвращает отложенный BEGIN. Для отдельного блока только с чтениями
+отложенный BEGIN включает deferred().
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    # Читатели не ждут писателя и наоборот.
+    'journal_mode': 'WAL',
+    # В WAL fsync нужен только при checkpoint; после сбоя питания можно
+    # потерять последние транзакции, но не целостность базы.
+    'synchronous': 'NORMAL',
+    # Писатель ждёт занятой блокировки, а не падает с «database is locked».
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — в КиБ: 64 МиБ страничного кеша.
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_pragmas(conn, pragmas=PRAGMAS):
+    for name, value in pragmas.items():
+        conn.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Бэкенд sqlite3, включающий прагмы PRAGMAS при каждом подключении.
+
+    С CONN_MAX_AGE подключение живёт между запросами: Django держит
+    отдельное подключение на поток и закрывает устаревшие по сигналам
+    начала и конца запроса, поэтому прагмы выполняются один раз на
+    поток. Транзакции открываются через BEGIN IMMEDIATE: в WAL
+    отложенная транзакция, начавшая с чтения, при первой записи
+    получает SQLITE_BUSY сразу, минуя busy_timeout, если кто-то успел
+    записать раньше, а немедленная ждёт блокировку с самого начала.
+
+    Цена — BEGIN IMMEDIATE берёт блокировку записи для любого
+    atomic(), даже если внутри только чтения: такие блоки выстраиваются
+    в очередь с писателями. Все atomic() проекта пишут; чтениям в WAL
+    транзакция не нужна, а блок, которому нужен согласованный снимок
+    без записи, оборачивается в deferred().
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immediate = self.settings_dict['OPTIONS'].get('IMMEDIATE', True)
+
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('PRAGMAS', {})}
+        kwargs = super().get_connection_params()
+        kwargs.pop('PRAGMAS', None)
+        kwargs.pop('IMMEDIATE', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
+
+
+@contextmanager
+def deferred(using=DEFAULT_DB_ALIAS):
+    """Открывает транзакции внутри блока отложенным BEGIN.
+
+    Для atomic() только с чтениями: отложенная транзакция не берёт
+    блокировку записи и не ждёт писателей. Действует на внешний
+    atomic(), открытый внутри блока.
+    """
+    connection = connections[using]
+    immediate = connection.immediate
+    connection.immediate = False
+    try:
+        yield
+    finally:
+        connection.immediate = immediate
@@ -0,0 +1,67 @@
+import zlib
+
+from django.db import models
+
+# Тексты короче порога хранятся как есть: сжатие на них почти ничего не
+# даёт, а обычный текст остаётся доступен поиску в админке.
+COMPRESS_THRESHOLD = 1024
+COMPRESS_LEVEL = 6
+ZLIB_MARKER = b'\x01'
+
+
+def compress_text(value, threshold=COMPRESS_THRESHOLD):
+    """Значение для базы: строка как есть или маркер со сжатыми байтами.
+
+    Сжимается только текст длиннее threshold байт и только если сжатие
+    действительно уменьшает его. zlib с фиксированным уровнем даёт одни и
+    те же байты для одного текста, поэтому точный поиск по полю работает.
+    """
+    data = value.encode()
+    if len(data) <= threshold:
+        return value
+    packed = ZLIB_MARKER + zlib.compress(data, COMPRESS_LEVEL)
+    if len(packed) >= len(data):
+        return value
+    return packed
+
+
+def decompress_text(value):
+    if isinstance(value, memoryview):
+        value = bytes(value)
+    if not isinstance(value, bytes):
+        return value
+    if value[:1] != ZLIB_MARKER:
+        raise ValueError(f'Неизвестный формат сжатого текста: {value[:1]!r}')
+    return zlib.decompress(value[1:]).decode()
+
+
+class CompressedTextField(models.TextField):
+    """TextField, хранящий длинные тексты сжатыми.
+
+    В колонке лежит либо обычный текст, либо BLOB из маркера формата и
+    сжатых данных: SQLite хранит в текстовой колонке значения любого
+    типа. Маркер оставляет место для других алгоритмов без перезаписи
+    старых строк. Схема базы та же, что у TextField; поиск по вхождению
+    (contains) видит только несжатые тексты. Порог попадает в миграции,
+    так что исторические модели тоже читают и пишут тексты через поле.
+    """
+
+    def __init__(self, *args, compress_threshold=COMPRESS_THRESHOLD,
+                 **kwargs):
+        self.compress_threshold = compress_threshold
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compress_threshold != COMPRESS_THRESHOLD:
+            kwargs['compress_threshold'] = self.compress_threshold
+        return name, path, args, kwargs
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, str):
+            return compress_text(value, self.compress_threshold)
+        return value
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
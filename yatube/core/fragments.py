@@ -0,0 +1,27 @@
+from django.template.loader import render_to_string
+
+FRAGMENTS = {}
+
+
+def fragment(name, template_name):
+    """Регистрирует персональный фрагмент страницы («дырку»).
+
+    Функция получает запрос и аргумент из ключа дырки и возвращает
+    контекст шаблона или None, если фрагмент для пользователя пуст.
+    """
+    def decorator(get_context):
+        FRAGMENTS[name] = (template_name, get_context)
+        return get_context
+    return decorator
+
+
+def render_fragment(request, key):
+    """HTML фрагмента по ключу вида name или name:arg; None — нет такого."""
+    name, _, arg = key.partition(':')
+    if name not in FRAGMENTS:
+        return None
+    template_name, get_context = FRAGMENTS[name]
+    context = get_context(request, arg)
+    if context is None:
+        return ''
+    return render_to_string(template_name, context, request)
@@ -0,0 +1,168 @@
+import threading
+
+from django.db import connections, transaction
+from django.db.models.signals import post_save, pre_save
+
+MAX_DELAY = 0.002
+MAX_BATCH = 100
+# Дольше этого запрос не ждёт чужого COMMIT: busy_timeout core.db и
+# повтор пачки по одной строке укладываются с запасом.
+WAIT_TIMEOUT = 30
+
+
+class Waiter:
+    def __init__(self, obj):
+        self.obj = obj
+        self.event = threading.Event()
+        self.created = False
+        self.error = None
+
+
+class GroupCommit:
+    """Общая транзакция для вставок из одновременных запросов.
+
+    Первый поток, нашедший очередь пустой, становится ведущим: ждёт
+    MAX_DELAY секунд или MAX_BATCH строк, затем записывает всю очередь
+    одним bulk_create в одной транзакции и будит остальных. save()
+    возвращает управление только после COMMIT, поэтому вызывающий
+    получает успех, когда его строка уже в базе. Сигналы pre_save и
+    post_save отправляются для каждой строки, как при obj.save(), —
+    записи их обработчиков попадают в ту же транзакцию.
+
+    unique — поля, по которым строка считается уже существующей: такие
+    строки не вставляются, а save() возвращает False, как get_or_create.
+    Если пачка не записалась, строки повторяются по одной, чтобы ошибка
+    одной строки досталась только её запросу. Внутри чужой транзакции
+    (atomic) объединять нечего, и строка сохраняется сразу.
+
+    Очередь живёт в памяти процесса: пачку собирают потоки одного
+    воркера, а воркеры разных процессов пишут своими пачками и
+    по-прежнему ждут друг друга на блокировке SQLite. Если прошлая
+    пачка состояла из одного ведущего, других потоков с записями нет, и
+    следующий ведущий не ждёт MAX_DELAY — однопоточный воркер не платит
+    задержкой за каждую запись.
+    """
+
+    def __init__(self, model, unique=(), max_delay=MAX_DELAY,
+                 max_batch=MAX_BATCH, wait_timeout=WAIT_TIMEOUT):
+        self.model = model
+        self.unique = tuple(unique)
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.wait_timeout = wait_timeout
+        self.lock = threading.Lock()
+        self.full = threading.Event()
+        self.queue = []
+        self.leading = False
+        self.alone = False
+
+    @property
+    def db(self):
+        return self.model.objects.db
+
+    def save(self, obj):
+        if connections[self.db].in_atomic_block:
+            return self.save_one(obj)
+        waiter = Waiter(obj)
+        with self.lock:
+            self.queue.append(waiter)
+            leader = not self.leading
+            self.leading = True
+            if len(self.queue) >= self.max_batch:
+                self.full.set()
+        if leader:
+            if not self.alone:
+                self.full.wait(self.max_delay)
+            with self.lock:
+                batch, self.queue = self.queue, []
+                self.leading = False
+                self.alone = len(batch) == 1
+                self.full.clear()
+            self.commit(batch)
+        if not waiter.event.wait(self.wait_timeout):
+            raise TimeoutError(
+                f'Пачка не зафиксирована за {self.wait_timeout} с'
+            )
+        if waiter.error is not None:
+            raise waiter.error
+        return waiter.created
+
+    def key(self, obj):
+        return tuple(getattr(obj, field) for field in self.unique)
+
+    def save_one(self, obj):
+        if self.unique and self.model.objects.filter(
+            **dict(zip(self.unique, self.key(obj)))
+        ).exists():
+            return False
+        obj.save()
+        return True
+
+    def commit(self, batch):
+        # Ожидающих будит finally, даже если ведущий прерван исключением
+        # вне Exception: строки, до которых он не дошёл, — с ошибкой.
+        pending = list(batch)
+        try:
+            try:
+                with transaction.atomic(using=self.db):
+                    self.insert(batch)
+                pending = []
+            except Exception:
+                for waiter in batch:
+                    try:
+                        with transaction.atomic(using=self.db):
+                            waiter.created = self.save_one(waiter.obj)
+                    except Exception as error:
+                        waiter.error = error
+                    pending.remove(waiter)
+        finally:
+            for waiter in pending:
+                waiter.error = RuntimeError('Пачка не записана')
+            for waiter in batch:
+                waiter.event.set()
+
+    def existing(self, batch):
+        if not self.unique:
+            return set()
+        lookups = {
+            f'{field}__in': {self.key(waiter.obj)[n] for waiter in batch}
+            for n, field in enumerate(self.unique)
+        }
+        return set(
+            self.model.objects.filter(**lookups).values_list(*self.unique)
+        )
+
+    def insert(self, batch):
+        seen = self.existing(batch)
+        new = []
+        for waiter in batch:
+            key = self.key(waiter.obj)
+            waiter.created = not self.unique or key not in seen
+            if waiter.created:
+                seen.add(key)
+                new.append(waiter.obj)
+        for obj in new:
+            pre_save.send(
+                sender=self.model, instance=obj, raw=False, using=self.db,
+                update_fields=None,
+            )
+        self.model.objects.bulk_create(new)
+        if new and new[0].pk is None:
+            self.assign_pks(new)
+        for obj in new:
+            obj._state.adding = False
+            obj._state.db = self.db
+            post_save.send(
+                sender=self.model, instance=obj, created=True,
+                update_fields=None, raw=False, using=self.db,
+            )
+
+    def assign_pks(self, objs):
+        # SQLite не возвращает ключи из bulk_create. Транзакция держит
+        # блокировку записи, а AUTOINCREMENT выдаёт ключи подряд, так что
+        # ключи пачки — последние len(objs) перед last_insert_rowid().
+        with connections[self.db].cursor() as cursor:
+            cursor.execute('SELECT last_insert_rowid()')
+            last = cursor.fetchone()[0]
+        for pk, obj in enumerate(objs, start=last - len(objs) + 1):
+            obj.pk = pk
@@ -0,0 +1,44 @@
+import base64
+from io import BytesIO
+
+from PIL import Image, ImageFilter, ImageOps
+
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_BLUR = 1
+PLACEHOLDER_QUALITY = 40
+
+
+def image_preview(file, aspect=None):
+    """Размеры картинки и её размытая копия в виде data URI.
+
+    Копия шириной PLACEHOLDER_WIDTH точек весит сотни байт и
+    встраивается прямо в страницу. С aspect=(ширина, высота) картинка
+    сначала обрезается по центру до этих пропорций, как миниатюра,
+    которую заглушка будет заменять. Возвращает None, если файл
+    не открывается как картинка.
+    """
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            image.load()
+            width, height = image.size
+            image = image.convert('RGB')
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        file.seek(0)
+    if aspect is not None:
+        size = (
+            PLACEHOLDER_WIDTH,
+            max(1, round(PLACEHOLDER_WIDTH * aspect[1] / aspect[0])),
+        )
+        image = ImageOps.fit(image, size)
+    else:
+        image.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH * 4))
+    image = image.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=PLACEHOLDER_QUALITY)
+    placeholder = 'data:image/jpeg;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+    return width, height, placeholder
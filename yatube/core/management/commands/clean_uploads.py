@@ -0,0 +1,37 @@
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Upload
+from core.uploads import upload_dir
+
+MAX_AGE = timedelta(days=1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет брошенные докачки картинок и недописанные файлы '
+        'загрузок старше суток.'
+    )
+
+    def handle(self, *args, **options):
+        deleted, _ = Upload.objects.filter(
+            created__lt=timezone.now() - MAX_AGE
+        ).delete()
+        live = {f'{token}.part' for token in Upload.objects.values_list(
+            'token', flat=True
+        )}
+        directory = upload_dir()
+        threshold = time.time() - MAX_AGE.total_seconds()
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name not in live and os.path.getmtime(path) < threshold:
+                os.unlink(path)
+                removed += 1
+        self.stdout.write(
+            f'Докачек удалено: {deleted}, файлов удалено: {removed}'
+        )
@@ -0,0 +1,95 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from core.fields import CompressedTextField
+from core.utils import iter_pk_chunks
+
+SAMPLE_SIZE = 1000
+
+
+def compressed_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, CompressedTextField):
+                yield model, field
+
+
+def stored_size(model, field):
+    """Сколько байт занимают значения поля в базе (текст в UTF-8)."""
+    with connections[model._base_manager.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(SUM(LENGTH(CAST({} AS BLOB))), 0) '
+            'FROM {}'.format(field.column, model._meta.db_table)
+        )
+        return cursor.fetchone()[0]
+
+
+def read_time(model, field, sample=SAMPLE_SIZE):
+    """Время чтения последних sample значений поля, в миллисекундах."""
+    started = time.perf_counter()
+    list(model._base_manager.order_by('-pk').values_list(
+        field.name, flat=True
+    )[:sample])
+    return (time.perf_counter() - started) * 1000
+
+
+def database_size(alias='default'):
+    with connections[alias].cursor() as cursor:
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        'Перезаписывает пачками тексты в полях со сжатием, чтобы '
+        'старые строки сжались по текущему порогу, и сравнивает размер '
+        'данных и время чтения до и после.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк перезаписывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--sample', type=int, default=SAMPLE_SIZE,
+            help='Сколько строк читать при замере времени.',
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Выполнить VACUUM, чтобы файл базы уменьшился.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'База: {database_size()} байт')
+        for model, field in compressed_fields():
+            label = f'{model._meta.label}.{field.name}'
+            size = stored_size(model, field)
+            elapsed = read_time(model, field, options['sample'])
+            rewritten = self.recompress(model, field, options['batch_size'])
+            self.stdout.write(
+                f'{label}: строк {rewritten}, '
+                f'{size} -> {stored_size(model, field)} байт, '
+                f'чтение {elapsed:.1f} -> '
+                f'{read_time(model, field, options["sample"]):.1f} мс'
+            )
+        if options['vacuum']:
+            with connections['default'].cursor() as cursor:
+                cursor.execute('VACUUM')
+        self.stdout.write(f'База: {database_size()} байт')
+
+    def recompress(self, model, field, batch_size):
+        rewritten = 0
+        for pks in iter_pk_chunks(model._base_manager.all(), batch_size):
+            objs = list(
+                model._base_manager.filter(pk__in=pks).only('pk', field.name)
+            )
+            with transaction.atomic(using=model._base_manager.db):
+                model._base_manager.bulk_update(objs, (field.name,))
+            rewritten += len(objs)
+        return rewritten
@@ -0,0 +1,150 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.db.base import PRAGMAS, apply_pragmas
+
+ROWS = 10000
+PAGE = 10
+# Варианты прогона: (название, прагмы, постоянное подключение,
+# BEGIN IMMEDIATE). Каждый вариант меняет одну настройку относительно
+# первого, последний включает всё, как core.db.
+VARIANTS = (
+    ('по умолчанию', False, False, False),
+    ('прагмы', True, False, False),
+    ('постоянное подключение', False, True, False),
+    ('BEGIN IMMEDIATE', False, False, True),
+    ('core.db', True, True, True),
+)
+
+
+def create_database(path):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(
+        'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, '
+        'pub_date REAL, text TEXT)'
+    )
+    conn.execute('CREATE INDEX post_author ON post (author, pub_date)')
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO post (author, pub_date, text) VALUES (?, ?, ?)',
+        [(n % 100, n, 'Текст поста ' * 20) for n in range(ROWS)],
+    )
+    conn.execute('COMMIT')
+    conn.close()
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий чтения или записи до истечения времени."""
+
+    def __init__(self, path, variant, write, deadline):
+        super().__init__(daemon=True)
+        self.path = path
+        _, self.pragmas, self.reuse, self.immediate = variant
+        self.write = write
+        self.deadline = deadline
+        self.done = 0
+        self.errors = 0
+
+    def connect(self):
+        conn = sqlite3.connect(self.path, isolation_level=None, timeout=5)
+        if self.pragmas:
+            apply_pragmas(conn)
+        return conn
+
+    def operation(self, conn):
+        if self.write:
+            conn.execute('BEGIN IMMEDIATE' if self.immediate else 'BEGIN')
+            # Как в представлениях: сначала чтение, затем запись.
+            conn.execute('SELECT COUNT(*) FROM post WHERE author = ?',
+                         [random.randrange(100)]).fetchone()
+            conn.execute(
+                'INSERT INTO post (author, pub_date, text) VALUES (?, ?, ?)',
+                [random.randrange(100), time.time(), 'Новый пост'],
+            )
+            conn.execute('COMMIT')
+        else:
+            conn.execute(
+                'SELECT id, text FROM post WHERE author = ? '
+                'ORDER BY pub_date DESC LIMIT ?',
+                [random.randrange(100), PAGE],
+            ).fetchall()
+
+    def run(self):
+        # Без постоянного подключения каждая операция открывает его
+        # заново, как запрос с CONN_MAX_AGE = 0.
+        conn = self.connect() if self.reuse else None
+        while time.monotonic() < self.deadline:
+            current = conn or self.connect()
+            try:
+                self.operation(current)
+                self.done += 1
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if current.in_transaction:
+                    current.execute('ROLLBACK')
+            finally:
+                if conn is None:
+                    current.close()
+        if conn is not None:
+            conn.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite при одновременных '
+        'чтениях и записях: настройки по умолчанию, по отдельности прагмы '
+        'core.db, постоянное подключение и BEGIN IMMEDIATE, и всё вместе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seconds', type=float, default=3.0,
+            help='Длительность каждого прогона.',
+        )
+        parser.add_argument(
+            '--readers', type=int, default=4, help='Число читающих потоков.',
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2, help='Число пишущих потоков.',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            'Прагмы: ' + ', '.join(f'{k}={v}' for k, v in PRAGMAS.items())
+        )
+        for variant in VARIANTS:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                create_database(path)
+                self.report(variant, self.run(path, variant, options),
+                            options)
+
+    def run(self, path, variant, options):
+        deadline = time.monotonic() + options['seconds']
+        workers = [
+            Worker(path, variant, write, deadline)
+            for write, count in ((False, options['readers']),
+                                 (True, options['writers']))
+            for _ in range(count)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return workers
+
+    def report(self, variant, workers, options):
+        title = variant[0]
+        for write, name in ((False, 'чтений'), (True, 'записей')):
+            done = sum(w.done for w in workers if w.write == write)
+            errors = sum(w.errors for w in workers if w.write == write)
+            self.stdout.write(
+                f'{title}: {name} {done / options["seconds"]:.0f}/с, '
+                f'ошибок {errors}'
+            )
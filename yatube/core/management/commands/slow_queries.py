@@ -0,0 +1,77 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.slow_queries import read_log
+
+SORT_KEYS = ('total', 'count', 'max')
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных запросов: запросы с одинаковым '
+        'нормализованным SQL объединяются, для каждого выводятся '
+        'представления, строки шаблонов и план самого долгого.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько запросов вывести.',
+        )
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='total',
+            help='Порядок: по суммарному времени, числу или максимуму.',
+        )
+        parser.add_argument(
+            '--log', default=None,
+            help='Путь к журналу вместо SLOW_QUERY_LOG.',
+        )
+
+    def handle(self, *args, **options):
+        groups = {}
+        for record in read_log(options['log'] or settings.SLOW_QUERY_LOG):
+            group = groups.setdefault(record['fingerprint'], {
+                'sql': record['sql'],
+                'count': 0,
+                'total': 0.0,
+                'max': 0.0,
+                'plan': [],
+                'views': Counter(),
+                'templates': Counter(),
+            })
+            group['count'] += 1
+            group['total'] += record['duration']
+            if record['duration'] >= group['max']:
+                group['max'] = record['duration']
+                group['plan'] = record['plan']
+            group['views'][record['view'] or '-'] += 1
+            if record['template']:
+                position = f'{record["template"]}:{record["line"]}'
+                group['templates'][position] += 1
+        if not groups:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        ordered = sorted(
+            groups.values(), key=lambda group: group[options['sort']],
+            reverse=True,
+        )
+        for group in ordered[:options['limit']]:
+            self.write_group(group)
+
+    def write_group(self, group):
+        self.stdout.write(
+            '{count} раз, всего {total:.3f} с, в среднем {avg:.3f} с, '
+            'максимум {max:.3f} с'.format(
+                avg=group['total'] / group['count'], **group
+            )
+        )
+        self.stdout.write(f'  {group["sql"]}')
+        for name, counter in (('view', group['views']),
+                              ('template', group['templates'])):
+            for value, count in counter.most_common(3):
+                self.stdout.write(f'  {name}: {value} ({count})')
+        for row in group['plan']:
+            self.stdout.write(f'  plan: {row}')
+        self.stdout.write('')
@@ -0,0 +1,111 @@
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Увеличивается при любом изменении разметки: команда render_texts
+# перерисовывает строки, отрисованные прежней версией.
+RENDERER_VERSION = 1
+
+INLINE = re.compile(
+    r'`(?P<code>[^`\n]+)`'
+    r'|\[(?P<label>[^\]\n]+)\]\((?P<href>https?://(?:[^\s()<>&]|&amp;)+)\)'
+    r'|(?P<url>https?://(?:[^\s<>&]|&amp;)*[^\s<>&.,;:!?()\]])'
+    r'|\*\*(?P<strong>[^*\n]+)\*\*'
+    r'|\*(?P<em>[^*\n]+)\*'
+)
+HEADING = re.compile(r'(#{1,3}) +(.+)')
+LIST_ITEM = re.compile(r'[-*] +(.+)')
+QUOTE = re.compile(r'&gt; ?(.*)')
+FENCE = '```'
+
+
+def link(href, label):
+    return f'<a href="{href}" rel="nofollow noopener">{label}</a>'
+
+
+def render_inline(text):
+    def replace(match):
+        if match['code'] is not None:
+            return f'<code>{match["code"]}</code>'
+        if match['href'] is not None:
+            return link(match['href'], match['label'])
+        if match['url'] is not None:
+            return link(match['url'], match['url'])
+        if match['strong'] is not None:
+            return f'<strong>{render_inline(match["strong"])}</strong>'
+        return f'<em>{render_inline(match["em"])}</em>'
+    return INLINE.sub(replace, text)
+
+
+def render_heading(heading):
+    # Заголовки в тексте поста мельче заголовков страницы.
+    level = len(heading[1]) + 2
+    return f'<h{level}>{render_inline(heading[2])}</h{level}>'
+
+
+def render_block(lines):
+    items = [LIST_ITEM.fullmatch(line) for line in lines]
+    if all(items):
+        return '<ul>{}</ul>'.format(''.join(
+            f'<li>{render_inline(item[1])}</li>' for item in items
+        ))
+    quotes = [QUOTE.fullmatch(line) for line in lines]
+    if all(quotes):
+        return '<blockquote><p>{}</p></blockquote>'.format('<br>'.join(
+            render_inline(quote[1]) for quote in quotes
+        ))
+    return '<p>{}</p>'.format('<br>'.join(map(render_inline, lines)))
+
+
+def render(text):
+    """HTML из текста с упрощённой разметкой Markdown.
+
+    Поддерживаются абзацы, заголовки #, списки -, цитаты >, блоки кода
+    ```, `код`, **жирный**, *курсив*, ссылки [текст](адрес) и голые
+    адреса. Текст экранируется до разбора, а теги и атрибуты создаёт
+    только сам рендерер, причём ссылки — лишь на http и https, так что
+    результат безопасно выводить без дополнительной очистки.
+    """
+    lines = escape(text.replace('\r\n', '\n')).split('\n')
+    blocks = []
+    paragraph = []
+    code = None
+    for line in lines:
+        if code is not None:
+            if line.strip() == FENCE:
+                blocks.append('<pre><code>{}</code></pre>'.format(
+                    '\n'.join(code)
+                ))
+                code = None
+            else:
+                code.append(line)
+            continue
+        heading = HEADING.fullmatch(line.strip())
+        if line.strip() == FENCE or not line.strip() or heading:
+            if paragraph:
+                blocks.append(render_block(paragraph))
+                paragraph = []
+            if heading:
+                blocks.append(render_heading(heading))
+            elif line.strip() == FENCE:
+                code = []
+            continue
+        paragraph.append(line.rstrip())
+    if code is not None:
+        blocks.append('<pre><code>{}</code></pre>'.format('\n'.join(code)))
+    if paragraph:
+        blocks.append(render_block(paragraph))
+    return '\n'.join(blocks)
+
+
+def rendered_html(obj):
+    """Сохранённый HTML текста объекта.
+
+    Строки, которые ещё ни разу не отрисовывались, рисуются на лету,
+    пока их не обработает render_texts. Отрисованные прежней версией
+    показываются как есть до перерисовки той же командой.
+    """
+    if obj.text_html:
+        return mark_safe(obj.text_html)
+    return mark_safe(render(obj.text))
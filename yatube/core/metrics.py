@@ -0,0 +1,263 @@
+import fcntl
+import glob
+import json
+import os
+import resource
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+from .utils import atomic_write
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FLUSH_INTERVAL = 1.0
+SNAPSHOT_NAME = 'metrics-{}.json'
+# Счётчики завершившихся процессов, собранные в один файл.
+RETIRED_NAME = SNAPSHOT_NAME.format('retired')
+LOCK_NAME = 'metrics.lock'
+
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время обработки запроса по представлениям.'
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'Число SQL-запросов по представлениям.'
+    ),
+    'yatube_db_query_seconds_total': (
+        'counter', 'Суммарное время SQL-запросов по представлениям.'
+    ),
+    'yatube_page_cache_requests_total': (
+        'counter', 'Обращения к кешу страниц по результату.'
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Обращения к уровням кеша по результату.'
+    ),
+    'yatube_thumbnails_generated_total': (
+        'counter', 'Число созданных миниатюр.'
+    ),
+    'yatube_process_start_time_seconds': (
+        'gauge', 'Время запуска рабочего процесса.'
+    ),
+    'yatube_process_max_rss_bytes': (
+        'gauge', 'Пиковая память рабочего процесса.'
+    ),
+}
+
+
+class Registry:
+    """Счётчики процесса без блокировок.
+
+    Каждый поток пишет только в свой словарь, а выгрузка суммирует копии
+    словарей всех потоков. Раз в FLUSH_INTERVAL секунд итог процесса
+    записывается в METRICS_DIR, откуда /metrics собирает данные всех
+    рабочих процессов gunicorn.
+    """
+
+    def __init__(self):
+        self.collectors = []
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.started = time.time()
+        self.flushed = 0
+        self.local = threading.local()
+        self.thread_counters = []
+
+    def counters(self):
+        if self.pid != os.getpid():
+            # После fork счётчики родителя не должны попасть в итог.
+            self.reset()
+        counters = getattr(self.local, 'counters', None)
+        if counters is None:
+            counters = self.local.counters = defaultdict(float)
+            self.thread_counters.append(counters)
+        return counters
+
+    def inc(self, name, value=1, **labels):
+        self.counters()[name, tuple(sorted(labels.items()))] += value
+
+    def observe(self, name, value, **labels):
+        counters = self.counters()
+        labels = tuple(sorted(labels.items()))
+        for bucket in BUCKETS:
+            if value <= bucket:
+                counters[f'{name}_bucket', labels + (('le', bucket),)] += 1
+        counters[f'{name}_bucket', labels + (('le', '+Inf'),)] += 1
+        counters[f'{name}_sum', labels] += value
+        counters[f'{name}_count', labels] += 1
+
+    def collect(self):
+        """Счётчики процесса и показания сборщиков списком сэмплов."""
+        totals = defaultdict(float)
+        for counters in list(self.thread_counters):
+            for key, value in dict(counters).items():
+                totals[key] += value
+        samples = [
+            [name, dict(labels), value]
+            for (name, labels), value in totals.items()
+        ]
+        for collector in self.collectors:
+            samples.extend(collector())
+        return samples
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.flushed < FLUSH_INTERVAL:
+            return
+        self.flushed = now
+        self.counters()
+        path = os.path.join(
+            settings.METRICS_DIR, SNAPSHOT_NAME.format(self.pid)
+        )
+        atomic_write(path, json.dumps(
+            {'pid': self.pid, 'samples': self.collect()}
+        ))
+
+
+registry = Registry()
+
+
+def process_collector():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    labels = {'pid': str(registry.pid)}
+    return [
+        ['yatube_process_start_time_seconds', labels, registry.started],
+        ['yatube_process_max_rss_bytes', labels, usage.ru_maxrss * 1024],
+    ]
+
+
+def cache_collector():
+    from django.core.cache import cache
+
+    if not hasattr(cache, 'stats'):
+        return []
+    stats = cache.stats()
+    return [
+        ['yatube_cache_requests_total', {'tier': tier, 'result': result},
+         stats[f'{tier}_{result}']]
+        for tier in ('local', 'shared') for result in ('hits', 'misses')
+    ]
+
+
+registry.collectors.extend((process_collector, cache_collector))
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as snapshot:
+            return json.load(snapshot)
+    except (OSError, ValueError):
+        return None
+
+
+def is_counter(name):
+    return METRICS.get(metric_family(name), ('gauge',))[0] != 'gauge'
+
+
+def retire_dead():
+    """Переносит счётчики завершившихся процессов в RETIRED_NAME.
+
+    Файлы мёртвых pid удаляются, и каталог не растёт с каждым
+    перезапуском воркеров; итоговые счётчики при этом не уменьшаются.
+    Блокировка не даёт двум /metrics учесть один файл дважды.
+    """
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    retired_path = os.path.join(settings.METRICS_DIR, RETIRED_NAME)
+    with open(os.path.join(settings.METRICS_DIR, LOCK_NAME), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for path in glob.glob(os.path.join(settings.METRICS_DIR,
+                                           SNAPSHOT_NAME.format('*'))):
+            data = read_snapshot(path)
+            if data and data['pid'] is not None and not pid_alive(
+                data['pid']
+            ):
+                dead.append((path, data))
+        if not dead:
+            return
+        totals = defaultdict(float)
+        retired = read_snapshot(retired_path) or {'samples': []}
+        for data in [retired] + [data for _, data in dead]:
+            for name, labels, value in data['samples']:
+                if is_counter(name):
+                    totals[name, tuple(sorted(labels.items()))] += value
+        atomic_write(retired_path, json.dumps({'pid': None, 'samples': [
+            [name, dict(labels), value]
+            for (name, labels), value in totals.items()
+        ]}))
+        for path, _ in dead:
+            os.unlink(path)
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return '{' + pairs + '}'
+
+
+def metric_family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        base = name[:-len(suffix)]
+        if name.endswith(suffix) and base in METRICS:
+            return base
+    return name
+
+
+def exposition():
+    """Метрики всех процессов в текстовом формате Prometheus.
+
+    Счётчики суммируются по живым процессам и RETIRED_NAME, куда
+    retire_dead собирает завершившиеся, чтобы итог не уменьшался;
+    показатели процессов берутся только у живых.
+    """
+    registry.flush(force=True)
+    retire_dead()
+    totals = defaultdict(float)
+    for path in glob.glob(os.path.join(settings.METRICS_DIR,
+                                       SNAPSHOT_NAME.format('*'))):
+        data = read_snapshot(path)
+        if data is None:
+            continue
+        alive = data['pid'] is not None and pid_alive(data['pid'])
+        for name, labels, value in data['samples']:
+            family = metric_family(name)
+            if not is_counter(name) and not alive:
+                continue
+            totals[family, name, tuple(sorted(labels.items()))] += value
+    lines = []
+    current = None
+    for (family, name, labels), value in sorted(totals.items(),
+                                                key=sample_order):
+        if family != current:
+            current = family
+            kind, help_text = METRICS.get(family, ('untyped', ''))
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+        lines.append(f'{name}{format_labels(dict(labels))} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def sample_order(item):
+    (family, name, labels), _ = item
+    le = dict(labels).get('le')
+    bucket = float('inf') if le in (None, '+Inf') else float(le)
+    rest = tuple((key, str(value)) for key, value in labels if key != 'le')
+    return family, name, rest, bucket
@@ -0,0 +1,165 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import connections
+
+from .metrics import registry
+from .page_cache import get_page, render_started, set_page
+from .slow_queries import SlowQueryLogger
+from .snapshot import is_snapshot
+
+
+class QueryTimer:
+    """execute_wrapper, считающий число и время SQL-запросов."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов для /metrics (см. core.metrics).
+
+    Стоит первым в MIDDLEWARE, чтобы учитывать и ответы из кеша страниц.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if is_snapshot(request):
+            return self.get_response(request)
+        start = time.perf_counter()
+        queries = QueryTimer()
+        # Запросы ко всем базам, в том числе к архиву.
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(queries)
+                )
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        page_cache = response.get('X-Page-Cache')
+        if page_cache == 'hit':
+            view = 'page_cache'
+        elif request.resolver_match is not None:
+            view = request.resolver_match.view_name
+        else:
+            view = 'unresolved'
+        registry.observe(
+            'yatube_request_duration_seconds', duration, view=view
+        )
+        registry.inc('yatube_db_queries_total', queries.count, view=view)
+        registry.inc(
+            'yatube_db_query_seconds_total', queries.duration, view=view
+        )
+        if page_cache:
+            registry.inc('yatube_page_cache_requests_total', result=page_cache)
+        registry.flush()
+        return response
+
+
+class SlowQueryMiddleware:
+    """Пишет медленные запросы в журнал yatube.slow_queries.
+
+    Порог задаётся SLOW_QUERY_THRESHOLD в секундах; None выключает
+    журнал. Отчёт по журналу строит manage.py slow_queries.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD', None)
+        if threshold is None or is_snapshot(request):
+            return self.get_response(request)
+        logger = SlowQueryLogger(threshold, request)
+        # Запросы ко всем базам, в том числе к архиву.
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(logger)
+                )
+            return self.get_response(request)
+
+
+class SessionMarkerMiddleware:
+    """Ставит cookie SESSION_MARKER_COOKIE, пока пользователь вошёл.
+
+    Cookie сессии недоступна скрипту, а по этой он решает, заполнять ли
+    дырки ({% hole %}) страниц из кеша и статических копий: анониму
+    заполнять нечего, и запрос за фрагментами не отправляется.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        name = settings.SESSION_MARKER_COOKIE
+        if request.user.is_authenticated:
+            if name not in request.COOKIES:
+                response.set_cookie(name, '1', samesite='Lax')
+        elif name in request.COOKIES:
+            response.delete_cookie(name)
+        return response
+
+
+class AnonymousPageCacheMiddleware:
+    """Кеш целых страниц для анонимных GET-запросов.
+
+    Стоит в начале MIDDLEWARE, поэтому попадание в кеш обходится без
+    сессий, аутентификации, ORM и шаблонов. Кешируются только страницы,
+    для которых представление вызвало core.page_cache.tag_response, и
+    только если ответ не ставит cookie и не использует CSRF-токен.
+
+    Персональные части таких страниц вынесены в дырки ({% hole %}).
+    Для вошедшего пользователя они рисуются сразу, поэтому его страницы
+    в кеш не пишутся, а из кеша страница отдаётся только запросам без
+    cookie сессии. Запросы с cookie сообщений кеш не трогают.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_cacheable_request(request):
+            return self.get_response(request)
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            response = get_page(request)
+            if response is not None:
+                response['X-Page-Cache'] = 'hit'
+                return response
+        # Версии тегов сравниваются с моментом до вызова view: сброс во
+        # время отрисовки не даст закешировать устаревшую страницу.
+        started = render_started()
+        response = self.get_response(request)
+        if self.is_cacheable_response(request, response):
+            if set_page(request, response, started):
+                response['X-Page-Cache'] = 'miss'
+            else:
+                response['X-Page-Cache'] = 'stale'
+        return response
+
+    @staticmethod
+    def is_cacheable_request(request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and CookieStorage.cookie_name not in request.COOKIES
+        )
+
+    @staticmethod
+    def is_cacheable_response(request, response):
+        return (
+            getattr(request, 'page_cache_tags', None)
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and not request.user.is_authenticated
+        )
@@ -0,0 +1,55 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class DirtyPath(models.Model):
+    """Адрес страницы, статическую копию которой нужно перестроить."""
+    path = models.CharField(max_length=255, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Устаревшая страница'
+        verbose_name_plural = 'Устаревшие страницы'
+
+    def __str__(self):
+        return self.path
+
+
+class Blob(models.Model):
+    """Файл в core.storage.ContentAddressedStorage и число ссылок на него."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveIntegerField(default=0)
+    refs = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return self.name
+
+
+class Upload(models.Model):
+    """Докачиваемая по кускам загрузка картинки (core.uploads)."""
+    token = models.UUIDField(
+        primary_key=True, default=uuid.uuid4, editable=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='uploads',
+    )
+    length = models.PositiveIntegerField()
+    offset = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Загрузка'
+        verbose_name_plural = 'Загрузки'
+
+    def __str__(self):
+        return f'{self.token} {self.offset}/{self.length}'
@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.urls import ResolverMatch
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_KEY = 'page:{}'
+TAG_VERSION_KEY = 'page_tag:{}'
+
+
+def tag_response(request, *tags):
+    """Разрешает кешировать страницу для анонимов и задаёт её зависимости.
+
+    Страница остаётся в кеше, пока не сброшен ни один из тегов
+    (см. invalidate_tags).
+    """
+    request.page_cache_tags = getattr(request, 'page_cache_tags', ()) + tags
+
+
+def invalidate_tags(*tags):
+    """Сбрасывает все закешированные страницы, зависящие от тегов."""
+    version = time.time_ns()
+    cache.set_many(
+        {TAG_VERSION_KEY.format(tag): version for tag in tags}, None
+    )
+
+
+def page_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return PAGE_CACHE_KEY.format(path)
+
+
+def render_started():
+    """Метка начала отрисовки страницы для set_page."""
+    return time.time_ns()
+
+
+def tag_versions(tags):
+    keys = {TAG_VERSION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    return {keys[key]: version for key, version in found.items()}
+
+
+def get_page(request):
+    """Страница из кеша или None.
+
+    Вместе с ответом восстанавливается request.resolver_match (без
+    функции представления): по нему middleware узнают представление,
+    не разбирая адрес заново.
+    """
+    cached = cache.get(page_key(request))
+    if cached is None:
+        return None
+    response, versions, route = cached
+    if tag_versions(list(versions)) != versions:
+        return None
+    if route is not None:
+        request.resolver_match = ResolverMatch(None, *route)
+    return response
+
+
+def set_page(request, response, started):
+    """Кладёт страницу в кеш с версиями тегов на момент started.
+
+    Версия тега — время последнего сброса. Если тег сброшен после
+    начала отрисовки, страница могла собраться из старых данных и не
+    кешируется: иначе она жила бы под новой версией до истечения
+    PAGE_CACHE_TIMEOUT. Теги без версии получают started через add,
+    чтобы не затереть сброс, случившийся в этот же момент.
+    """
+    tags = list(request.page_cache_tags)
+    for tag in tags:
+        cache.add(TAG_VERSION_KEY.format(tag), started, None)
+    versions = tag_versions(tags)
+    if len(versions) != len(set(tags)) or any(
+        version > started for version in versions.values()
+    ):
+        return False
+    match = request.resolver_match
+    route = match and (
+        match.args, match.kwargs, match.url_name, match.app_names,
+        match.namespaces,
+    )
+    cache.set(
+        page_key(request), (response, versions, route), PAGE_CACHE_TIMEOUT
+    )
+    return True
@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10000
+COUNT_CACHE_KEY = 'paginator_count:{}'
+COUNT_CACHE_TIMEOUT = 60
+
+
+def estimate_rows(model, using='default'):
+    """Примерное число строк в таблице модели по статистике СУБД.
+
+    Возвращает None, если статистика недоступна (например, для SQLite
+    до первого ANALYZE).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s', [table]
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = 'sqlite_stat1'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [table]
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    if row is None or row[0] is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, не считающий COUNT(*) по большим нефильтрованным таблицам.
+
+    Для запросов без условий берётся оценка из статистики СУБД, точный
+    подсчёт выполняется только для небольших таблиц и выборок с фильтром.
+    """
+    estimate_threshold = ESTIMATE_THRESHOLD
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimate_rows(
+                self.object_list.model, self.object_list.db
+            )
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class FeedPaginator(EstimatedCountPaginator):
+    """Пагинатор лент с кешируемым числом записей.
+
+    Число записей хранится в кеше под ключом count_key (ключ сбрасывается
+    при записи постов, см. posts.signals) и живёт не дольше
+    COUNT_CACHE_TIMEOUT. Точно считаются только выборки меньше
+    estimate_threshold: подсчёт ограничен LIMIT, а для больших таблиц
+    берётся оценка из статистики СУБД.
+
+    С timeline (core.timeline.Timeline) страницы в пределах списка id
+    берутся из него, а число записей полного списка — его длина.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_key=None, timeline=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.timeline = timeline
+
+    @cached_property
+    def count(self):
+        if self.timeline is not None and self.timeline.complete:
+            return len(self.timeline.ids)
+        if self.count_key is None:
+            return self._count()
+        key = COUNT_CACHE_KEY.format(self.count_key)
+        count = cache.get(key)
+        if count is None:
+            count = self._count()
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def _count(self):
+        if not hasattr(self.object_list, 'query'):
+            return len(self.object_list)
+        limited = self.object_list.order_by()[:self.estimate_threshold + 1]
+        count = limited.count()
+        if count <= self.estimate_threshold:
+            return count
+        return EstimatedCountPaginator.count.func(self)
+
+    def page(self, number):
+        # Срез не ограничивается оценкой count: устаревшее или примерное
+        # число записей не должно прятать посты текущей страницы.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        objects = None
+        if self.timeline is not None and self.timeline.covers(top):
+            objects = self.timeline.hydrate(self.timeline.ids[bottom:top])
+        if objects is None:
+            objects = self.object_list[bottom:top]
+        page = self._get_page(objects, number, self)
+        page.elided_page_range = list(self.get_elided_page_range(number))
+        return page
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг текущей и по краям, пропуски — ELLIPSIS."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
@@ -0,0 +1,132 @@
+import glob
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+
+from django.template.base import Node
+from django.utils import timezone
+
+logger = logging.getLogger('yatube.slow_queries')
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+def normalize_sql(sql):
+    """SQL без литералов: запросы, отличающиеся только значениями или
+    длиной списка IN (...), сводятся к одной строке."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized):
+    return hashlib.md5(normalized.encode()).hexdigest()[:12]
+
+
+def template_position():
+    """Шаблон и строка узла, во время отрисовки которого идёт запрос.
+
+    Ищется ближайший кадр Node.render_annotated: у узла есть origin
+    и token с номером строки. Стек разбирается только для медленных
+    запросов, так что обычные запросы ничего не платят.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if isinstance(node, Node) and origin and token:
+                name = origin.template_name or origin.name
+                return str(name), token.lineno
+        frame = frame.f_back
+    return None, None
+
+
+def explain(connection, sql, params):
+    """План запроса; на его получение ошибки не пробрасываются."""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if prefix is None or not sql.lstrip().upper().startswith('SELECT'):
+        return []
+    try:
+        cursor = connection.create_cursor()
+        try:
+            cursor.execute(prefix + sql, params)
+            return [
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+    except Exception:
+        return []
+
+
+class SlowQueryLogger:
+    """execute_wrapper, пишущий в журнал запросы дольше threshold секунд.
+
+    Каждая запись — строка JSON: длительность, нормализованный SQL,
+    база, план, представление и строка шаблона. Параметры запроса в журнал
+    не попадают.
+    """
+    def __init__(self, threshold, request=None):
+        self.threshold = threshold
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.log(sql, params, many, context, duration)
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match is not None else None
+
+    def log(self, sql, params, many, context, duration):
+        normalized = normalize_sql(sql)
+        template, line = template_position()
+        record = {
+            'time': timezone.now().isoformat(),
+            'duration': round(duration, 6),
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'many': many,
+            'database': context['connection'].alias,
+            'view': self.view_name(),
+            'path': getattr(self.request, 'path', None),
+            'template': template,
+            'line': line,
+            'plan': [] if many else explain(
+                context['connection'], sql, params
+            ),
+        }
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+def read_log(path):
+    """Записи журнала вместе с ротированными файлами, битые пропускаются."""
+    for name in sorted(glob.glob(glob.escape(path) + '*'), reverse=True):
+        with open(name, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
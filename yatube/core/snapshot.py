@@ -0,0 +1,128 @@
+import os
+import sys
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import QueryDict
+from django.utils import timezone
+
+from .models import DirtyPath
+from .utils import atomic_write
+
+SNAPSHOT_BATCH_SIZE = 500
+SNAPSHOT_INDEX = 'index.html'
+# Сколько первых страниц каждой ленты сохраняется; более глубокие
+# страницы прокси отдаёт из приложения.
+SNAPSHOT_FEED_PAGES = 5
+# Ключ environ, которым помечены запросы отрисовки копий.
+SNAPSHOT_ENVIRON_KEY = 'yatube.snapshot'
+
+
+def snapshot_file(path):
+    """Файл копии страницы.
+
+    /group/x/ -> SNAPSHOT_ROOT/group/x/index.html,
+    /group/x/?page=2 -> SNAPSHOT_ROOT/group/x/page/2/index.html.
+    """
+    path, _, query = path.partition('?')
+    parts = [settings.SNAPSHOT_ROOT, path.strip('/')]
+    page = QueryDict(query).get('page')
+    if page:
+        parts += ['page', page]
+    return os.path.join(*parts, SNAPSHOT_INDEX)
+
+
+def feed_paths(path, pages=SNAPSHOT_FEED_PAGES):
+    """Адреса первых pages страниц ленты."""
+    return [path] + [f'{path}?page={page}' for page in range(2, pages + 1)]
+
+
+def mark_dirty(*paths):
+    """Ставит страницы в очередь на перестроение статических копий.
+
+    created уже стоящей в очереди страницы сдвигается: flush_dirty
+    по нему узнаёт, что страница изменилась во время отрисовки.
+    """
+    DirtyPath.objects.bulk_create(
+        [DirtyPath(path=path) for path in paths], ignore_conflicts=True
+    )
+    DirtyPath.objects.filter(path__in=paths).update(created=timezone.now())
+
+
+def snapshot_request(path):
+    """GET-запрос анонима к path без HTTP-сервера."""
+    path, _, query = path.partition('?')
+    host = settings.SNAPSHOT_HOST
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'HTTP_HOST': host,
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        SNAPSHOT_ENVIRON_KEY: True,
+    })
+
+
+def is_snapshot(request):
+    """Запрос отрисовки копии, а не читателя.
+
+    Middleware, считающие трафик (метрики, медленные запросы,
+    просмотры постов), такие запросы пропускают.
+    """
+    return request.META.get(SNAPSHOT_ENVIRON_KEY, False)
+
+
+class SnapshotRenderer:
+    """Отрисовывает страницы так, как их видит анонимный читатель.
+
+    Запрос проходит через все middleware проекта, но без HTTP-сервера;
+    учёт трафика его пропускает (is_snapshot).
+    """
+    def __init__(self):
+        self.handler = BaseHandler()
+        self.handler.load_middleware()
+
+    def write(self, path):
+        """Обновляет копию страницы; возвращает False, если её больше нет."""
+        response = self.handler.get_response(snapshot_request(path))
+        filename = snapshot_file(path)
+        if response.status_code == 200:
+            atomic_write(filename, response.content)
+            return True
+        if os.path.exists(filename):
+            os.remove(filename)
+        return False
+
+
+def flush_dirty(renderer=None):
+    """Перестраивает все страницы из очереди, возвращает их число.
+
+    Страница уходит из очереди только после записи копии и только если
+    её не пометили снова во время отрисовки (created не изменился):
+    сбой посреди пачки или запись, пришедшая во время отрисовки, не
+    теряют страницу.
+    """
+    renderer = renderer or SnapshotRenderer()
+    done = 0
+    while True:
+        batch = list(DirtyPath.objects.order_by('id').values_list(
+            'id', 'path', 'created'
+        )[:SNAPSHOT_BATCH_SIZE])
+        if not batch:
+            return done
+        for pk, path, marked in batch:
+            renderer.write(path)
+            DirtyPath.objects.filter(id=pk, created=marked).delete()
+        done += len(batch)
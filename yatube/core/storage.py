@@ -0,0 +1,110 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором файл с одним содержимым лежит один раз.
+
+    Имя файла — sha256 содержимого, хеш считается по ходу записи
+    загрузки во временный файл. Повторная загрузка той же картинки
+    возвращает уже существующее имя, поэтому у всех постов с ней общие
+    и миниатюры sorl: их ключ строится из имени исходника. Число ссылок
+    на файл хранится в core.models.Blob; delete() уменьшает его и стирает
+    файл с миниатюрами, только когда ссылок не осталось.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Одинаковые имена означают одинаковое содержимое.
+        return name
+
+    def _save(self, name, content):
+        directory = posixpath.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+        digest = getattr(content, 'sha256', None)
+        if digest and hasattr(content, 'temporary_file_path'):
+            # core.uploads уже записал файл на этот диск и посчитал хеш:
+            # копировать нечего, достаточно переименовать. Если такой
+            # файл уже есть, принятый удалит его владелец.
+            content.flush()
+            return self._commit(
+                directory, ext, content.temporary_file_path(), digest,
+                content.size, owned=False,
+            )
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.path(directory), prefix='.upload-'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            return self._commit(
+                directory, ext, tmp_path, digest.hexdigest(), size
+            )
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def _commit(self, directory, ext, tmp_path, digest, size, owned=True):
+        from .models import Blob
+
+        name = posixpath.join(directory, digest[:2], digest[2:4], digest + ext)
+        path = self.path(name)
+        # Ссылка берётся и файл кладётся на место в одной транзакции, как
+        # и в delete(): UPDATE строки Blob держит блокировку до COMMIT,
+        # поэтому delete() не сотрёт файл, на который уже есть ссылка.
+        # Внутри транзакции вызывающего (Post.save) ссылка откатится
+        # вместе с несохранённой строкой.
+        with transaction.atomic():
+            while not Blob.objects.filter(name=name).update(
+                refs=F('refs') + 1
+            ):
+                Blob.objects.get_or_create(name=name, defaults={'size': size})
+            if os.path.exists(path):
+                if owned:
+                    os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, path)
+        return name
+
+    def delete(self, name):
+        """Снимает одну ссылку; файл без ссылок удаляется с миниатюрами.
+
+        Файлы, загруженные до появления этого хранилища, в Blob не
+        записаны и не удаляются, как и раньше.
+        """
+        from sorl.thumbnail import delete as delete_thumbnails
+        from sorl.thumbnail.images import ImageFile
+
+        from .models import Blob
+
+        with transaction.atomic():
+            Blob.objects.filter(name=name).update(refs=F('refs') - 1)
+            released, _ = Blob.objects.filter(
+                name=name, refs__lte=0
+            ).delete()
+            # Файл стирается под той же блокировкой: _commit() того же
+            # содержимого ждёт COMMIT и затем положит файл заново.
+            if released:
+                super().delete(name)
+        if released:
+            delete_thumbnails(ImageFile(name, self), delete_file=False)
+
+
+post_image_storage = ContentAddressedStorage()
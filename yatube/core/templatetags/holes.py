@@ -0,0 +1,58 @@
+from django import template
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.html import format_html
+
+from ..fragments import render_fragment
+
+register = template.Library()
+
+
+class HoleNode(template.Node):
+    def __init__(self, name, args, nodelist):
+        self.name = name
+        self.args = args
+        self.nodelist = nodelist
+
+    def render(self, context):
+        key = ':'.join(
+            str(part.resolve(context)) for part in [self.name, *self.args]
+        )
+        request = context.get('request')
+        if request is not None and request.user.is_authenticated:
+            # С сессией фрагмент рисуется сразу: страница и без JS
+            # полная, а в общий кеш такой ответ не попадает.
+            html = render_fragment(request, key)
+            if html is not None:
+                return format_html('<div>{}</div>', html)
+        # Запасное содержимое всегда рисуется для анонима, поэтому
+        # страница вокруг дырки одинакова для всех и кешируется целиком.
+        with context.push(user=AnonymousUser()):
+            fallback = self.nodelist.render(context)
+        return format_html('<div data-hole="{}">{}</div>', key, fallback)
+
+
+@register.tag
+def hole(parser, token):
+    """{% hole 'name' arg %}запасной HTML{% endhole %}
+
+    Для анонима рисуется запасное содержимое, которое браузер с cookie
+    SESSION_MARKER_COOKIE заменяет фрагментом, полученным с
+    core.views.fragments (так заполняются закешированные и статические
+    копии страниц). Для пользователя с сессией фрагмент рисуется сразу.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} требует имя фрагмента'
+        )
+    name, *args = [parser.compile_filter(bit) for bit in bits[1:]]
+    nodelist = parser.parse(('endhole',))
+    parser.delete_first_token()
+    return HoleNode(name, args, nodelist)
+
+
+@register.simple_tag
+def session_marker():
+    """Имя cookie, по которой скрипт страницы узнаёт о сессии."""
+    return settings.SESSION_MARKER_COOKIE
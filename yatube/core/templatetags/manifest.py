@@ -0,0 +1,14 @@
+from django import template
+
+from ..thumbnails import manifest_thumbnail as get_manifest_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def manifest_thumbnail(obj, geometry, **options):
+    """{% manifest_thumbnail post "960x339" crop="center" as im %}
+
+    Словарь с url, width и height миниатюры или None.
+    """
+    return get_manifest_thumbnail(obj, geometry, **options)
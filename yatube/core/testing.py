@@ -0,0 +1,49 @@
+import copy
+import logging.config
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Каталоги и файлы, куда проект пишет во время работы. В тестах они
+# переносятся во временный каталог, чтобы прогон не оставлял файлов в
+# дереве проекта.
+RUNTIME_PATHS = {
+    'MEDIA_ROOT': 'media',
+    'METRICS_DIR': 'metrics',
+    'SNAPSHOT_ROOT': 'snapshot',
+    'SITEMAP_ROOT': 'sitemaps',
+    'EMAIL_FILE_PATH': 'sent_emails',
+    'SLOW_QUERY_LOG': 'slow_queries.log',
+}
+
+
+class TempDirsRunner(DiscoverRunner):
+    """DiscoverRunner, пишущий файлы проекта во временный каталог."""
+
+    def setup_test_environment(self, **kwargs):
+        self.runtime_dir = tempfile.mkdtemp(prefix='yatube-tests-')
+        paths = {
+            name: os.path.join(self.runtime_dir, path)
+            for name, path in RUNTIME_PATHS.items()
+        }
+        logging_config = copy.deepcopy(settings.LOGGING)
+        logging_config['handlers']['slow_queries']['filename'] = (
+            paths['SLOW_QUERY_LOG']
+        )
+        self.runtime_settings = override_settings(
+            LOGGING=logging_config, **paths
+        )
+        self.runtime_settings.enable()
+        # Обработчики журнала созданы при django.setup() со старым путём.
+        logging.config.dictConfig(logging_config)
+        super().setup_test_environment(**kwargs)
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        self.runtime_settings.disable()
+        logging.config.dictConfig(settings.LOGGING)
+        shutil.rmtree(self.runtime_dir, ignore_errors=True)
@@ -0,0 +1,63 @@
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+
+TWO_TIER_CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': 'two-tier-tests',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 2,
+            'LOCAL_TIMEOUT': 60,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests-shared',
+    },
+}
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_local_tier_serves_repeated_reads(self):
+        """Повторное чтение обслуживается из памяти процесса."""
+        before = cache.stats()
+        caches['shared'].set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        caches['shared'].delete('key')
+        self.assertEqual(cache.get('key'), 'value')
+        after = cache.stats()
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+        self.assertEqual(after['shared_hits'] - before['shared_hits'], 1)
+
+    def test_writes_update_both_tiers(self):
+        """Запись и удаление видны сразу в обоих уровнях."""
+        cache.set('key', [1, 2])
+        self.assertEqual(caches['shared'].get('key'), [1, 2])
+        cache.get('key').append(3)
+        self.assertEqual(cache.get('key'), [1, 2])
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        cache.set_many({'a': 1, 'b': 2})
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+
+    def test_local_tier_is_bounded(self):
+        """Локальный уровень вытесняет самые старые ключи."""
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(cache.stats()['local_entries'], 2)
+        caches['shared'].delete('a')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), 'c')
+
+    def test_default_version_shares_local_entry(self):
+        """Версия по умолчанию и явная version=1 — одна локальная запись."""
+        cache.set('key', 'old', version=1)
+        cache.delete('key')
+        self.assertIsNone(cache.get('key', version=1))
+        cache.set('key', 'new')
+        self.assertEqual(cache.get('key', version=1), 'new')
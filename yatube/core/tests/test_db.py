@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..db.base import PRAGMAS, deferred
+
+
+class DatabaseBackendTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Прагмы выполняются при подключении."""
+        self.assertEqual(self.pragma('busy_timeout'), PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), PRAGMAS['cache_size'])
+        # 1 — NORMAL.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertNotIn('PRAGMAS', connection.get_connection_params())
+
+    def test_deferred(self):
+        """deferred() отключает BEGIN IMMEDIATE только внутри блока."""
+        self.assertTrue(connection.immediate)
+        with deferred():
+            self.assertFalse(connection.immediate)
+        self.assertTrue(connection.immediate)
+
+    def test_benchmark(self):
+        """Бенчмарк меняет прагмы, подключение и BEGIN по отдельности."""
+        out = StringIO()
+        call_command(
+            'db_benchmark', '--seconds', '0.2', '--readers', '1',
+            '--writers', '1', stdout=out,
+        )
+        for title in ('по умолчанию', 'прагмы', 'постоянное подключение',
+                      'BEGIN IMMEDIATE', 'core.db'):
+            with self.subTest(title=title):
+                self.assertIn(f'{title}: записей', out.getvalue())
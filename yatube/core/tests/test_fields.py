@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Comment, Post, User
+
+from ..fields import COMPRESS_THRESHOLD, ZLIB_MARKER, CompressedTextField
+
+LONG_TEXT = 'Очень длинный пост. ' * 200
+
+
+def stored(model, pk, column='text_html'):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {column} FROM {model._meta.db_table} WHERE id = %s',
+            [pk]
+        )
+        return cursor.fetchone()[0]
+
+
+class CompressedTextTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    def test_long_text_compressed(self):
+        """Длинный HTML хранится сжатым и читается как обычный."""
+        post = Post.objects.create(author=self.user, text=LONG_TEXT)
+        comment = Comment.objects.create(
+            author=self.user, post=post, text=LONG_TEXT
+        )
+        for model, pk in ((Post, post.pk), (Comment, comment.pk)):
+            with self.subTest(model=model.__name__):
+                value = stored(model, pk)
+                self.assertIsInstance(value, bytes)
+                self.assertTrue(value.startswith(ZLIB_MARKER))
+                self.assertLess(len(value), len(LONG_TEXT.encode()) // 10)
+                self.assertEqual(stored(model, pk, 'text'), LONG_TEXT)
+                self.assertEqual(
+                    model.objects.get(pk=pk).text_html, post.text_html
+                )
+        self.assertEqual(
+            Post.objects.get(text_html=post.text_html, author=self.user),
+            post
+        )
+
+    def test_short_text_plain(self):
+        """Короткий текст остаётся строкой, поиск по вхождению работает."""
+        post = Post.objects.create(author=self.user, text='Короткий пост')
+        self.assertEqual(stored(Post, post.pk), post.text_html)
+        self.assertLess(len('Короткий пост'.encode()), COMPRESS_THRESHOLD)
+        self.assertTrue(
+            Post.objects.filter(text_html__icontains='пост').exists()
+        )
+
+    def test_command_recompresses_old_rows(self):
+        """Команда сжимает длинные тексты, записанные до появления поля."""
+        post = Post.objects.create(author=self.user, text='Старый пост')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE posts_post SET text_html = %s WHERE id = %s',
+                [LONG_TEXT, post.pk]
+            )
+        out = StringIO()
+        call_command('compress_texts', stdout=out)
+        self.assertIn('posts.Post.text_html: строк 1', out.getvalue())
+        self.assertIsInstance(stored(Post, post.pk), bytes)
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, LONG_TEXT)
+
+    def test_threshold_in_migrations(self):
+        """Порог сжатия переживает deconstruct, как в миграциях."""
+        field = CompressedTextField(compress_threshold=10)
+        name, path, args, kwargs = field.deconstruct()
+        self.assertEqual(path, 'core.fields.CompressedTextField')
+        self.assertEqual(kwargs, {'compress_threshold': 10})
+        clone = CompressedTextField(*args, **kwargs)
+        self.assertEqual(clone.get_db_prep_value('a' * 20, connection)[:1],
+                         ZLIB_MARKER)
+        self.assertNotIn(
+            'compress_threshold', CompressedTextField().deconstruct()[3]
+        )
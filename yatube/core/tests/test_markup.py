@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, User
+
+from ..markup import RENDERER_VERSION, render
+
+
+class RenderTests(TestCase):
+    def test_markup(self):
+        """Разметка превращается в HTML."""
+        cases = {
+            'Абзац\nстрока': '<p>Абзац<br>строка</p>',
+            'раз\n\nдва': '<p>раз</p>\n<p>два</p>',
+            '# Заголовок': '<h3>Заголовок</h3>',
+            '- раз\n- два': '<ul><li>раз</li><li>два</li></ul>',
+            '> цитата': '<blockquote><p>цитата</p></blockquote>',
+            '```\na < b\n```': '<pre><code>a &lt; b</code></pre>',
+            '**жирный** и *курсив*':
+                '<p><strong>жирный</strong> и <em>курсив</em></p>',
+            'см. https://ya.ru/?a=1&b=2.':
+                '<p>см. <a href="https://ya.ru/?a=1&amp;b=2" '
+                'rel="nofollow noopener">https://ya.ru/?a=1&amp;b=2</a>.</p>',
+            '[тут](https://ya.ru)':
+                '<p><a href="https://ya.ru" rel="nofollow noopener">'
+                'тут</a></p>',
+        }
+        for text, html in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(render(text), html)
+
+    def test_sanitized(self):
+        """Чужие теги экранируются, ссылки бывают только http(s)."""
+        cases = {
+            '<script>alert(1)</script>':
+                '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>',
+            '[x](javascript:alert(1))': '<p>[x](javascript:alert(1))</p>',
+            'http://ya.ru"onclick=1':
+                '<p><a href="http://ya.ru" rel="nofollow noopener">'
+                'http://ya.ru</a>&quot;onclick=1</p>',
+        }
+        for text, html in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(render(text), html)
+
+
+class StoredHtmlTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_rendered_on_save(self):
+        """HTML сохраняется вместе с постом и комментарием из форм."""
+        self.client.post(
+            reverse('posts:post_create'), {'text': 'Пост с **разметкой**'}
+        )
+        post = Post.objects.get()
+        self.assertEqual(
+            post.text_html, '<p>Пост с <strong>разметкой</strong></p>'
+        )
+        self.assertEqual(post.text_html_version, RENDERER_VERSION)
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)),
+            {'text': '*Ответ*'},
+        )
+        self.assertEqual(
+            Comment.objects.get().text_html, '<p><em>Ответ</em></p>'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(post.pk,))
+        )
+        self.assertContains(response, '<strong>разметкой</strong>')
+        self.assertContains(response, '<em>Ответ</em>')
+
+    def test_command_renders_stale_rows(self):
+        """Команда перерисовывает строки прежней версии."""
+        post = Post.objects.create(author=self.user, text='*новое*')
+        Post.objects.filter(pk=post.pk).update(
+            text_html='<p>старое</p>', text_html_version=0
+        )
+        out = StringIO()
+        call_command('render_texts', stdout=out)
+        self.assertIn('posts.Post: перерисовано 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>новое</em></p>')
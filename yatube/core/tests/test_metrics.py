@@ -0,0 +1,85 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import RETIRED_NAME, SNAPSHOT_NAME, exposition
+from posts.models import User
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(METRICS_DIR=TEMP_METRICS_DIR, METRICS_TOKEN='secret')
+class MetricsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def test_metrics_exposition(self):
+        """После запроса к ленте в метриках есть время и SQL-запросы."""
+        self.client.get(reverse('posts:index'))
+        response = self.client.get(
+            reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        text = response.content.decode()
+        for line in (
+            '# TYPE yatube_request_duration_seconds histogram',
+            'yatube_request_duration_seconds_bucket{le="+Inf",'
+            'view="posts:index"}',
+            'yatube_db_queries_total{view="posts:index"}',
+            'yatube_cache_requests_total{result="hits",tier="local"}',
+            'yatube_process_start_time_seconds{pid=',
+        ):
+            with self.subTest(line=line):
+                self.assertIn(line, text)
+
+    def test_metrics_access(self):
+        """Метрики доступны по токену и сотрудникам, но не с localhost."""
+        url = reverse('metrics')
+        cases = (
+            ({'REMOTE_ADDR': '127.0.0.1'}, HTTPStatus.FORBIDDEN),
+            ({'HTTP_AUTHORIZATION': 'Bearer wrong'}, HTTPStatus.FORBIDDEN),
+            ({'HTTP_AUTHORIZATION': 'Bearer secret'}, HTTPStatus.OK),
+        )
+        for headers, status in cases:
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.client.get(url, **headers).status_code, status
+                )
+        with override_settings(METRICS_TOKEN=''):
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.client.force_login(User.objects.create_user(
+            username='staff', is_staff=True
+        ))
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+
+    def test_dead_process_files_retired(self):
+        """Файл завершившегося процесса удаляется, его счётчики остаются."""
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        path = os.path.join(
+            TEMP_METRICS_DIR, SNAPSHOT_NAME.format(process.pid)
+        )
+        with open(path, 'w') as snapshot:
+            json.dump({'pid': process.pid, 'samples': [
+                ['yatube_db_queries_total', {'view': 'dead'}, 7],
+                ['yatube_process_max_rss_bytes', {'pid': 'dead'}, 1],
+            ]}, snapshot)
+        for _ in range(2):
+            text = exposition()
+            self.assertIn('yatube_db_queries_total{view="dead"} 7', text)
+            self.assertNotIn('pid="dead"', text)
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_METRICS_DIR, RETIRED_NAME))
+        )
@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from archive.archiving import archive_posts
+from posts.models import Post, User
+
+from ..slow_queries import normalize_sql
+
+TEMP_LOG_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD=0)
+class SlowQueryTests(TestCase):
+    databases = {'default', 'archive'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_LOG_DIR, ignore_errors=True)
+
+    def setUp(self):
+        # Страница из кеша страниц не делает запросов к базе.
+        cache.clear()
+
+    def post_records(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get(
+                reverse('posts:post_detail', args=(self.post.pk,))
+            )
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_normalize_sql(self):
+        """Литералы и списки IN сводятся к заполнителям."""
+        for sql, expected in (
+            ("SELECT * FROM t WHERE a = 'x' AND b = 15",
+             'SELECT * FROM t WHERE a = ? AND b = ?'),
+            ('SELECT * FROM t WHERE id IN (%s, %s, %s)',
+             'SELECT * FROM t WHERE id IN (...)'),
+            ('SELECT  *\n FROM t', 'SELECT * FROM t'),
+        ):
+            with self.subTest(sql=sql):
+                self.assertEqual(normalize_sql(sql), expected)
+
+    def test_records_view_template_and_plan(self):
+        """Запрос из шаблона подписан представлением, строкой и планом."""
+        records = self.post_records()
+        self.assertTrue(records)
+        self.assertTrue(all(
+            record['view'] == 'posts:post_detail' for record in records
+        ))
+        from_template = [
+            record for record in records
+            if record['template'] == 'includes/comments.html'
+        ]
+        self.assertTrue(from_template)
+        self.assertIsInstance(from_template[0]['line'], int)
+        self.assertTrue(from_template[0]['plan'])
+        for record in records:
+            self.assertNotIn('params', record)
+
+    def test_archive_queries_logged(self):
+        """Запросы к архивной базе попадают в журнал с именем базы."""
+        archive_posts(timezone.now() + timedelta(days=1))
+        databases = {record['database'] for record in self.post_records()}
+        self.assertEqual(databases, {'default', 'archive'})
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_disabled(self):
+        """Без порога журнал не ведётся."""
+        with self.assertRaises(AssertionError):
+            self.post_records()
+
+    def test_report(self):
+        """Отчёт объединяет одинаковые запросы."""
+        path = os.path.join(TEMP_LOG_DIR, 'slow.log')
+        with open(path, 'w') as log:
+            for record in self.post_records() * 2:
+                log.write(json.dumps(record) + '\n')
+            log.write('не JSON\n')
+        out = StringIO()
+        call_command('slow_queries', '--log', path, stdout=out)
+        self.assertIn('2 раз', out.getvalue())
+        self.assertIn('view: posts:post_detail', out.getvalue())
+        self.assertIn('template: includes/comments.html:', out.getvalue())
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+
+from posts.models import Post, User
+
+from ..models import Blob
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name):
+        return Post.objects.create(
+            author=self.user,
+            text='Тестовый текст',
+            image=SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_same_content_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с общими миниатюрами."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertTrue(first.image.name.endswith('.gif'))
+        self.assertEqual(Blob.objects.get(name=first.image.name).refs, 2)
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(os.listdir(directory), [
+            os.path.basename(first.image.name)
+        ])
+        self.assertEqual(
+            get_thumbnail(first.image, '10x10').url,
+            get_thumbnail(second.image, '10x10').url,
+        )
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется вместе с последним постом с этой картинкой."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(Blob.objects.exists())
+
+    def test_replaced_image_released(self):
+        """Замена картинки снимает ссылку со старой."""
+        post = self.create_post('first.gif')
+        old_path = post.image.path
+        post.image = SimpleUploadedFile(
+            'other.gif', SMALL_GIF + b'\x00', 'image/gif'
+        )
+        post.save()
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(Blob.objects.get().name, post.image.name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class FailedSaveTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='NoName')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    create_post = ContentAddressedStorageTests.create_post
+
+    def test_failed_save_releases_reference(self):
+        """Ссылка не остаётся, если строку поста записать не удалось."""
+        def fail_insert(post, *args, **kwargs):
+            # Файл сохраняется при вставке строки, до ошибки базы.
+            Post.image.field.pre_save(post, True)
+            self.assertTrue(Blob.objects.exists())
+            raise DatabaseError
+
+        with mock.patch.object(
+            Post, '_do_insert', autospec=True, side_effect=fail_insert
+        ):
+            with self.assertRaises(DatabaseError):
+                self.create_post('first.gif')
+        self.assertFalse(Blob.objects.exists())
+        post = self.create_post('second.gif')
+        self.assertEqual(Blob.objects.get(name=post.image.name).refs, 1)
+        self.assertTrue(os.path.exists(post.image.path))
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Group, Post, User
+
+from ..paginator import FeedPaginator
+from ..timeline import TIMELINE_KEY, Timeline, bump, push
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(5):
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, key='index', length=1000):
+        posts = Post.objects.select_related('author', 'group')
+        if key != 'index':
+            posts = posts.filter(group=self.group)
+        return FeedPaginator(
+            posts, 2, count_key=key, timeline=Timeline(key, posts, length)
+        )
+
+    def test_page_from_cached_ids(self):
+        """Страница собирается одним запросом по готовому списку id."""
+        expected = list(Post.objects.all()[2:4])
+        self.paginator().page(1)
+        with self.assertNumQueries(1):
+            page = self.paginator().page(2)
+            self.assertEqual(list(page), expected)
+            self.assertEqual(page.paginator.count, 5)
+
+    def test_pages_past_capped_list(self):
+        """За пределами обрезанного списка страницы берутся из базы."""
+        self.assertEqual(
+            list(self.paginator(length=3).page(3)),
+            list(Post.objects.all()[4:]),
+        )
+
+    def test_lists_follow_writes(self):
+        """Новые посты встают в начало списков, удалённые пропадают."""
+        self.paginator().page(1)
+        self.paginator(f'group:{self.group.pk}').page(1)
+        post = Post.objects.create(
+            author=self.user, group=self.group, text='Новый пост'
+        )
+        for key in ('index', f'group:{self.group.pk}'):
+            with self.subTest(key=key):
+                self.assertEqual(
+                    cache.get(TIMELINE_KEY.format(key))[1][0], post.pk
+                )
+        post.delete()
+        self.assertNotIn(
+            post.pk, cache.get(TIMELINE_KEY.format('index'))[1]
+        )
+
+    def test_stale_list_rebuilt(self):
+        """Удаление в обход сигналов не ломает страницу."""
+        self.paginator().page(1)
+        Post.objects.filter(pk=Post.objects.first().pk)._raw_delete('default')
+        self.assertEqual(
+            list(self.paginator().page(1)), list(Post.objects.all()[:2])
+        )
+
+    def test_conflicting_write_drops_list(self):
+        """Правка поверх чужой правки не пишется, список строится заново."""
+        self.paginator().page(1)
+        # Другой процесс поднял версию, но его список ещё не записан.
+        bump('index')
+        stored = cache.get(TIMELINE_KEY.format('index'))
+        push('index', 0)
+        self.assertEqual(cache.get(TIMELINE_KEY.format('index')), stored)
+        self.assertEqual(
+            list(self.paginator().page(1)), list(Post.objects.all()[:2])
+        )
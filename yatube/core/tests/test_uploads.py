@@ -0,0 +1,174 @@
+import io
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..models import Upload
+from ..uploads import (NOT_IMAGE, UPLOAD_DIR, UploadError, part_path,
+                       receive_chunk, too_large)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def leftovers(self):
+        directory = os.path.join(TEMP_MEDIA_ROOT, UPLOAD_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return [name for name in os.listdir(directory)
+                if not name.endswith('.part')]
+
+    def create_post(self, text, **data):
+        return self.client.post(
+            reverse('posts:post_create'), {'text': text, **data}
+        )
+
+    def test_upload_script_only_on_form(self):
+        """Скрипт докачки подключает только страница с формой поста."""
+        self.assertContains(
+            self.client.get(reverse('posts:post_create')), 'js/uploads.js'
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'js/holes.js')
+        self.assertNotContains(response, 'js/uploads.js')
+        self.assertNotContains(response, 'js/autocomplete.js')
+
+    def test_streamed_upload(self):
+        """Картинка принимается сразу в хранилище без копий."""
+        self.create_post('С картинкой', image=SimpleUploadedFile(
+            'small.gif', SMALL_GIF, 'image/gif'
+        ))
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(post.image.name.endswith('.gif'))
+        with post.image.open('rb') as file:
+            self.assertEqual(file.read(), SMALL_GIF)
+        self.assertEqual(self.leftovers(), [])
+
+    def test_rejected_uploads(self):
+        """Не картинка и слишком большой файл отвергаются с ошибкой."""
+        cases = (
+            ('Не картинка', b'GIF? ' * 10, NOT_IMAGE, {}),
+            ('Большая', SMALL_GIF, None, {'IMAGE_UPLOAD_MAX_SIZE': 20}),
+        )
+        for text, content, error, overrides in cases:
+            with self.subTest(text=text), override_settings(**overrides):
+                response = self.create_post(text, image=SimpleUploadedFile(
+                    'file.gif', content, 'image/gif'
+                ))
+                self.assertIn(
+                    error or too_large(),
+                    response.context['form'].errors['image'],
+                )
+                self.assertFalse(Post.objects.filter(text=text).exists())
+                self.assertEqual(self.leftovers(), [])
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=20,
+                       DATA_UPLOAD_MAX_MEMORY_SIZE=1000)
+    def test_oversized_request_checks_csrf(self):
+        """Заведомо большой запрос проходит CSRF и получает ошибку формы."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        client.get(reverse('posts:post_create'))
+        token = client.cookies[settings.CSRF_COOKIE_NAME].value
+        response = client.post(reverse('posts:post_create'), {
+            'csrfmiddlewaretoken': token,
+            'text': 'Большая',
+            'image': SimpleUploadedFile(
+                'big.gif', SMALL_GIF + b'\0' * 2000, 'image/gif'
+            ),
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(too_large(), response.context['form'].non_field_errors())
+        self.assertFalse(Post.objects.filter(text='Большая').exists())
+        self.assertEqual(self.leftovers(), [])
+
+    def test_stale_chunk_keeps_part(self):
+        """Опоздавший повтор куска не перезаписывает и не обрезает файл."""
+        upload = Upload.objects.create(user=self.user, length=len(SMALL_GIF))
+        stale = Upload.objects.get(pk=upload.pk)
+        receive_chunk(upload, io.BytesIO(SMALL_GIF[:20]), 0, 20)
+        with self.assertRaises(UploadError):
+            receive_chunk(stale, io.BytesIO(SMALL_GIF[:12]), 0, 12)
+        with open(part_path(upload), 'rb') as part:
+            self.assertEqual(part.read(), SMALL_GIF[:20])
+        self.assertEqual(self.leftovers(), [])
+
+    def test_resumable_upload(self):
+        """Докачка по кускам продолжается с принятой сервером позиции."""
+        response = self.client.post(
+            reverse('upload_start'), HTTP_UPLOAD_LENGTH=str(len(SMALL_GIF))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        state = response.json()
+
+        def patch(offset, data):
+            return self.client.patch(
+                state['url'], data,
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET=str(offset),
+            )
+
+        self.assertEqual(
+            patch(0, b'not an image').status_code,
+            HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+        )
+        self.assertEqual(patch(0, SMALL_GIF[:20]).json()['offset'], 20)
+        # Ответ потерян, клиент повторяет кусок с той же позиции.
+        response = patch(0, SMALL_GIF[:20])
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+        self.assertEqual(response.json()['offset'], 20)
+        self.assertEqual(
+            patch(20, SMALL_GIF[20:] + b'!').status_code,
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
+        patch(20, SMALL_GIF[20:])
+        self.assertEqual(
+            self.client.get(state['url']).json()['offset'], len(SMALL_GIF)
+        )
+        self.create_post('Докачанная', upload=state['token'])
+        post = Post.objects.get(text='Докачанная')
+        with post.image.open('rb') as file:
+            self.assertEqual(file.read(), SMALL_GIF)
+        # Использованная докачка удаляется вместе с файлом.
+        self.assertFalse(Upload.objects.filter(pk=state['token']).exists())
+        self.assertFalse(os.listdir(os.path.join(TEMP_MEDIA_ROOT, UPLOAD_DIR)))
+        self.assertEqual(
+            self.client.post(
+                reverse('upload_start'),
+                HTTP_UPLOAD_LENGTH=str(settings.IMAGE_UPLOAD_MAX_SIZE + 1),
+            ).status_code,
+            HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+        )
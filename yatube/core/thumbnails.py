@@ -0,0 +1,70 @@
+import json
+import logging
+
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+
+class CountingThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, учитывающий созданные миниатюры в метриках."""
+
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        super()._create_thumbnail(
+            source_image, geometry_string, options, thumbnail
+        )
+        registry.inc(
+            'yatube_thumbnails_generated_total', geometry=geometry_string
+        )
+
+
+def manifest_key(geometry, options):
+    pairs = [f'{key}={value}' for key, value in sorted(options.items())]
+    return ' '.join([geometry, *pairs])
+
+
+def load_manifest(obj):
+    manifest = getattr(obj, '_thumbnail_manifest', None)
+    if manifest is None:
+        manifest = json.loads(obj.thumbnail_manifest or '{}')
+        obj._thumbnail_manifest = manifest
+    return manifest
+
+
+def manifest_thumbnail(obj, geometry, **options):
+    """Миниатюра obj.image из манифеста в obj.thumbnail_manifest.
+
+    Манифест (геометрия с опциями → url, width, height) хранится в строке
+    объекта, поэтому страница с десятью постами не обращается ни к
+    хранилищу ключей sorl, ни к файлам. При промахе миниатюра строится
+    через sorl, а манифест дописывается в базу. Возвращает None, если
+    картинки нет или её не удалось прочитать; неудача тоже записывается
+    в манифест (None) и не повторяется до замены картинки.
+    """
+    if not obj.image:
+        return None
+    manifest = load_manifest(obj)
+    key = manifest_key(geometry, options)
+    if key not in manifest:
+        try:
+            thumbnail = get_thumbnail(obj.image, geometry, **options)
+            entry = {
+                'url': thumbnail.url,
+                'width': thumbnail.width,
+                'height': thumbnail.height,
+            }
+        except Exception:
+            # Как тег {% thumbnail %} без THUMBNAIL_DEBUG: битая картинка
+            # не должна ронять страницу.
+            logger.exception('Не удалось построить миниатюру %s', obj.image)
+            entry = None
+        manifest[key] = entry
+        obj.thumbnail_manifest = json.dumps(manifest)
+        type(obj).objects.filter(pk=obj.pk).update(
+            thumbnail_manifest=obj.thumbnail_manifest
+        )
+    return manifest[key]
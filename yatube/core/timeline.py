@@ -0,0 +1,117 @@
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+TIMELINE_KEY = 'timeline:{}'
+TIMELINE_VERSION_KEY = 'timeline-version:{}'
+TIMELINE_LENGTH = 1000
+TIMELINE_TIMEOUT = 60 * 60
+
+
+class Timeline:
+    """Первые TIMELINE_LENGTH id ленты, хранящиеся в общем кеше.
+
+    Страница ленты берётся срезом списка и достаётся одним запросом
+    pk__in вместо ORDER BY ... LIMIT OFFSET по таблице. Список полон,
+    если в нём меньше length id: тогда и число записей известно без
+    COUNT. При записи списки правятся функциями push/remove/reset
+    (см. posts.signals).
+
+    Список хранится вместе с номером версии, а каждая правка атомарно
+    увеличивает счётчик версий ленты (cache.incr). Список годен, только
+    если его версия равна счётчику: правка, прочитавшая список до
+    чужой правки, не совпадёт с ним по версии и не запишется, а лента
+    будет построена заново из базы.
+    """
+
+    def __init__(self, key, queryset, length=TIMELINE_LENGTH):
+        self.key = key
+        self.queryset = queryset
+        self.length = length
+
+    @cached_property
+    def ids(self):
+        cache_key = TIMELINE_KEY.format(self.key)
+        version_key = TIMELINE_VERSION_KEY.format(self.key)
+        found = cache.get_many([cache_key, version_key])
+        version = found.get(version_key, 0)
+        stored = found.get(cache_key)
+        if stored is not None and stored[0] == version:
+            return stored[1]
+        ids = list(self.queryset.values_list('pk', flat=True)[:self.length])
+        cache.set(cache_key, (version, ids), TIMELINE_TIMEOUT)
+        return ids
+
+    @property
+    def complete(self):
+        return len(self.ids) < self.length
+
+    def covers(self, top):
+        return self.complete or top <= len(self.ids)
+
+    def hydrate(self, ids):
+        """Объекты по id в порядке списка или None, если список устарел."""
+        objects = self.queryset.in_bulk(ids)
+        if len(objects) < len(ids):
+            # Строки удалены в обход сигналов: список строится заново.
+            reset(self.key)
+            return None
+        return [objects[pk] for pk in ids]
+
+
+def bump(key):
+    """Новая версия ленты; списки прежних версий больше не читаются."""
+    version_key = TIMELINE_VERSION_KEY.format(key)
+    cache.add(version_key, 0, None)
+    try:
+        return cache.incr(version_key)
+    except ValueError:
+        # Счётчик вытеснен между add и incr.
+        cache.add(version_key, 1, None)
+        return None
+
+
+def edit(key, change):
+    """Правит список ленты, если его никто не правил с момента чтения.
+
+    change получает список id и возвращает новый или None, если список
+    нужно построить заново.
+    """
+    cache_key = TIMELINE_KEY.format(key)
+    version = bump(key)
+    stored = cache.get(cache_key)
+    if version is None or stored is None or stored[0] != version - 1:
+        return
+    ids = change(stored[1])
+    if ids is not None:
+        cache.set(cache_key, (version, ids), TIMELINE_TIMEOUT)
+
+
+def push(key, pk, length=TIMELINE_LENGTH):
+    """Ставит новую запись в начало списка, если он уже построен."""
+    def change(ids):
+        if pk in ids:
+            ids.remove(pk)
+        ids.insert(0, pk)
+        return ids[:length]
+
+    edit(key, change)
+
+
+def remove(key, pk, length=TIMELINE_LENGTH):
+    def change(ids):
+        if pk not in ids:
+            return ids
+        if len(ids) >= length:
+            # Из обрезанного списка нельзя просто убрать id: он стал бы
+            # выглядеть полным.
+            return None
+        ids.remove(pk)
+        return ids
+
+    edit(key, change)
+
+
+def reset(*keys):
+    for key in keys:
+        bump(key)
+    cache.delete_many([TIMELINE_KEY.format(key) for key in keys])
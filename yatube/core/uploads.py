@@ -0,0 +1,312 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (FileUploadHandler, SkipFile,
+                                             StopFutureHandlers)
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .storage import post_image_storage
+
+# Каталог хранилища с недокачанными и принимаемыми файлами: с итоговым
+# местом он на одном диске, и готовый файл только переименовывается.
+UPLOAD_DIR = '.uploads'
+# Столько первых байт нужно, чтобы узнать формат картинки.
+HEAD_SIZE = 12
+READ_SIZE = 64 * 1024
+EXTENSIONS = {
+    'image/gif': '.gif',
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+}
+TOO_LARGE = 'Файл больше {} МБ.'
+NOT_IMAGE = 'Загрузите картинку в формате JPEG, PNG, GIF или WebP.'
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def max_size():
+    return settings.IMAGE_UPLOAD_MAX_SIZE
+
+
+def too_large():
+    return TOO_LARGE.format(max_size() // (1024 * 1024))
+
+
+def sniff(head):
+    """Тип картинки по первым HEAD_SIZE байтам или None."""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def upload_dir():
+    path = post_image_storage.path(UPLOAD_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class StreamedUploadedFile(UploadedFile):
+    """Загрузка, уже записанная в каталог хранилища, с sha256 содержимого.
+
+    ContentAddressedStorage не перечитывает такой файл, а переименовывает.
+    temporary=True — файл принадлежит запросу и удаляется при закрытии,
+    если хранилище его не забрало.
+    """
+
+    def __init__(self, file, name, content_type, size, sha256,
+                 temporary=True):
+        super().__init__(file, name, content_type, size)
+        self.sha256 = sha256
+        self.temporary = temporary
+
+    def temporary_file_path(self):
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            if self.temporary:
+                try:
+                    os.unlink(self.file.name)
+                except FileNotFoundError:
+                    pass
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """Принимает картинку прямо в хранилище, считая sha256 по ходу записи.
+
+    Формат проверяется по первым байтам, а не по имени и Content-Type
+    клиента; файл больше IMAGE_UPLOAD_MAX_SIZE бросается, как только
+    превысит предел, а в запросе, заведомо большем предела, файлы
+    пропускаются без записи. Поля формы такого запроса всё равно
+    разбираются: без csrfmiddlewaretoken csrf_protect ответил бы 403
+    вместо ошибки формы. Причины отказа складываются в
+    request.upload_errors и попадают в форму через validate_uploads.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        request.upload_errors = {}
+        self.oversized = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        # Кроме файла в теле только поля формы, и те ограничены
+        # DATA_UPLOAD_MAX_MEMORY_SIZE.
+        limit = max_size() + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        if content_length > limit:
+            self.request.upload_errors[None] = too_large()
+            self.oversized = True
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.oversized:
+            raise SkipFile()
+        fd, path = tempfile.mkstemp(dir=upload_dir(), prefix='.stream-')
+        os.close(fd)
+        self.file = StreamedUploadedFile(
+            open(path, 'w+b'), self.file_name, None, 0, None
+        )
+        self.digest = hashlib.sha256()
+        self.head = b''
+        raise StopFutureHandlers()
+
+    def reject(self, message):
+        self.request.upload_errors[self.field_name] = message
+        self.file.close()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > max_size():
+            self.reject(too_large())
+            raise SkipFile()
+        if len(self.head) < HEAD_SIZE:
+            self.head += raw_data[:HEAD_SIZE - len(self.head)]
+            if len(self.head) == HEAD_SIZE and sniff(self.head) is None:
+                self.reject(NOT_IMAGE)
+                raise SkipFile()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        content_type = sniff(self.head)
+        if content_type is None:
+            self.reject(NOT_IMAGE)
+            return None
+        self.file.flush()
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.content_type = content_type
+        self.file.sha256 = self.digest.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+
+
+def streaming_uploads(view):
+    """Подменяет обработчики загрузки представления на потоковый.
+
+    Обработчики меняются до первого чтения request.POST, а его читает
+    CsrfViewMiddleware, поэтому проверка CSRF переносится внутрь.
+    """
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [StreamingImageUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+
+    return csrf_exempt(wrapper)
+
+
+def validate_uploads(request, form):
+    """form.is_valid() с учётом файлов, отвергнутых при приёме."""
+    valid = form.is_valid()
+    for field, message in getattr(request, 'upload_errors', {}).items():
+        form.add_error(field if field in form.fields else None, message)
+        valid = False
+    return valid
+
+
+def part_path(upload):
+    return os.path.join(upload_dir(), f'{upload.token}.part')
+
+
+def receive_chunk(upload, stream, offset, length):
+    """Дописывает кусок докачки с позиции offset и возвращает новую.
+
+    offset должен совпадать с уже принятым размером: иначе клиент
+    потерял ответ на прошлый кусок и должен спросить позицию заново.
+    Кусок сначала принимается во временный файл запроса, а в файл
+    докачки переносится под блокировкой строки Upload: из двух
+    одновременных повторов одного куска записывается один, и они не
+    перезаписывают и не обрезают файл друг другу.
+    """
+    from .models import Upload
+
+    if offset != upload.offset:
+        raise UploadError('Неверная позиция.', status=409)
+    if offset + length > upload.length:
+        raise UploadError(too_large(), status=413)
+    if offset == 0:
+        head = stream.read(min(HEAD_SIZE, upload.length))
+        if sniff(head) is None:
+            raise UploadError(NOT_IMAGE, status=415)
+    else:
+        head = b''
+    with tempfile.TemporaryFile(dir=upload_dir(), prefix='.chunk-') as chunk:
+        chunk.write(head)
+        received = len(head)
+        while received < length:
+            data = stream.read(min(READ_SIZE, length - received))
+            if not data:
+                break
+            chunk.write(data)
+            received += len(data)
+        chunk.seek(0)
+        # В core.db atomic() начинается с BEGIN IMMEDIATE, и блокировку
+        # берёт уже он; select_for_update — для баз с блокировкой строк.
+        with transaction.atomic():
+            locked = Upload.objects.select_for_update().get(pk=upload.pk)
+            if locked.offset != offset:
+                raise UploadError('Неверная позиция.', status=409)
+            path = part_path(upload)
+            with open(path, 'r+b' if os.path.exists(path) else 'wb') as part:
+                part.seek(offset)
+                shutil.copyfileobj(chunk, part, READ_SIZE)
+                part.truncate()
+            Upload.objects.filter(pk=upload.pk).update(
+                offset=offset + received
+            )
+    upload.offset = offset + received
+    return upload.offset
+
+
+def completed_upload(upload):
+    """Файл законченной докачки для поля формы или None.
+
+    Хеш считается одним чтением готового файла: состояние sha256 не
+    пережить между запросами к разным процессам.
+    """
+    path = part_path(upload)
+    if upload.offset != upload.length or not os.path.exists(path):
+        return None
+    file = open(path, 'rb')
+    try:
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(READ_SIZE), b''):
+            digest.update(chunk)
+        file.seek(0)
+        content_type = sniff(file.read(HEAD_SIZE))
+        file.seek(0)
+        return StreamedUploadedFile(
+            file, 'upload' + EXTENSIONS[content_type], content_type,
+            upload.length, digest.hexdigest(), temporary=False,
+        )
+    except BaseException:
+        file.close()
+        raise
+
+
+def upload_files(request, field='image'):
+    """request.FILES, где вместо пустого field — докачка из POST['upload'].
+
+    Файл докачки переносится в хранилище при сохранении поста, после
+    чего finish_upload удаляет докачку; если форма не прошла проверку,
+    она остаётся для следующей отправки. Открытый файл закрывает
+    HttpRequest.close() в конце ответа, как и остальные request.FILES.
+    """
+    from .models import Upload
+
+    token = request.POST.get('upload')
+    if field in request.FILES or not token:
+        return request.FILES or None
+    try:
+        upload = Upload.objects.get(pk=token, user=request.user)
+    except (Upload.DoesNotExist, ValidationError):
+        return request.FILES or None
+    file = completed_upload(upload)
+    if not file:
+        return request.FILES or None
+    files = request.FILES.copy()
+    files[field] = file
+    request._files = files
+    request.upload = upload
+    return files
+
+
+def finish_upload(request):
+    """Удаляет докачку, файл которой сохранён формой (upload_files)."""
+    upload = getattr(request, 'upload', None)
+    if upload is None:
+        return
+    for file in request.FILES.values():
+        file.close()
+    path = part_path(upload)
+    upload.delete()
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
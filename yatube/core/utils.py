@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+from django.db.models.signals import post_save, pre_save
+
+CHUNK_SIZE = 500
+
+
+def iter_pk_chunks(queryset, size=CHUNK_SIZE):
+    """Отдаёт первичные ключи выборки пачками, не загружая её целиком.
+
+    Проход идёт по возрастанию pk (keyset), поэтому удаление или изменение
+    уже обработанных строк не сбивает следующую пачку.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        pks = list(chunk.values_list('pk', flat=True)[:size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def bulk_update_with_signals(model, objs, fields, batch_size=None):
+    """bulk_update, после которого срабатывают обработчики сохранения.
+
+    Строки пишутся одним запросом на пачку, но pre_save и post_save
+    отправляются для каждого объекта, как при obj.save(update_fields=...):
+    на них держатся сброс кешей, ленты и журнал изменений API.
+    """
+    using = model.objects.db
+    for obj in objs:
+        pre_save.send(
+            sender=model, instance=obj, raw=False, using=using,
+            update_fields=fields,
+        )
+    model.objects.bulk_update(objs, fields, batch_size=batch_size)
+    for obj in objs:
+        post_save.send(
+            sender=model, instance=obj, created=False, update_fields=fields,
+            raw=False, using=using,
+        )
+
+
+def atomic_write(path, data):
+    """Записывает файл целиком или не трогает его вовсе.
+
+    Данные пишутся во временный файл рядом с целевым и подменяют его
+    через os.replace, так что читатель никогда не видит половину файла.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data.encode() if isinstance(data, str) else data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
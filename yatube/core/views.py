@@ -1,4 +1,20 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import Resolver404, resolve, reverse
+from django.utils.cache import add_never_cache_headers
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import (require_GET, require_http_methods,
+                                          require_POST)
+
+from .fragments import render_fragment
+from .metrics import exposition
+from .models import Upload
+from .uploads import UploadError, max_size, receive_chunk, too_large
+
+MAX_FRAGMENTS = 10
 
 
 def page_not_found(request, exception):
@@ -15,3 +31,104 @@ def csrf_failure(request, reason=""):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@require_GET
+def fragments(request):
+    """Персональные фрагменты страницы ?path=...&h=header&h=following:x.
+
+    Анониму отвечаем пустым словарём: запасное содержимое дырок уже
+    нарисовано для него.
+    """
+    data = {}
+    if request.user.is_authenticated:
+        try:
+            request.resolver_match = resolve(request.GET.get('path', '/'))
+        except Resolver404:
+            pass
+        for key in request.GET.getlist('h')[:MAX_FRAGMENTS]:
+            html = render_fragment(request, key)
+            if html is not None:
+                data[key] = html
+    response = JsonResponse(data)
+    add_never_cache_headers(response)
+    return response
+
+
+def metrics_allowed(request):
+    """Сотрудник или сборщик с токеном METRICS_TOKEN."""
+    if request.user.is_staff:
+        return True
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', ''
+    ).partition(' ')
+    return bool(
+        settings.METRICS_TOKEN
+        and scheme.lower() == 'bearer'
+        and constant_time_compare(token, settings.METRICS_TOKEN)
+    )
+
+
+@require_GET
+def metrics(request):
+    """Метрики всех рабочих процессов в формате Prometheus."""
+    if not metrics_allowed(request):
+        raise PermissionDenied
+    return HttpResponse(
+        exposition(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def upload_state(upload, status=200, error=None):
+    data = {
+        'token': str(upload.token),
+        'url': reverse('upload_chunk', args=(upload.token,)),
+        'offset': upload.offset,
+        'length': upload.length,
+    }
+    if error is not None:
+        data['error'] = str(error)
+    return JsonResponse(data, status=status)
+
+
+def header_int(request, name):
+    try:
+        return int(request.META.get(name, ''))
+    except ValueError:
+        raise UploadError(f'Нужен заголовок {name}.')
+
+
+@require_POST
+@login_required
+def upload_start(request):
+    """Начинает докачку картинки размером Upload-Length байт."""
+    try:
+        length = header_int(request, 'HTTP_UPLOAD_LENGTH')
+    except UploadError as error:
+        return JsonResponse({'error': str(error)}, status=error.status)
+    if not 0 < length <= max_size():
+        return JsonResponse({'error': too_large()}, status=413)
+    upload = Upload.objects.create(user=request.user, length=length)
+    return upload_state(upload, status=201)
+
+
+@require_http_methods(['GET', 'PATCH'])
+@login_required
+def upload_chunk(request, token):
+    """GET — принятый размер, PATCH — следующий кусок с Upload-Offset.
+
+    Тело PATCH читается из сокета по частям и сразу пишется в файл,
+    не проходя через request.body и DATA_UPLOAD_MAX_MEMORY_SIZE.
+    """
+    upload = get_object_or_404(Upload, pk=token, user=request.user)
+    if request.method == 'PATCH':
+        try:
+            receive_chunk(
+                upload, request,
+                header_int(request, 'HTTP_UPLOAD_OFFSET'),
+                header_int(request, 'CONTENT_LENGTH'),
+            )
+        except UploadError as error:
+            upload.refresh_from_db()
+            return upload_state(upload, error.status, error)
+    return upload_state(upload)
@@ -0,0 +1,52 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+
+class AutocompleteSelect(forms.Select):
+    """<select> только с выбранным вариантом.
+
+    Остальные варианты подгружает js/autocomplete.js (Media виджета,
+    шаблон выводит {{ form.media }}) по адресу из data-autocomplete, так
+    что страница не перечисляет весь queryset поля. Выбранное значение
+    по-прежнему проверяет ModelChoiceField.
+    """
+
+    class Media:
+        js = ('js/autocomplete.js',)
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['attrs']['data-autocomplete'] = self.url
+        return context
+
+    def selected(self, value):
+        """Выбранные объекты; неверные значения формы пропускаются."""
+        field = self.choices.field
+        objs = []
+        for pk in value:
+            try:
+                obj = field.to_python(pk)
+            except ValidationError:
+                # Форму с таким значением отклонит само поле, а виджет
+                # просто ничего не выбирает.
+                continue
+            if obj is not None:
+                objs.append(obj)
+        return objs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = self.selected(value)
+        options = [self.create_option(
+            name, '', field.empty_label or '', not selected, 0
+        )]
+        for index, obj in enumerate(selected, start=1):
+            options.append(self.create_option(
+                name, obj.pk, field.label_from_instance(obj),
+                True, index, attrs=attrs,
+            ))
+        return [(None, options, 0)]
@@ -1,9 +1,55 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
 
-from .models import Comment, Follow, Group, Post
+from core.paginator import EstimatedCountPaginator
+from core.utils import bulk_update_with_signals, iter_pk_chunks
 
+from .deletion import schedule_deletion
+from .models import Comment, DeletionJob, Follow, Group, Post, User
 
-class PostAdmin(admin.ModelAdmin):
+
+class PerformanceAdmin(admin.ModelAdmin):
+    """Базовая админка для больших таблиц.
+
+    Оценочный подсчёт строк вместо COUNT(*), сохранение изменённых в списке
+    строк одним bulk_update и действия, работающие пачками первичных ключей.
+    Сигналы сохранения при этом отправляются для каждой строки.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('delete_in_chunks',)
+
+    def changelist_view(self, request, extra_context=None):
+        request._bulk_edited = []
+        with transaction.atomic():
+            response = super().changelist_view(request, extra_context)
+            edited = request._bulk_edited
+            if edited:
+                bulk_update_with_signals(
+                    self.model, edited, list(self.list_editable),
+                    batch_size=100,
+                )
+        del request._bulk_edited
+        return response
+
+    def save_model(self, request, obj, form, change):
+        edited = getattr(request, '_bulk_edited', None)
+        if change and edited is not None:
+            edited.append(obj)
+            return
+        super().save_model(request, obj, form, change)
+
+    def delete_in_chunks(self, request, queryset):
+        deleted = 0
+        for pks in iter_pk_chunks(queryset):
+            with transaction.atomic():
+                deleted += self.model.objects.filter(pk__in=pks).delete()[0]
+        self.message_user(request, f'Удалено объектов: {deleted}')
+    delete_in_chunks.short_description = 'Удалить выбранные (пачками)'
+
+
+class PostAdmin(PerformanceAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,12 +58,87 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = PerformanceAdmin.actions + ('clear_group',)
+
+    def clear_group(self, request, queryset):
+        updated = 0
+        for pks in iter_pk_chunks(queryset.filter(group__isnull=False)):
+            posts = list(Post.objects.filter(pk__in=pks))
+            for post in posts:
+                post.group = None
+            with transaction.atomic():
+                bulk_update_with_signals(Post, posts, ['group'])
+            updated += len(posts)
+        self.message_user(request, f'Убрано из групп постов: {updated}')
+    clear_group.short_description = 'Убрать выбранные посты из группы'
+
+
+class CommentAdmin(PerformanceAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    search_fields = ('text',)
+    list_filter = ('created',)
+    empty_value_display = '-пусто-'
+
+
+class FollowAdmin(PerformanceAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class DeletionUserAdmin(UserAdmin):
+    actions = ('schedule_deletion',)
+
+    def schedule_deletion(self, request, queryset):
+        scheduled = 0
+        for user in queryset.iterator():
+            schedule_deletion(user)
+            scheduled += 1
+        self.message_user(
+            request,
+            f'Поставлено в очередь удаления: {scheduled}. Записи скрыты, '
+            f'удаление выполнит process_deletions.'
+        )
+    schedule_deletion.short_description = (
+        'Скрыть и удалить в фоне вместе с записями'
+    )
+
+
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'username',
+        'status',
+        'posts_deleted',
+        'comments_deleted',
+        'follows_deleted',
+        'created',
+        'finished',
+    )
+    list_filter = ('status',)
+    readonly_fields = list_display
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Comment)
-admin.site.register(Follow)
-admin.site.register(Group)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(DeletionJob, DeletionJobAdmin)
+admin.site.unregister(User)
+admin.site.register(User, DeletionUserAdmin)
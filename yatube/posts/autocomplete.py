@@ -0,0 +1,29 @@
+from core.autocomplete import PrefixIndex
+
+from .models import Group, visible_users
+
+
+def user_entry(user):
+    item = {'id': user.pk, 'label': user.username}
+    return user.pk, [user.username], item
+
+
+def group_entry(group):
+    item = {'id': group.pk, 'label': group.title, 'slug': group.slug}
+    return group.pk, [group.slug, group.title, *group.title.split()], item
+
+
+def load_users():
+    for user in visible_users().only('id', 'username'):
+        yield user_entry(user)
+
+
+def load_groups():
+    for group in Group.objects.only('id', 'title', 'slug'):
+        yield group_entry(group)
+
+
+INDEXES = {
+    'users': PrefixIndex('users', load_users),
+    'groups': PrefixIndex('groups', load_groups),
+}
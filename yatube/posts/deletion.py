@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from api.models import Change
+from archive.models import ArchivedPost, ArchiveSummary
+from core.page_cache import invalidate_tags
+from core.paginator import COUNT_CACHE_KEY
+from core.snapshot import mark_dirty
+from core.timeline import reset
+from core.utils import iter_pk_chunks
+
+from .autocomplete import INDEXES
+from .engagement import delete_likes
+from .feeds import feed_cache_keys
+from .models import Comment, DeletionJob, Follow, Group, Like, Post, User
+
+DELETION_BATCH_SIZE = 200
+# Задание без новых пачек дольше этого считается брошенным упавшим
+# процессом и может быть продолжено другим.
+DELETION_LEASE = timedelta(minutes=10)
+
+
+def schedule_deletion(user):
+    """Сразу скрывает пользователя и его записи, удаление — в очередь.
+
+    Пользователь становится неактивным: войти он больше не может, а его
+    посты и комментарии скрываются по заданию удаления
+    (Post.objects.visible(), posts.models.pending_deletion).
+    Сами строки удаляет команда process_deletions.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        job = DeletionJob.objects.filter(user=user).exclude(
+            status=DeletionJob.DONE
+        ).first()
+        if job is None:
+            job = DeletionJob.objects.create(
+                user=user, username=user.username
+            )
+        # Скрытие идёт мимо сигналов: клиенты API узнают о нём из
+        # журнала, где скрытые записи отдаются как удалённые.
+        Change.record(Post, Post.objects.filter(
+            author=user
+        ).values_list('pk', flat=True))
+        Change.record(Comment, Comment.objects.filter(
+            author=user, post__isnull=False
+        ).values_list('pk', flat=True))
+    INDEXES['users'].remove(user.pk)
+    hide_content(user)
+    return job
+
+
+def hide_content(user):
+    """Сбрасывает кеши страниц и лент, где видны записи пользователя."""
+    groups = Group.objects.filter(
+        pk__in=Post.objects.filter(author=user).values('group_id')
+    ).values_list('pk', 'slug')
+    keys = ['index', f'author:{user.pk}']
+    keys += [f'group:{pk}' for pk, _ in groups]
+    reset(*keys)
+    cache.delete_many([COUNT_CACHE_KEY.format(key) for key in keys])
+    feed_keys = ['index', f'author:{user.username}']
+    feed_keys += [f'group:{slug}' for _, slug in groups]
+    cache.delete_many(feed_cache_keys(*feed_keys))
+    commented = Comment.objects.filter(
+        author=user, post__isnull=False
+    ).values_list('post_id', flat=True).distinct()
+    invalidate_tags(*keys, *(f'post:{pk}' for pk in commented))
+    mark_dirty(
+        reverse('posts:index'),
+        reverse('posts:profile', args=(user.username,)),
+        *(reverse('posts:group_list', args=(slug,)) for _, slug in groups)
+    )
+
+
+def claim(job):
+    """Помечает задание выполняемым этим процессом.
+
+    Условный UPDATE выполняется базой по одному: из двух одновременных
+    process_deletions задание достаётся одному, второй его пропускает.
+    """
+    now = timezone.now()
+    return DeletionJob.objects.filter(pk=job.pk).filter(
+        Q(status=DeletionJob.PENDING)
+        | Q(status=DeletionJob.RUNNING, heartbeat__isnull=True)
+        | Q(status=DeletionJob.RUNNING, heartbeat__lt=now - DELETION_LEASE)
+    ).update(status=DeletionJob.RUNNING, heartbeat=now)
+
+
+def run_job(job, batch_size=DELETION_BATCH_SIZE):
+    """Удаляет записи пользователя пачками в коротких транзакциях.
+
+    Каждая пачка — отдельная транзакция, так что база не блокируется
+    надолго, а прерванное задание продолжается с того же места. Посты
+    удаляются с сигналами: картинки и миниатюры убирает хранилище,
+    кеши и статические копии страниц обновляются как при обычном
+    удалении. Архивные посты удаляются из архивной базы, их картинки
+    освобождаются явно. Сам пользователь удаляется последним, когда
+    каскадам уже нечего удалять.
+
+    Возвращает None, если задание уже выполняет другой процесс.
+    """
+    if not claim(job):
+        return None
+    user_id = job.user_id
+    steps = (
+        ('follows_deleted',
+         Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))),
+        ('comments_deleted', Comment.objects.filter(author_id=user_id)),
+        ('posts_deleted', Post.objects.filter(author_id=user_id)),
+    )
+    # Лайки удаляются до пользователя и с вычитанием из счётчиков
+    # постов: каскад удаления пользователя счётчиков не трогает.
+    for pks in iter_pk_chunks(Like.objects.filter(user_id=user_id),
+                              batch_size):
+        delete_likes(pks)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now()
+        )
+    for field, queryset in steps:
+        for pks in iter_pk_chunks(queryset, batch_size):
+            with transaction.atomic():
+                queryset.model.objects.filter(pk__in=pks).delete()
+            DeletionJob.objects.filter(pk=job.pk).update(
+                heartbeat=timezone.now(), **{field: F(field) + len(pks)}
+            )
+    archived = ArchivedPost.objects.filter(author_id=user_id)
+    if not ArchiveSummary.objects.filter(author_id=user_id).exists():
+        archived = archived.none()
+    for pks in iter_pk_chunks(archived, batch_size):
+        images = [
+            post.data['image'] for post in ArchivedPost.objects.filter(
+                pk__in=pks
+            )
+        ]
+        ArchivedPost.objects.filter(pk__in=pks).delete()
+        for image in filter(None, images):
+            Post.image.field.storage.delete(image)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now(),
+            posts_deleted=F('posts_deleted') + len(pks),
+        )
+    with transaction.atomic():
+        User.objects.filter(pk=user_id).delete()
+    DeletionJob.objects.filter(pk=job.pk).update(
+        status=DeletionJob.DONE, finished=timezone.now()
+    )
+    job.refresh_from_db()
+    return job
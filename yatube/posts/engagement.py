@@ -0,0 +1,190 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models import F
+
+from api.models import Change
+
+from .models import Like, Post, PostStats
+
+LIKES = 'likes'
+VIEWS = 'views'
+PENDING_KEY = 'engagement:{}:{}'
+FLUSH_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def counters():
+    # Счётчики идут мимо локального уровня TwoTierCache: incr и decr
+    # должны быть атомарны для всех процессов.
+    return caches[settings.ENGAGEMENT_CACHE]
+
+
+class EngagementBuffer:
+    """Приращения лайков и просмотров между сбросами в базу.
+
+    Приращение сразу попадает в общий кеш (incr), а процесс запоминает,
+    какие счётчики он трогал. Раз в FLUSH_INTERVAL секунд накопленное
+    переносится в PostStats пачками UPDATE ... SET n = n + d — по
+    одному запросу на каждое значение d, — и вычитается из кеша через
+    decr.
+    Сумма «база + кеш» поэтому всегда равна настоящей, даже если два
+    процесса сбросят один счётчик одновременно. Сбрасывает буфер поток
+    (start_flusher), а не запросы. Если ENGAGEMENT_CACHE общий (memcached),
+    счётчики процесса, завершившегося до сброса, остаются в кеше и
+    уходят в базу с первым же новым приращением того же поста; с кешем
+    в памяти процесса они сбрасываются при штатном завершении.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.flushed = time.monotonic()
+
+    def add(self, field, post_id, delta=1):
+        ensure_flusher()
+        key = PENDING_KEY.format(field, post_id)
+        if not counters().add(key, delta, None):
+            try:
+                counters().incr(key, delta)
+            except ValueError:
+                # Ключ вытеснили между add и incr.
+                counters().add(key, delta, None)
+        with self.lock:
+            self.dirty.add((field, post_id))
+
+    def flush(self, force=False):
+        """Переносит накопленное в базу; возвращает число UPDATE."""
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.flushed < FLUSH_INTERVAL:
+                return 0
+            self.flushed = now
+            dirty, self.dirty = self.dirty, set()
+        keys = {PENDING_KEY.format(*item): item for item in dirty}
+        pending = counters().get_many(keys)
+        batches = defaultdict(list)
+        for key, delta in pending.items():
+            if delta:
+                field, post_id = keys[key]
+                batches[field, delta].append(post_id)
+        with transaction.atomic():
+            # Архивные и удалённые посты строк счётчиков не получают.
+            existing = set(Post.objects.filter(
+                pk__in={post_id for _, post_id in dirty}
+            ).values_list('pk', flat=True))
+            PostStats.objects.bulk_create(
+                [PostStats(post_id=post_id) for post_id in existing],
+                ignore_conflicts=True,
+            )
+            for (field, delta), post_ids in batches.items():
+                PostStats.objects.filter(pk__in=post_ids).update(
+                    **{field: F(field) + delta}
+                )
+            # Лайки отдаёт API, а UPDATE идёт мимо сигналов журнала.
+            # Просмотры в API не попадают и журнал не засоряют.
+            liked = {
+                post_id for (field, _), post_ids in batches.items()
+                if field == LIKES for post_id in post_ids
+            }
+            Change.record(Post, sorted(liked.intersection(existing)))
+        for key, delta in pending.items():
+            if delta:
+                counters().decr(key, delta)
+        return len(batches)
+
+
+buffer = EngagementBuffer()
+# Интервал сброса (None — поток не нужен) и процесс, где поток запущен.
+_flusher_interval = None
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher(interval=FLUSH_INTERVAL):
+    """Включает сброс буфера в базу фоновым потоком раз в interval секунд.
+
+    Вызывается из yatube/wsgi.py, поэтому запросы в базу ради счётчиков
+    не пишут, а тесты и команды управления потока не получают. Сам поток
+    запускается при первом приращении в каждом процессе (ensure_flusher):
+    сервер с fork после загрузки приложения (gunicorn --preload)
+    импортирует wsgi в главном процессе, а потоки в дочерние процессы
+    при fork не переходят.
+    """
+    global _flusher_interval
+    _flusher_interval = interval
+
+
+def ensure_flusher():
+    """Запускает поток сброса, если его ещё нет в текущем процессе."""
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_interval is None or _flusher_pid == pid:
+        return
+    with _flusher_lock:
+        if _flusher_pid == pid:
+            return
+        threading.Thread(
+            target=run_flusher, args=(_flusher_interval,),
+            name='engagement-flusher', daemon=True,
+        ).start()
+        _flusher_pid = pid
+    atexit.register(buffer.flush, force=True)
+
+
+def run_flusher(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            buffer.flush(force=True)
+        except Exception:
+            logger.exception('Не удалось сбросить счётчики в базу')
+        finally:
+            connections.close_all()
+
+
+def with_pending(posts):
+    """Добавляет постам likes и views: значения из базы плюс буфер."""
+    stats = PostStats.objects.in_bulk([post.pk for post in posts])
+    keys = {
+        PENDING_KEY.format(field, post.pk): (field, post)
+        for post in posts for field in (LIKES, VIEWS)
+    }
+    pending = counters().get_many(keys)
+    for key, (field, post) in keys.items():
+        saved = getattr(stats.get(post.pk), field, 0)
+        setattr(post, f'{field}_total', saved + pending.get(key, 0))
+    return posts
+
+
+def like(user, post):
+    """Ставит лайк; повторный лайк того же пользователя ничего не меняет."""
+    _, created = Like.objects.get_or_create(user=user, post=post)
+    if created:
+        buffer.add(LIKES, post.pk)
+    return created
+
+
+def unlike(user, post):
+    deleted, _ = Like.objects.filter(user=user, post=post).delete()
+    if deleted:
+        buffer.add(LIKES, post.pk, -1)
+    return bool(deleted)
+
+
+def delete_likes(pks):
+    """Удаляет лайки пачкой и вычитает их из счётчиков, как unlike."""
+    likes = Like.objects.filter(pk__in=pks)
+    with transaction.atomic():
+        post_ids = Counter(likes.values_list('post_id', flat=True))
+        likes.delete()
+    for post_id, count in post_ids.items():
+        buffer.add(LIKES, post_id, -count)
@@ -0,0 +1,146 @@
+import hashlib
+
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe, quote_etag
+from django.utils.text import Truncator
+
+from .models import Group, Post, visible_users
+
+FEED_ITEMS = 20
+FEED_TITLE_LENGTH = 50
+FEED_TEXT_LENGTH = 1000
+FEED_CACHE_KEY = 'feed:{}:{}'
+FEED_CACHE_TIMEOUT = 60 * 60
+FEED_FORMATS = ('rss', 'atom')
+
+
+def feed_cache_key(key, feed_format):
+    """Ключ кеша ленты 'index', 'author:<username>' или 'group:<slug>'.
+
+    Имена и слаги бывают не ASCII, а memcached принимает только ASCII без
+    пробелов и управляющих символов, поэтому в ключ идёт их хеш.
+    """
+    digest = hashlib.md5(key.encode()).hexdigest()
+    return FEED_CACHE_KEY.format(digest, feed_format)
+
+
+def feed_cache_keys(*keys):
+    return [
+        feed_cache_key(key, feed_format)
+        for key in keys for feed_format in FEED_FORMATS
+    ]
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние обновления'
+    link = reverse_lazy('posts:index')
+    description = 'Последние записи всех авторов'
+
+    def items(self):
+        return Post.objects.visible().select_related('author')[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(FEED_TITLE_LENGTH)
+
+    def item_description(self, item):
+        return Truncator(item.text).chars(FEED_TEXT_LENGTH)
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=(group.slug,))
+
+    def description(self, group):
+        return group.description
+
+    def items(self, group):
+        return group.posts.visible().select_related('author')[
+            :FEED_ITEMS
+        ]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(visible_users(), username=username)
+
+    def title(self, author):
+        return f'Yatube: {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=(author.username,))
+
+    def description(self, author):
+        return f'Записи пользователя {author.username}'
+
+    def items(self, author):
+        return author.posts.select_related('author')[:FEED_ITEMS]
+
+
+def cached_feed(feed_class, key, feed_format='rss'):
+    """Представление ленты, которая строится один раз до нового поста.
+
+    Готовый XML хранится в кеше (ключи сбрасываются в posts.signals),
+    а повторные запросы с If-None-Match/If-Modified-Since получают 304
+    без обращения к базе.
+    """
+    if feed_format == 'atom':
+        feed_class = type(
+            f'{feed_class.__name__}Atom', (feed_class,),
+            {'feed_type': Atom1Feed, 'subtitle': feed_class.description}
+        )
+    feed = feed_class()
+
+    def view(request, **kwargs):
+        cache_key = feed_cache_key(key.format(**kwargs), feed_format)
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = feed(request, **kwargs)
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': quote_etag(hashlib.md5(response.content).hexdigest()),
+                'last_modified': response['Last-Modified'],
+            }
+            cache.set(cache_key, cached, FEED_CACHE_TIMEOUT)
+        response = get_conditional_response(
+            request,
+            etag=cached['etag'],
+            last_modified=parse_http_date_safe(cached['last_modified']),
+        )
+        if response is None:
+            response = HttpResponse(
+                cached['content'], content_type=cached['content_type']
+            )
+        response['ETag'] = cached['etag']
+        response['Last-Modified'] = cached['last_modified']
+        return response
+    return view
+
+
+index_rss = cached_feed(LatestPostsFeed, 'index')
+index_atom = cached_feed(LatestPostsFeed, 'index', 'atom')
+group_rss = cached_feed(GroupPostsFeed, 'group:{slug}')
+group_atom = cached_feed(GroupPostsFeed, 'group:{slug}', 'atom')
+profile_rss = cached_feed(AuthorPostsFeed, 'author:{username}')
+profile_atom = cached_feed(AuthorPostsFeed, 'author:{username}', 'atom')
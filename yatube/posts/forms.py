@@ -1,7 +1,15 @@
 from django import forms
+from django.urls import reverse_lazy
 
+from core.widgets import AutocompleteSelect
+
+from .autocomplete import INDEXES
 from .models import Comment, Post
 
+# С большим числом групп <select> со всеми группами заменяется
+# автодополнением.
+GROUP_SELECT_LIMIT = 100
+
 
 class PostForm(forms.ModelForm):
     class Meta:
@@ -15,6 +23,15 @@ class PostForm(forms.ModelForm):
             'text': "Вы обязательно должны заполнить это поле",
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if len(INDEXES['groups']) > GROUP_SELECT_LIMIT:
+            field = self.fields['group']
+            field.widget = AutocompleteSelect(
+                reverse_lazy('posts:autocomplete', args=('groups',))
+            )
+            field.widget.choices = field.choices
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,40 @@
+from core.fragments import fragment
+
+from .engagement import with_pending
+from .forms import CommentForm
+from .models import Follow, Like, Post
+
+
+@fragment('header', 'includes/header.html')
+def header(request, arg):
+    return {}
+
+
+@fragment('switcher', 'posts/includes/switcher.html')
+def switcher(request, arg):
+    return {}
+
+
+@fragment('following', 'posts/includes/following.html')
+def following(request, username):
+    if username == request.user.username:
+        return None
+    return {
+        'author': {'username': username},
+        'following': Follow.objects.filter(
+            user=request.user, author__username=username
+        ).exists(),
+    }
+
+
+@fragment('post_actions', 'posts/includes/post_actions.html')
+def post_actions(request, post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'author_id').first()
+    if post is None:
+        return None
+    with_pending([post])
+    return {
+        'post': post,
+        'form': CommentForm(),
+        'liked': Like.objects.filter(user=request.user, post=post).exists(),
+    }
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.sitemaps import build_sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит карту сайта файлами по 50 000 адресов. По умолчанию '
+        'переписывает только последний файл каждого раздела.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Перестроить все файлы (например, после удалений).',
+        )
+
+    def handle(self, *args, **options):
+        written = build_sitemaps(full=options['full'])
+        self.stdout.write(f'Записано файлов карты сайта: {written}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.utils import iter_pk_chunks
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает размеры и заглушки картинок постов, загруженных '
+        'до появления этих полей.'
+    )
+
+    def handle(self, *args, **options):
+        pending = Post.objects.exclude(image='').filter(
+            image_width__isnull=True
+        )
+        filled = failed = 0
+        for pks in iter_pk_chunks(pending):
+            posts = []
+            for post in Post.objects.filter(pk__in=pks).only('id', 'image'):
+                if post.update_image_preview():
+                    posts.append(post)
+                else:
+                    failed += 1
+            Post.objects.bulk_update(posts, (
+                'image_width', 'image_height', 'image_placeholder'
+            ))
+            filled += len(posts)
+        self.stdout.write(f'Заполнено: {filled}, не прочитано: {failed}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.utils import iter_pk_chunks
+from posts.models import Post
+from posts.tags import index_post
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает теги и упоминания постов, написанных до появления '
+        'таблиц тегов.'
+    )
+
+    def handle(self, *args, **options):
+        indexed = 0
+        for pks in iter_pk_chunks(Post.objects.all()):
+            posts = Post.objects.filter(pk__in=pks).only(
+                'id', 'text', 'author_id', 'pub_date'
+            )
+            with transaction.atomic():
+                for post in posts:
+                    index_post(post)
+            indexed += len(pks)
+        self.stdout.write(f'Обработано постов: {indexed}')
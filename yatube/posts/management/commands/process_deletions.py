@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import run_job
+from posts.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей из очереди удаления вместе с их постами, '
+        'комментариями и подписками, пачками в коротких транзакциях. '
+        'Прерванные задания продолжаются, выполняемые другим процессом '
+        'пропускаются.'
+    )
+
+    def handle(self, *args, **options):
+        jobs = DeletionJob.objects.exclude(status=DeletionJob.DONE)
+        for job in jobs.iterator():
+            job = run_job(job)
+            if job is None:
+                continue
+            self.stdout.write(
+                f'{job.username}: постов {job.posts_deleted}, '
+                f'комментариев {job.comments_deleted}, '
+                f'подписок {job.follows_deleted}'
+            )
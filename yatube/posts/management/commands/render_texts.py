@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.markup import RENDERER_VERSION, render
+from core.utils import iter_pk_chunks
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Перерисовывает HTML постов и комментариев, отрисованных прежней '
+        'версией разметки или ещё ни разу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все строки, а не только устаревшие.',
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            queryset = model.objects.all()
+            if not options['all']:
+                queryset = queryset.exclude(
+                    text_html_version=RENDERER_VERSION
+                )
+            rendered = 0
+            for pks in iter_pk_chunks(queryset):
+                objs = list(
+                    model.objects.filter(pk__in=pks).only('id', 'text')
+                )
+                for obj in objs:
+                    obj.text_html = render(obj.text)
+                    obj.text_html_version = RENDERER_VERSION
+                model.objects.bulk_update(
+                    objs, ('text_html', 'text_html_version')
+                )
+                rendered += len(objs)
+            self.stdout.write(
+                f'{model._meta.label}: перерисовано {rendered}'
+            )
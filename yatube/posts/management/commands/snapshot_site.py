@@ -0,0 +1,68 @@
+from math import ceil
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.urls import reverse
+
+from core.models import DirtyPath
+from core.snapshot import (SNAPSHOT_FEED_PAGES, SnapshotRenderer,
+                           feed_paths, flush_dirty)
+from core.utils import iter_pk_chunks
+from posts.models import Group, Post, User, visible_users
+from posts.views import POSTS_PER_PAGE
+
+
+def pages(count):
+    """Сколько страниц ленты из count постов сохранять."""
+    return max(1, min(SNAPSHOT_FEED_PAGES, ceil(count / POSTS_PER_PAGE)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сохраняет публичные страницы в SNAPSHOT_ROOT для отдачи '
+        'фронтовым прокси. С --dirty перестраивает только страницы '
+        'из очереди изменений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dirty',
+            action='store_true',
+            help='Перестроить только страницы, затронутые записями.',
+        )
+
+    def handle(self, *args, **options):
+        renderer = SnapshotRenderer()
+        if options['dirty']:
+            written = flush_dirty(renderer)
+        else:
+            # Полная выгрузка покрывает всю очередь изменений.
+            DirtyPath.objects.all().delete()
+            written = 0
+            for path in self.all_paths():
+                renderer.write(path)
+                written += 1
+        self.stdout.write(f'Обновлено страниц: {written}')
+
+    def all_paths(self):
+        yield from feed_paths(
+            reverse('posts:index'), pages(Post.objects.visible().count())
+        )
+        groups = Group.objects.annotate(count=Count('posts')).values_list(
+            'slug', 'count'
+        )
+        for slug, count in groups.iterator():
+            yield from feed_paths(
+                reverse('posts:group_list', args=(slug,)), pages(count)
+            )
+        users = visible_users()
+        for pks in iter_pk_chunks(users):
+            for username, count in User.objects.filter(
+                pk__in=pks
+            ).annotate(count=Count('posts')).values_list('username', 'count'):
+                yield from feed_paths(
+                    reverse('posts:profile', args=(username,)), pages(count)
+                )
+        for pks in iter_pk_chunks(Post.objects.all()):
+            for pk in pks:
+                yield reverse('posts:post_detail', args=(pk,))
@@ -0,0 +1,29 @@
+from core.snapshot import is_snapshot
+
+from .engagement import VIEWS, buffer
+
+
+class PostViewsMiddleware:
+    """Считает просмотры постов.
+
+    Стоит перед кешем страниц, чтобы учитывать и ответы из кеша: кеш
+    восстанавливает request.resolver_match закешированной страницы,
+    и адрес заново не разбирается. Отрисовка статических копий
+    (core.snapshot) просмотром не считается. Буфер сбрасывается в базу
+    не здесь, а фоновым потоком (posts.engagement.start_flusher).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        match = request.resolver_match
+        if (
+            request.method == 'GET'
+            and not is_snapshot(request)
+            and response.status_code == 200
+            and match is not None
+            and match.view_name == 'posts:post_detail'
+        ):
+            buffer.add(VIEWS, match.kwargs['post_id'])
+        return response
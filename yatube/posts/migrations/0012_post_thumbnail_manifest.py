@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_auto_20261019_1023'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_manifest',
+            field=models.TextField(blank=True, editable=False, verbose_name='Миниатюры картинки'),
+        ),
+    ]
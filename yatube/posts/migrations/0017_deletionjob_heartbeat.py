@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_engagement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последняя пачка'),
+        ),
+    ]
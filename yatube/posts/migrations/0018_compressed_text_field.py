@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:47
+
+import core.fields
+from django.db import migrations
+
+# До 0018 сжатие подключалось к полям на лету и в миграции не попадало,
+# поэтому text тоже мог сохраниться сжатым. Теперь text — обычный
+# TextField: такие строки распаковываются на месте.
+TEXT_TABLES = ('posts_post', 'posts_comment')
+
+
+def decompress_text_columns(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for table in TEXT_TABLES:
+            cursor.execute(
+                f"SELECT id, text FROM {table} WHERE typeof(text) = 'blob'"
+            )
+            rows = cursor.fetchall()
+            cursor.executemany(
+                f'UPDATE {table} SET text = %s WHERE id = %s',
+                [(core.fields.decompress_text(text), pk)
+                 for pk, text in rows],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_deletionjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            decompress_text_columns, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='text_html',
+            field=core.fields.CompressedTextField(blank=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text_html',
+            field=core.fields.CompressedTextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+    ]
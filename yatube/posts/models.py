@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import models, transaction
+
+from core.fields import CompressedTextField
+from core.images import image_preview
+from core.markup import rendered_html
+from core.storage import post_image_storage
 
 User = get_user_model()
 
+# Миниатюра картинки в шаблонах постов (posts/includes/post_image.html).
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+THUMBNAIL_ASPECT = (960, 339)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -16,8 +27,33 @@ class Group(models.Model):
         return self.title
 
 
+def pending_deletion():
+    """id пользователей, чьё удаление стоит в очереди (posts.deletion).
+
+    Записи скрываются по заданию удаления, а не по is_active: отключённый
+    администратором аккаунт не может войти, но его записи остаются.
+    """
+    return DeletionJob.objects.filter(user__isnull=False).values('user_id')
+
+
+def visible_users():
+    return User.objects.exclude(pk__in=pending_deletion())
+
+
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Посты без авторов, поставленных в очередь на удаление."""
+        return self.exclude(author_id__in=pending_deletion())
+
+
 class Post(models.Model):
     text = models.TextField('Текст поста', help_text='Введите текст')
+    text_html = CompressedTextField(
+        'HTML текста', blank=True, editable=False
+    )
+    text_html_version = models.PositiveSmallIntegerField(
+        'Версия HTML', default=0, editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
@@ -38,8 +74,23 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки', null=True, blank=True, editable=False
+    )
+    image_placeholder = models.TextField(
+        'Заглушка картинки', blank=True, editable=False
+    )
+    thumbnail_manifest = models.TextField(
+        'Миниатюры картинки', blank=True, editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -49,6 +100,48 @@ class Post(models.Model):
     def __str__(self) -> str:
         return self.text
 
+    @property
+    def html(self):
+        return rendered_html(self)
+
+    def _save_table(self, raw=False, cls=None, force_insert=False,
+                    force_update=False, using=None, update_fields=None):
+        # Хранилище берёт ссылку на картинку в pre_save поля, до записи
+        # строки: если строка не сохранится, ссылка откатится вместе с
+        # ней. Транзакция охватывает только запись строки, а обработчики
+        # post_save (кеши, ленты, миниатюры) работают уже после COMMIT.
+        with transaction.atomic(using=using):
+            return super()._save_table(
+                raw, cls, force_insert, force_update, using, update_fields
+            )
+
+    def update_image_preview(self):
+        """Заполняет размеры и размытую заглушку картинки.
+
+        Возвращает False, если картинку не удалось прочитать; тогда
+        размеры нулевые, чтобы следующие сохранения не читали файл снова
+        (fill_image_previews такие посты не сохраняет и пробует заново).
+        """
+        if not self.image:
+            self.image_width = self.image_height = None
+            self.image_placeholder = ''
+            return True
+        try:
+            preview = image_preview(self.image, THUMBNAIL_ASPECT)
+        except (OSError, SuspiciousFileOperation):
+            # Файл пропал или лежит вне MEDIA_ROOT: пост сохраняется без
+            # заглушки.
+            preview = None
+        finally:
+            if self.image._committed:
+                self.image.close()
+        if preview is None:
+            self.image_width = self.image_height = 0
+            self.image_placeholder = ''
+            return False
+        self.image_width, self.image_height, self.image_placeholder = preview
+        return True
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -64,6 +157,10 @@ class Comment(models.Model):
         related_name='comments'
     )
     text = models.TextField()
+    text_html = CompressedTextField(blank=True, editable=False)
+    text_html_version = models.PositiveSmallIntegerField(
+        default=0, editable=False
+    )
     created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -72,6 +169,10 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
+    @property
+    def html(self):
+        return rendered_html(self)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -97,3 +198,144 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} followed {self.author}'
+
+
+class PostStats(models.Model):
+    """Лайки и просмотры поста.
+
+    Лежат отдельно от Post, чтобы сохранение поста целиком не затирало
+    приращения, которые posts.engagement сбрасывает пачками.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    likes = models.IntegerField('Лайки', default=0)
+    views = models.IntegerField('Просмотры', default=0)
+
+    def __str__(self):
+        return f'{self.post_id}: {self.likes} / {self.views}'
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes'
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_likes'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} likes {self.post_id}'
+
+
+class Tag(models.Model):
+    """Хештег из текстов постов, имя хранится в нижнем регистре."""
+    name = models.CharField('Имя', max_length=100, unique=True)
+
+    class Meta:
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Связь поста с тегом; дата поста повторена для ленты тега."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'post'], name='unique_post_tags'
+            ),
+        ]
+        indexes = [models.Index(fields=('tag', '-pub_date', '-post'))]
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в посте через @имя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_mentions'
+            ),
+        ]
+        indexes = [models.Index(fields=('user', '-pub_date', '-post'))]
+
+
+class DeletionJob(models.Model):
+    """Фоновое удаление пользователя вместе с его записями."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs'
+    )
+    username = models.CharField('Пользователь', max_length=150)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=PENDING,
+        db_index=True
+    )
+    follows_deleted = models.PositiveIntegerField('Подписок', default=0)
+    comments_deleted = models.PositiveIntegerField('Комментариев', default=0)
+    posts_deleted = models.PositiveIntegerField('Постов', default=0)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        'Последняя пачка', null=True, blank=True, editable=False
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return f'{self.username}: {self.get_status_display()}'
@@ -0,0 +1,289 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.urls import NoReverseMatch, reverse
+
+from core.markup import RENDERER_VERSION, render
+from core.page_cache import invalidate_tags
+from core.paginator import COUNT_CACHE_KEY
+from core.snapshot import feed_paths, mark_dirty
+from core.thumbnails import manifest_thumbnail
+from core.timeline import push, remove, reset
+
+from .autocomplete import INDEXES, group_entry, user_entry
+from .feeds import feed_cache_keys
+from .models import (THUMBNAIL_GEOMETRY, THUMBNAIL_OPTIONS, Comment, Follow,
+                     Group, Post, User)
+from .tags import index_post
+
+
+def post_group_ids(post):
+    """Текущая группа поста и та, из которой его перенесли этим save()."""
+    group_ids = {post.group_id, getattr(post, '_saved_group_id', None)}
+    group_ids.discard(None)
+    return group_ids
+
+
+def timeline_keys(post):
+    """Ключи лент (главной, автора и групп), в которых виден или был пост."""
+    keys = ['index', f'author:{post.author_id}']
+    keys += [f'group:{group_id}' for group_id in sorted(post_group_ids(post))]
+    return keys
+
+
+def feed_count_keys(post):
+    return [COUNT_CACHE_KEY.format(key) for key in timeline_keys(post)]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_feed_counts(sender, instance, **kwargs):
+    cache.delete_many(feed_count_keys(instance))
+
+
+def group_feed_keys(group_ids):
+    return [
+        f'group:{slug}' for slug in Group.objects.filter(
+            pk__in=group_ids
+        ).values_list('slug', flat=True)
+    ]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_syndication_feeds(sender, instance, **kwargs):
+    cache.delete_many(feed_cache_keys(
+        'index', f'author:{instance.author.username}',
+        *group_feed_keys(post_group_ids(instance)),
+    ))
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, **kwargs):
+    instance._saved_slug = None
+    if instance.pk is not None:
+        instance._saved_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_feeds(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_saved_slug', None)}
+    slugs.discard(None)
+    cache.delete_many(feed_cache_keys(*(f'group:{slug}' for slug in slugs)))
+
+
+USER_FEED_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def remember_user_names(sender, instance, update_fields=None, **kwargs):
+    instance._saved_names = None
+    if update_fields and not set(update_fields) & set(USER_FEED_FIELDS):
+        return
+    if instance.pk is not None:
+        instance._saved_names = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*USER_FEED_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def reset_user_feeds(sender, instance, created, **kwargs):
+    """Имя автора есть в каждом его посте в лентах: после смены — сброс."""
+    saved = getattr(instance, '_saved_names', None)
+    names = tuple(getattr(instance, field) for field in USER_FEED_FIELDS)
+    if created or saved is None or saved == names:
+        return
+    group_ids = Post.objects.filter(author=instance).exclude(
+        group=None
+    ).values_list('group_id', flat=True).distinct()
+    cache.delete_many(feed_cache_keys(
+        'index', f'author:{saved[0]}', f'author:{instance.username}',
+        *group_feed_keys(group_ids),
+    ))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_pages(sender, instance, **kwargs):
+    tags = ['index', f'post:{instance.pk}', f'author:{instance.author_id}']
+    tags += [f'group:{group_id}' for group_id in post_group_ids(instance)]
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comment_pages(sender, instance, **kwargs):
+    if instance.post_id:
+        invalidate_tags(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_pages(sender, instance, **kwargs):
+    invalidate_tags(f'author:{instance.author_id}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_pages(sender, instance, **kwargs):
+    invalidate_tags('index', f'group:{instance.pk}')
+
+
+def group_paths(slug):
+    """Страницы ленты группы; у группы со слагом вне адресов их нет."""
+    try:
+        return feed_paths(reverse('posts:group_list', args=(slug,)))
+    except NoReverseMatch:
+        return []
+
+
+def post_paths(post):
+    """Публичные страницы, на которых показан или был показан пост."""
+    paths = feed_paths(reverse('posts:index'))
+    paths += feed_paths(reverse('posts:profile', args=(post.author.username,)))
+    paths.append(reverse('posts:post_detail', args=(post.pk,)))
+    for slug in Group.objects.filter(
+        pk__in=post_group_ids(post)
+    ).values_list('slug', flat=True):
+        paths += group_paths(slug)
+    return paths
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def queue_post_snapshots(sender, instance, **kwargs):
+    mark_dirty(*post_paths(instance))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def queue_group_snapshots(sender, instance, **kwargs):
+    """Название группы есть на её странице и в карточках главной."""
+    slugs = {instance.slug, getattr(instance, '_saved_slug', None)}
+    slugs.discard(None)
+    paths = feed_paths(reverse('posts:index'))
+    for slug in slugs:
+        paths += group_paths(slug)
+    mark_dirty(*paths)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def queue_follow_snapshots(sender, instance, **kwargs):
+    mark_dirty(reverse('posts:profile', args=(instance.author.username,)))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def queue_comment_snapshots(sender, instance, **kwargs):
+    if instance.post_id:
+        mark_dirty(reverse('posts:post_detail', args=(instance.post_id,)))
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, **kwargs):
+    saved = None
+    if instance.pk is not None:
+        saved = Post.objects.filter(pk=instance.pk).values_list(
+            'image', 'group_id'
+        ).first()
+    instance._saved_image, instance._saved_group_id = saved or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    """Снимает ссылку со старой картинки поста после её замены."""
+    saved = getattr(instance, '_saved_image', None)
+    if saved and saved != instance.image.name:
+        instance.image.storage.delete(saved)
+    instance._saved_image = instance.image.name
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, archived=False, **kwargs):
+    # Картинку перенесённого в архив поста хранит архив (archive.archiving).
+    if instance.image and not archived:
+        instance.image.storage.delete(instance.image.name)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_text(sender, instance, **kwargs):
+    """HTML текста рисуется при сохранении, а не при каждом показе."""
+    instance.text_html = render(instance.text)
+    instance.text_html_version = RENDERER_VERSION
+
+
+@receiver(pre_save, sender=Post)
+def measure_post_image(sender, instance, **kwargs):
+    """Размеры и заглушка картинки считаются один раз при её загрузке."""
+    image = instance.image
+    if not image or not image._committed:
+        # Миниатюры прежней картинки к новой не относятся.
+        instance.thumbnail_manifest = ''
+        instance._thumbnail_manifest = None
+    if not image or not image._committed or instance.image_width is None:
+        instance.update_image_preview()
+
+
+@receiver(post_save, sender=Post)
+def build_thumbnail_manifest(sender, instance, **kwargs):
+    """Миниатюра новой картинки строится сразу, а не при первом показе."""
+    if instance.image and not instance.thumbnail_manifest:
+        manifest_thumbnail(instance, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@receiver(post_save, sender=Post)
+def index_tags(sender, instance, **kwargs):
+    """Теги и упоминания разбираются при записи, а не при чтении."""
+    index_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_timelines(sender, instance, created, **kwargs):
+    if created:
+        for key in timeline_keys(instance):
+            push(key, instance.pk)
+        return
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    if saved_group_id != instance.group_id:
+        # Старый пост встаёт в ленту новой группы по дате, а не в начало.
+        reset(*(
+            f'group:{group_id}'
+            for group_id in (saved_group_id, instance.group_id) if group_id
+        ))
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_timelines(sender, instance, **kwargs):
+    for key in timeline_keys(instance):
+        remove(key, instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def index_group(sender, instance, **kwargs):
+    INDEXES['groups'].update(*group_entry(instance))
+
+
+@receiver(post_delete, sender=Group)
+def unindex_group(sender, instance, **kwargs):
+    INDEXES['groups'].remove(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    # last_login обновляется при каждом входе и индекса не касается.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if not instance.deletion_jobs.exists():
+        INDEXES['users'].update(*user_entry(instance))
+    else:
+        INDEXES['users'].remove(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    INDEXES['users'].remove(instance.pk)
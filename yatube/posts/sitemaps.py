@@ -0,0 +1,188 @@
+import json
+import os
+import re
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.urls import reverse
+from django.utils import timezone
+
+from core.utils import atomic_write
+
+from .models import Group, Post, visible_users
+
+SITEMAP_CHUNK_SIZE = 50000
+SITEMAP_BATCH_SIZE = 2000
+MANIFEST_NAME = 'manifest.json'
+INDEX_NAME = 'sitemap.xml'
+CHUNK_NAME_RE = re.compile(r'^[a-z]+-\d+\.xml$')
+
+URLSET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+
+
+def post_rows():
+    return Post.objects.visible().order_by('id').values_list(
+        'id', 'pub_date'
+    )
+
+
+def group_rows():
+    return Group.objects.order_by('id').values_list('id', 'slug')
+
+
+def profile_rows():
+    return visible_users().order_by('id').values_list(
+        'id', 'username'
+    )
+
+
+SECTIONS = {
+    'posts': (
+        post_rows,
+        lambda row: (reverse('posts:post_detail', args=(row[0],)), row[1]),
+    ),
+    'groups': (
+        group_rows,
+        lambda row: (reverse('posts:group_list', args=(row[1],)), None),
+    ),
+    'profiles': (
+        profile_rows,
+        lambda row: (reverse('posts:profile', args=(row[1],)), None),
+    ),
+}
+
+
+def chunk_path(name):
+    return os.path.join(settings.SITEMAP_ROOT, name)
+
+
+def load_manifest():
+    try:
+        with open(chunk_path(MANIFEST_NAME)) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return {}
+
+
+def iter_rows(rows, after, limit):
+    """Строки с id больше after, не более limit, пачками по keyset."""
+    taken = 0
+    while taken < limit:
+        size = min(SITEMAP_BATCH_SIZE, limit - taken)
+        batch = list(rows.filter(id__gt=after)[:size])
+        if not batch:
+            return
+        yield from batch
+        taken += len(batch)
+        after = batch[-1][0]
+
+
+def write_chunk(section, number, after):
+    """Пишет один файл карты сайта и возвращает его описание."""
+    rows, location = SECTIONS[section]
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    lines = [URLSET_HEAD]
+    last_id = after
+    count = 0
+    for row in iter_rows(rows(), after, SITEMAP_CHUNK_SIZE):
+        url, lastmod = location(row)
+        lines.append(f'<url><loc>{escape(base_url + url)}</loc>')
+        if lastmod is not None:
+            lines.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        lines.append('</url>\n')
+        last_id = row[0]
+        count += 1
+    lines.append('</urlset>\n')
+    chunk = {
+        'name': f'{section}-{number}.xml',
+        'after': after,
+        'last_id': last_id,
+        'count': count,
+        'lastmod': timezone.now().isoformat(),
+    }
+    if count or number == 0:
+        atomic_write(chunk_path(chunk['name']), ''.join(lines))
+    return chunk
+
+
+def build_section(section, chunks, full=False):
+    """Перестраивает раздел карты сайта.
+
+    Границы файлов идут по id, поэтому новые записи попадают только
+    в последний файл: без full переписывается лишь он (и следующие, если
+    он переполнился), а если новых записей нет — ничего.
+    """
+    chunks = [] if full else list(chunks)
+    rows, _ = SECTIONS[section]
+    if chunks:
+        tail = chunks[-1]
+        if not rows().filter(id__gt=tail['last_id']).exists():
+            return chunks, 0
+        if tail['count'] < SITEMAP_CHUNK_SIZE:
+            chunks.pop()
+            after = tail['after']
+        else:
+            after = tail['last_id']
+    else:
+        after = 0
+    number = len(chunks)
+    written = 0
+    while True:
+        chunk = write_chunk(section, number, after)
+        if chunk['count'] == 0 and number > 0:
+            break
+        chunks.append(chunk)
+        written += 1
+        if chunk['count'] < SITEMAP_CHUNK_SIZE:
+            break
+        number, after = number + 1, chunk['last_id']
+    return chunks, written
+
+
+def build_sitemaps(full=False):
+    """Строит все разделы и индекс карты сайта, возвращает число файлов."""
+    manifest = load_manifest()
+    written = 0
+    for section in SECTIONS:
+        manifest[section], count = build_section(
+            section, manifest.get(section, []), full
+        )
+        written += count
+    base_url = settings.SITEMAP_BASE_URL.rstrip('/')
+    lines = [INDEX_HEAD]
+    for section in SECTIONS:
+        for chunk in manifest[section]:
+            url = base_url + reverse('sitemap_chunk', args=(chunk['name'],))
+            lines.append(
+                f'<sitemap><loc>{escape(url)}</loc>'
+                f'<lastmod>{chunk["lastmod"]}</lastmod></sitemap>\n'
+            )
+    lines.append('</sitemapindex>\n')
+    atomic_write(chunk_path(INDEX_NAME), ''.join(lines))
+    atomic_write(chunk_path(MANIFEST_NAME), json.dumps(manifest))
+    return written
+
+
+def serve_sitemap(name):
+    path = chunk_path(name)
+    if not os.path.exists(path):
+        raise Http404('Карта сайта ещё не построена')
+    return FileResponse(open(path, 'rb'), content_type='application/xml')
+
+
+def sitemap_index(request):
+    return serve_sitemap(INDEX_NAME)
+
+
+def sitemap_chunk(request, name):
+    if not CHUNK_NAME_RE.match(name):
+        raise Http404('Нет такого файла карты сайта')
+    return serve_sitemap(name)
@@ -0,0 +1,96 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.db.models import Q
+
+from .models import Mention, Post, PostTag, Tag, User
+
+TAG_RE = re.compile(r'(?<![\w&#])#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w.@+-])@([\w.@+-]{1,150})')
+TAG_PAGE_SIZE = 10
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def extract_mentions(text):
+    # Точка в конце — знак препинания, а не часть имени.
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)}
+
+
+def index_post(post):
+    """Приводит теги и упоминания поста в соответствие с его текстом.
+
+    Вызывается при сохранении поста; меняются только строки, которых
+    стало больше или меньше, так что правка без новых тегов обходится
+    двумя короткими запросами.
+    """
+    names = extract_tags(post.text)
+    saved = dict(
+        PostTag.objects.filter(post=post).values_list('tag__name', 'pk')
+    )
+    PostTag.objects.filter(
+        pk__in=[pk for name, pk in saved.items() if name not in names]
+    ).delete()
+    new_names = names - saved.keys()
+    if new_names:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in new_names], ignore_conflicts=True
+        )
+        PostTag.objects.bulk_create([
+            PostTag(tag=tag, post=post, pub_date=post.pub_date)
+            for tag in Tag.objects.filter(name__in=new_names)
+        ])
+    user_ids = set(User.objects.filter(
+        username__in=extract_mentions(post.text)
+    ).exclude(pk=post.author_id).values_list('pk', flat=True))
+    saved = set(
+        Mention.objects.filter(post=post).values_list('user_id', flat=True)
+    )
+    Mention.objects.filter(post=post, user_id__in=saved - user_ids).delete()
+    Mention.objects.bulk_create([
+        Mention(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in user_ids - saved
+    ])
+
+
+def encode_cursor(row):
+    micros = (row.pub_date - EPOCH) // timedelta(microseconds=1)
+    return f'{micros}-{row.post_id}'
+
+
+def decode_cursor(cursor):
+    """Дата и id поста из курсора; None, если курсор испорчен."""
+    try:
+        micros, post_id = map(int, cursor.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return EPOCH + timedelta(microseconds=micros), post_id
+
+
+def keyset_page(rows, cursor=None, size=TAG_PAGE_SIZE):
+    """Посты страницы ленты тега или упоминаний и курсор следующей.
+
+    rows — выборка PostTag или Mention. Страница берётся по индексу
+    (…, pub_date, post) строго после курсора, без OFFSET и без чтения
+    текстов постов; сами посты подгружаются одним запросом по id.
+    Посты скрытых авторов пропускаются.
+    """
+    rows = rows.order_by('-pub_date', '-post_id')
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        pub_date, post_id = position
+        rows = rows.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        )
+    rows = list(rows.only('pub_date', 'post_id')[:size + 1])
+    next_cursor = encode_cursor(rows[size - 1]) if len(rows) > size else None
+    posts = Post.objects.visible().select_related(
+        'author', 'group'
+    ).in_bulk([row.post_id for row in rows[:size]])
+    return [
+        posts[row.post_id] for row in rows[:size] if row.post_id in posts
+    ], next_cursor
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+from django.db.models.signals import post_save
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from ..models import Comment, Follow, Group, Post, User
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_changelists_available(self):
+        """Списки постов, комментариев и подписок открываются."""
+        for model in (Post, Comment, Follow, Group):
+            with self.subTest(model=model):
+                response = self.admin_client.get(reverse(
+                    f'admin:posts_{model._meta.model_name}_changelist'
+                ))
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def saved_posts(self):
+        """Посты, для которых за время теста отправлен post_save."""
+        saved = []
+
+        def receiver(sender, instance, **kwargs):
+            saved.append(instance.pk)
+
+        post_save.connect(receiver, sender=Post, weak=False)
+        self.addCleanup(post_save.disconnect, receiver, sender=Post)
+        return saved
+
+    def test_list_editable_saved_in_bulk(self):
+        """Изменённые в списке группы сохраняются одним bulk_update."""
+        saved = self.saved_posts()
+        data = {
+            'form-TOTAL_FORMS': len(self.posts),
+            'form-INITIAL_FORMS': len(self.posts),
+            '_save': 'Сохранить',
+        }
+        for index, post in enumerate(Post.objects.all()):
+            data[f'form-{index}-id'] = post.pk
+            data[f'form-{index}-group'] = self.group.pk
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'), data
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertEqual(
+            Post.objects.filter(group=self.group).count(), len(self.posts)
+        )
+        self.assertCountEqual(saved, [post.pk for post in self.posts])
+
+    def test_clear_group_action(self):
+        """Действие убирает посты из группы с сигналами сохранения."""
+        Post.objects.update(group=self.group)
+        saved = self.saved_posts()
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'clear_group',
+                '_selected_action': [post.pk for post in self.posts],
+            }
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+        self.assertCountEqual(saved, [post.pk for post in self.posts])
+
+    def test_delete_in_chunks_action(self):
+        """Действие удаляет выбранные посты пачками."""
+        response = self.admin_client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'delete_in_chunks',
+                '_selected_action': [post.pk for post in self.posts],
+            }
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertFalse(Post.objects.exists())
+
+    def test_estimated_paginator_counts_filtered_exactly(self):
+        """Выборка с фильтром считается точно."""
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(author=self.user), 10
+        )
+        self.assertEqual(paginator.count, len(self.posts))
@@ -0,0 +1,159 @@
+import threading
+from http import HTTPStatus
+
+from django import forms
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.autocomplete import CHANGE_KEY, PrefixIndex
+
+from ..autocomplete import INDEXES
+from ..deletion import schedule_deletion
+from ..forms import PostForm
+from ..models import Group, User
+
+
+class PrefixIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_search(self):
+        """Поиск по началу любого ключа, без повторов и с лимитом."""
+        entries = [
+            (1, ['leo', 'Лев Толстой'], 'leo'),
+            (2, ['lermontov', 'Лермонтов'], 'lermontov'),
+            (3, ['pushkin'], 'pushkin'),
+        ]
+        index = PrefixIndex('test', lambda: entries)
+        self.assertEqual(index.search('le'), ['leo', 'lermontov'])
+        self.assertEqual(index.search('ЛЕ'), ['leo', 'lermontov'])
+        self.assertEqual(index.search('le', limit=1), ['leo'])
+        self.assertEqual(index.search('x'), [])
+        self.assertEqual(index.search(''), [])
+        index.update(3, ['lenin'], 'lenin')
+        self.assertEqual(index.search('len'), ['lenin'])
+        self.assertEqual(index.search('push'), [])
+        index.remove(1)
+        self.assertEqual(index.search('le'), ['lenin', 'lermontov'])
+
+    def test_other_process_applies_changes(self):
+        """Копия другого процесса догоняет изменения без загрузчика."""
+        entries = [(1, ['leo'], 'leo'), (2, ['pushkin'], 'pushkin')]
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return entries
+
+        # Два индекса с одним именем — копии в двух процессах.
+        writer = PrefixIndex('test', loader)
+        reader = PrefixIndex('test', loader)
+        self.assertEqual(reader.search('le'), ['leo'])
+        writer.update(3, ['lenin'], 'lenin')
+        writer.remove(1)
+        loads.clear()
+        self.assertEqual(reader.search('le'), ['lenin'])
+        self.assertEqual(writer.search('le'), ['lenin'])
+        self.assertEqual(loads, [])
+        # Изменения нет в журнале: копия перестраивается загрузчиком.
+        writer.update(4, ['lermontov'], 'lermontov')
+        cache.delete(CHANGE_KEY.format('test', writer.version))
+        self.assertEqual(reader.search('le'), ['leo'])
+        self.assertEqual(loads, [1])
+
+    def test_loader_runs_without_lock(self):
+        """Поиск не ждёт, пока копия перестраивается загрузчиком."""
+        acquired = []
+
+        def try_lock():
+            if index.lock.acquire(timeout=1):
+                index.lock.release()
+                acquired.append(True)
+
+        def loader():
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return [(1, ['leo'], 'leo')]
+
+        index = PrefixIndex('test', loader)
+        self.assertEqual(index.search('le'), ['leo'])
+        self.assertEqual(acquired, [True])
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='leo')
+        User.objects.create_user(username='lermontov')
+        Group.objects.create(
+            title='Русская классика', slug='classic', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def results(self, kind, query):
+        response = self.client.get(
+            reverse('posts:autocomplete', args=(kind,)), {'q': query}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [item['label'] for item in response.json()['results']]
+
+    def test_endpoint(self):
+        """Пользователи и группы ищутся по началу имени и слов."""
+        self.assertEqual(self.results('users', 'le'), ['leo', 'lermontov'])
+        self.assertEqual(self.results('groups', 'клас'), ['Русская классика'])
+        self.assertEqual(self.results('groups', 'cla'), ['Русская классика'])
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:autocomplete', args=('posts',))
+            ).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+
+    def test_index_follows_writes(self):
+        """Индекс обновляется при записи и скрытии пользователей и групп."""
+        self.results('users', 'le')
+        User.objects.create_user(username='lenin')
+        self.assertEqual(
+            self.results('users', 'le'), ['lenin', 'leo', 'lermontov']
+        )
+        schedule_deletion(self.user)
+        self.assertEqual(self.results('users', 'le'), ['lenin', 'lermontov'])
+        group = Group.objects.get()
+        group.title = 'Поэзия'
+        group.save()
+        self.assertEqual(self.results('groups', 'клас'), [])
+        self.assertEqual(self.results('groups', 'поэ'), ['Поэзия'])
+
+    def test_form_switches_widget(self):
+        """С множеством групп PostForm не перечисляет их в <select>."""
+        self.assertIsInstance(PostForm().fields['group'].widget, forms.Select)
+        Group.objects.bulk_create([
+            Group(title=f'Группа {number}', slug=f'group-{number}',
+                  description='-')
+            for number in range(150)
+        ])
+        INDEXES['groups'].changed(fresh=False)
+        # После отката транзакции теста индекс перестроится заново.
+        self.addCleanup(INDEXES['groups'].changed, fresh=False)
+        form = PostForm()
+        self.assertIsInstance(
+            form.fields['group'], forms.models.ModelChoiceField
+        )
+        html = str(form['group'])
+        self.assertIn('data-autocomplete', html)
+        self.assertIn('js/autocomplete.js', str(form.media))
+        self.assertNotIn('Группа 1', html)
+        group = Group.objects.get(slug='group-7')
+        form = PostForm(data={'text': 'Пост', 'group': group.pk})
+        self.assertTrue(form.is_valid())
+        self.assertIn('Группа 7', str(form['group']))
+        for value in ('abc', '999999'):
+            with self.subTest(value=value):
+                form = PostForm(data={'text': 'Пост', 'group': value})
+                self.assertFalse(form.is_valid())
+                self.assertIn('value="" selected', str(form['group']))
@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..deletion import DELETION_LEASE, run_job, schedule_deletion
+from ..engagement import buffer, counters, like, with_pending
+from ..models import Comment, DeletionJob, Follow, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class DeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.create(author=cls.reader, text='Пост читателя')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='spammer')
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Спам {number}')
+            for number in range(4)
+        ]
+        self.image_post = Post.objects.create(
+            author=self.user,
+            text='Спам с картинкой',
+            image=SimpleUploadedFile('spam.gif', SMALL_GIF, 'image/gif'),
+        )
+        self.reader_comment = Comment.objects.create(
+            author=self.reader, post=self.posts[0], text='Ответ'
+        )
+        self.reader_post = Post.objects.get(author=self.reader)
+        Comment.objects.create(
+            author=self.user, post=self.reader_post, text='Спам'
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        Follow.objects.create(user=self.user, author=self.reader)
+
+    def test_content_hidden_immediately(self):
+        """После постановки в очередь записи пользователя не видны."""
+        self.client.get(reverse('posts:index'))
+        job = schedule_deletion(self.user)
+        self.assertEqual(job.status, DeletionJob.PENDING)
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [self.reader_post]
+        )
+        for url in (
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:post_detail', args=(self.posts[0].pk,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url).status_code, HTTPStatus.NOT_FOUND
+                )
+        response = self.client.get(
+            reverse('posts:post_detail', args=(self.reader_post.pk,))
+        )
+        self.assertNotContains(response, 'Спам</p>')
+        self.assertEqual(list(response.context['comments']), [])
+
+    def test_job_deletes_in_batches(self):
+        """Задание удаляет всё пачками и считает прогресс."""
+        image_path = self.image_post.image.path
+        job = run_job(schedule_deletion(self.user), batch_size=2)
+        self.assertEqual(job.status, DeletionJob.DONE)
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(
+            (job.posts_deleted, job.comments_deleted, job.follows_deleted),
+            (5, 1, 2),
+        )
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(os.path.exists(image_path))
+        self.reader_comment.refresh_from_db()
+        self.assertIsNone(self.reader_comment.post)
+
+    def test_likes_subtracted(self):
+        """Лайки удалённого пользователя вычитаются из чужих счётчиков."""
+        counters().clear()
+        buffer.dirty.clear()
+        like(self.user, self.reader_post)
+        buffer.flush(force=True)
+        like(self.reader, self.reader_post)
+        run_job(schedule_deletion(self.user), batch_size=1)
+        buffer.flush(force=True)
+        post = with_pending([Post.objects.get(pk=self.reader_post.pk)])[0]
+        self.assertEqual(post.likes_total, 1)
+        self.assertEqual(post.stats.likes, 1)
+
+    def test_deactivated_user_content_visible(self):
+        """Отключённый без удаления аккаунт не прячет свои записи."""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(
+            reverse('posts:profile', args=(self.user.username,))
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(self.posts[0], Post.objects.visible())
+
+    def test_running_job_not_taken_twice(self):
+        """Задание, которое уже выполняется, второй процесс пропускает."""
+        job = schedule_deletion(self.user)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status=DeletionJob.RUNNING, heartbeat=timezone.now()
+        )
+        self.assertIsNone(run_job(job))
+        self.assertTrue(Post.objects.filter(author=self.user).exists())
+        DeletionJob.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now() - DELETION_LEASE * 2
+        )
+        self.assertEqual(run_job(job).status, DeletionJob.DONE)
+
+    def test_command(self):
+        """Команда выполняет задания из очереди."""
+        schedule_deletion(self.user)
+        out = StringIO()
+        call_command('process_deletions', stdout=out)
+        self.assertIn('spammer: постов 5', out.getvalue())
+        self.assertFalse(
+            DeletionJob.objects.exclude(status=DeletionJob.DONE).exists()
+        )
@@ -0,0 +1,120 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import engagement
+from ..engagement import LIKES, VIEWS, buffer, counters, with_pending
+from ..models import Like, Post, PostStats, User
+
+
+class EngagementTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+        cls.other = Post.objects.create(author=cls.author, text='Ещё пост')
+
+    def setUp(self):
+        cache.clear()
+        counters().clear()
+        buffer.dirty.clear()
+        self.client.force_login(self.reader)
+
+    def totals(self, post):
+        post = with_pending([Post.objects.get(pk=post.pk)])[0]
+        return post.likes_total, post.views_total
+
+    def test_like_idempotent(self):
+        """Повторный лайк не меняет счётчик, снять можно один раз."""
+        like_url = reverse('posts:like', args=(self.post.pk,))
+        unlike_url = reverse('posts:unlike', args=(self.post.pk,))
+        for _ in range(2):
+            response = self.client.post(like_url)
+            self.assertRedirects(
+                response, reverse('posts:post_detail', args=(self.post.pk,))
+            )
+        self.assertEqual(Like.objects.count(), 1)
+        self.assertEqual(self.totals(self.post)[0], 1)
+        self.client.post(unlike_url)
+        self.client.post(unlike_url)
+        self.assertEqual(self.totals(self.post)[0], 0)
+        self.assertEqual(
+            self.client.get(like_url).status_code,
+            HTTPStatus.METHOD_NOT_ALLOWED,
+        )
+
+    def test_views_buffered(self):
+        """Просмотры копятся в кеше и видны до сброса в базу."""
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        for _ in range(3):
+            self.client.get(url)
+        self.assertFalse(PostStats.objects.exists())
+        self.assertEqual(self.totals(self.post), (0, 3))
+        buffer.flush(force=True)
+        self.assertEqual(PostStats.objects.get(post=self.post).views, 3)
+        self.assertEqual(self.totals(self.post), (0, 3))
+
+    def test_cached_page_views_counted(self):
+        """Просмотр страницы из кеша засчитывается без разбора адреса."""
+        client = Client()
+        url = reverse('posts:post_detail', args=(self.post.pk,))
+        client.get(url)
+        with mock.patch(
+            'django.urls.resolvers.URLResolver.resolve'
+        ) as resolve:
+            response = client.get(url)
+        resolve.assert_not_called()
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(self.totals(self.post), (0, 2))
+        self.assertFalse(PostStats.objects.exists())
+
+    def test_flush_coalesces_updates(self):
+        """Одинаковые приращения разных постов сбрасываются одним UPDATE."""
+        for post in (self.post, self.other):
+            buffer.add(VIEWS, post.pk, 2)
+        buffer.add(LIKES, self.post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(buffer.flush(force=True), 2)
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE')
+        ]
+        self.assertEqual(len(updates), 2)
+        for post, counts in ((self.post, (1, 2)), (self.other, (0, 2))):
+            with self.subTest(post=post.text):
+                stats = PostStats.objects.get(post=post)
+                self.assertEqual((stats.likes, stats.views), counts)
+        self.assertEqual(buffer.flush(force=True), 0)
+
+    def test_save_keeps_counters(self):
+        """Сохранение поста не затирает сброшенные счётчики."""
+        buffer.add(VIEWS, self.post.pk, 5)
+        post = Post.objects.get(pk=self.post.pk)
+        buffer.flush(force=True)
+        post.text = 'Правка'
+        post.save()
+        self.assertEqual(self.totals(self.post), (0, 5))
+
+    @mock.patch.object(engagement, '_flusher_pid', None)
+    @mock.patch.object(engagement, '_flusher_interval', 5)
+    @mock.patch('atexit.register')
+    @mock.patch('threading.Thread')
+    @mock.patch('os.getpid', return_value=100)
+    def test_flusher_started_per_process(self, getpid, thread, register):
+        """Поток сброса запускается при первом приращении в процессе."""
+        buffer.add(VIEWS, self.post.pk)
+        buffer.add(VIEWS, self.post.pk)
+        self.assertEqual(thread.call_count, 1)
+        # После fork у дочернего процесса другой pid и свой поток.
+        getpid.return_value = 101
+        buffer.add(VIEWS, self.post.pk)
+        self.assertEqual(thread.call_count, 2)
+        self.assertEqual(register.call_count, 2)
+        self.assertEqual(self.totals(self.post), (0, 3))
@@ -0,0 +1,108 @@
+import warnings
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class FeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_available(self):
+        """Ленты сайта, группы и автора отдают пост."""
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=(self.group.slug,)),
+            reverse('posts:group_atom', args=(self.group.slug,)),
+            reverse('posts:profile_rss', args=(self.user.username,)),
+            reverse('posts:profile_atom', args=(self.user.username,)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn(self.post.text, response.content.decode())
+
+    def test_non_ascii_feed_key(self):
+        """Лента автора с именем не на латинице кешируется без warnings."""
+        author = User.objects.create_user(username='Автор Ё')
+        Post.objects.create(author=author, text='Пост автора')
+        url = reverse('posts:profile_rss', args=(author.username,))
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', CacheKeyWarning)
+            self.assertContains(self.client.get(url), 'Пост автора')
+            self.assertContains(self.client.get(url), 'Пост автора')
+        self.assertFalse([
+            warning for warning in caught
+            if issubclass(warning.category, CacheKeyWarning)
+        ])
+
+    def test_unknown_group_feed(self):
+        """Лента несуществующей группы выдаёт 404."""
+        response = self.client.get(reverse('posts:group_rss', args=('no',)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        url = reverse('posts:index_rss')
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_feed_reset_after_new_post(self):
+        """Новый пост сразу попадает в закешированную ленту."""
+        url = reverse('posts:index_rss')
+        self.client.get(url)
+        Post.objects.create(author=self.user, text='Свежий пост')
+        response = self.client.get(url)
+        self.assertIn('Свежий пост', response.content.decode())
+
+    def test_feed_reset_after_group_change(self):
+        """Перенесённый пост пропадает из закешированной ленты группы."""
+        url = reverse('posts:group_rss', args=(self.group.slug,))
+        self.client.get(url)
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = Group.objects.create(
+            title='Другая группа', slug='other', description='-'
+        )
+        post.save()
+        self.assertNotIn(
+            self.post.text, self.client.get(url).content.decode()
+        )
+
+    def test_feed_reset_after_rename(self):
+        """Новые имена автора и группы сразу видны в лентах."""
+        group_url = reverse('posts:group_rss', args=(self.group.slug,))
+        index_url = reverse('posts:index_rss')
+        self.client.get(group_url)
+        self.client.get(index_url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.user.first_name = 'Лев'
+        self.user.save()
+        self.assertIn(
+            'Новое название', self.client.get(group_url).content.decode()
+        )
+        self.assertIn('Лев', self.client.get(index_url).content.decode())
+        self.assertIn('Лев', self.client.get(group_url).content.decode())
@@ -0,0 +1,135 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from api.models import Change
+from core.group_commit import GroupCommit, Waiter
+
+from ..models import Comment, Follow, Post, User
+
+THREADS = 6
+
+
+class GroupCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='NoName')
+        self.readers = [
+            User.objects.create_user(username=f'reader-{number}')
+            for number in range(THREADS)
+        ]
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def run_threads(self, committer, objs):
+        results = [None] * len(objs)
+        start = threading.Barrier(len(objs))
+
+        def worker(number):
+            start.wait()
+            results[number] = committer.save(objs[number])
+            connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(number,))
+            for number in range(len(objs))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_comments_batched(self):
+        """Одновременные комментарии пишутся пачкой и получают ключи."""
+        committer = GroupCommit(Comment, max_delay=0.5, max_batch=THREADS)
+        objs = [
+            Comment(post=self.post, author=reader, text=f'**{reader}**')
+            for reader in self.readers
+        ]
+        self.assertEqual(self.run_threads(committer, objs), [True] * THREADS)
+        stored = dict(Comment.objects.values_list('pk', 'author_id'))
+        self.assertEqual(
+            stored, {comment.pk: comment.author_id for comment in objs}
+        )
+        # Сигналы отработали для каждой строки, как при save().
+        self.assertEqual(
+            set(Change.objects.filter(model='comment').values_list(
+                'object_id', flat=True
+            )),
+            set(stored),
+        )
+        self.assertIn('<strong>', Comment.objects.first().text_html)
+
+    def test_follows_deduplicated(self):
+        """Повторная подписка в той же пачке или из базы не вставляется."""
+        reader = self.readers[0]
+        Follow.objects.create(user=reader, author=self.author)
+        committer = GroupCommit(
+            Follow, unique=('user_id', 'author_id'), max_delay=0.5,
+            max_batch=3,
+        )
+        objs = [
+            Follow(user=reader, author=self.author),
+            Follow(user=self.readers[1], author=self.author),
+            Follow(user=self.readers[1], author=self.author),
+        ]
+        self.assertEqual(
+            sorted(self.run_threads(committer, objs)), [False, False, True]
+        )
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_single_writer_not_delayed(self):
+        """После пачки из одной строки ведущий не ждёт MAX_DELAY."""
+        committer = GroupCommit(Comment, max_delay=0.5)
+        committer.save(Comment(post=self.post, author=self.author, text='1'))
+        started = time.monotonic()
+        committer.save(Comment(post=self.post, author=self.author, text='2'))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_interrupted_leader_wakes_waiters(self):
+        """Прерванный ведущий всё равно будит ожидающих с ошибкой."""
+        committer = GroupCommit(Comment)
+        batch = [
+            Waiter(Comment(post=self.post, author=reader, text='Текст'))
+            for reader in self.readers[:2]
+        ]
+        with mock.patch.object(
+            committer, 'insert', side_effect=KeyboardInterrupt
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                committer.commit(batch)
+        for waiter in batch:
+            with self.subTest(waiter=waiter):
+                self.assertTrue(waiter.event.is_set())
+                self.assertIsInstance(waiter.error, RuntimeError)
+
+
+class GroupCommitViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_views(self):
+        """Внутри транзакции строки сохраняются сразу, без ожидания."""
+        self.client.post(
+            reverse('posts:add_comment', args=(self.post.pk,)),
+            {'text': 'Комментарий'},
+        )
+        self.assertTrue(Comment.objects.filter(text='Комментарий').exists())
+        url = reverse('posts:profile_follow', args=(self.author.username,))
+        self.client.get(url)
+        self.client.get(url)
+        self.assertEqual(Follow.objects.count(), 1)
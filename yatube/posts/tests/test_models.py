@@ -1,5 +1,10 @@
+import threading
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase
 
 from ..models import Group, Post
 
@@ -34,3 +39,27 @@ class PostModelTest(TestCase):
         for value, expected in models:
             with self.subTest(value=value):
                 self.assertEqual(value, expected)
+
+
+class PostSaveTransactionTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='auth')
+
+    def test_post_save_sees_committed_row(self):
+        """Обработчики post_save видят пост уже записанным для всех."""
+        seen = []
+
+        def check(sender, instance, **kwargs):
+            def read():
+                seen.append(Post.objects.filter(pk=instance.pk).exists())
+                connection.close()
+
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+
+        post_save.connect(check, sender=Post)
+        self.addCleanup(post_save.disconnect, check, sender=Post)
+        Post.objects.create(author=self.user, text='Тестовый пост')
+        self.assertEqual(seen, [True])
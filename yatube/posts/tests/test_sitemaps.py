@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import Group, Post, User
+
+TEMP_SITEMAP_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(SITEMAP_ROOT=TEMP_SITEMAP_ROOT)
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(3):
+            Post.objects.create(author=cls.user, text=f'Пост {number}')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        patcher = mock.patch('posts.sitemaps.SITEMAP_CHUNK_SIZE', 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        call_command('build_sitemaps', '--full', stdout=open(os.devnull, 'w'))
+
+    def test_chunks_and_index(self):
+        """Посты разбиты на файлы, индекс ссылается на каждый."""
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        index = b''.join(response.streaming_content).decode()
+        for name in ('posts-0.xml', 'posts-1.xml', 'groups-0.xml',
+                     'profiles-0.xml'):
+            with self.subTest(name=name):
+                self.assertIn(f'/sitemaps/{name}', index)
+        response = self.client.get('/sitemaps/posts-1.xml')
+        chunk = b''.join(response.streaming_content).decode()
+        self.assertEqual(chunk.count('<url>'), 1)
+
+    def test_only_tail_rebuilt(self):
+        """Новый пост переписывает только последний файл."""
+        first = os.path.join(TEMP_SITEMAP_ROOT, 'posts-0.xml')
+        os.remove(first)
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        call_command('build_sitemaps', stdout=open(os.devnull, 'w'))
+        self.assertFalse(os.path.exists(first))
+        with open(os.path.join(TEMP_SITEMAP_ROOT, 'posts-1.xml')) as tail:
+            self.assertIn(f'/posts/{post.id}/', tail.read())
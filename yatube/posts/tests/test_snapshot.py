@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.metrics import registry
+from core.models import DirtyPath
+from core.snapshot import SnapshotRenderer, flush_dirty
+
+from ..engagement import VIEWS, buffer, counters, with_pending
+from ..models import Comment, Group, Post, User
+
+TEMP_SNAPSHOT_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(SNAPSHOT_ROOT=TEMP_SNAPSHOT_ROOT)
+class SnapshotTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, text='Тестовый пост', group=cls.group
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SNAPSHOT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def snapshot(self, *args):
+        call_command('snapshot_site', *args, stdout=open(os.devnull, 'w'))
+
+    def read(self, *parts):
+        path = os.path.join(TEMP_SNAPSHOT_ROOT, *parts, 'index.html')
+        with open(path, encoding='utf-8') as page:
+            return page.read()
+
+    def test_full_snapshot(self):
+        """Команда сохраняет главную, группу, профиль и пост."""
+        self.snapshot()
+        self.assertIn(self.post.text, self.read())
+        self.assertIn(self.post.text, self.read('group', self.group.slug))
+        self.assertIn(self.post.text, self.read('profile', 'NoName'))
+        self.assertIn(self.post.text, self.read('posts', str(self.post.id)))
+
+    def test_snapshot_not_counted(self):
+        """Отрисовка копий не считается просмотрами и трафиком."""
+        counters().clear()
+        buffer.dirty.clear()
+
+        def requests():
+            return sum(
+                value for name, _, value in registry.collect()
+                if name == 'yatube_request_duration_seconds_count'
+            )
+
+        before = requests()
+        self.snapshot()
+        self.assertEqual(requests(), before)
+        self.assertNotIn((VIEWS, self.post.pk), buffer.dirty)
+        post = with_pending([Post.objects.get(pk=self.post.pk)])[0]
+        self.assertEqual(post.views_total, 0)
+
+    def test_dirty_pages_rebuilt(self):
+        """Комментарий ставит страницу поста в очередь на перестроение."""
+        self.snapshot()
+        Comment.objects.create(
+            author=self.user, post=self.post, text='Новый комментарий'
+        )
+        self.assertTrue(
+            DirtyPath.objects.filter(path=f'/posts/{self.post.id}/').exists()
+        )
+        self.snapshot('--dirty')
+        self.assertIn(
+            'Новый комментарий', self.read('posts', str(self.post.id))
+        )
+        self.assertFalse(DirtyPath.objects.exists())
+
+    def test_feed_pages_saved(self):
+        """Кроме первой сохраняются и следующие страницы лент."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Пост {number}', group=self.group)
+            for number in range(12)
+        ])
+        self.snapshot()
+        self.assertIn(self.post.text, self.read('page', '2'))
+        self.assertIn(
+            self.post.text, self.read('group', self.group.slug, 'page', '2')
+        )
+
+    def test_failed_render_keeps_queue(self):
+        """Страница остаётся в очереди, пока её копия не записана."""
+        self.snapshot()
+        group = Group.objects.create(title='Группа', slug='other')
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = group
+        post.save()
+        old_group = f'/group/{self.group.slug}/'
+        self.assertTrue(DirtyPath.objects.filter(path=old_group).exists())
+        with mock.patch.object(
+            SnapshotRenderer, 'write', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                flush_dirty()
+        self.assertTrue(DirtyPath.objects.filter(path=old_group).exists())
+        self.snapshot('--dirty')
+        self.assertNotIn(self.post.text, self.read('group', self.group.slug))
+        self.assertFalse(DirtyPath.objects.exists())
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Mention, Post, PostTag, Tag, User
+from ..tags import extract_mentions, extract_tags, keyset_page
+
+
+class ExtractTests(TestCase):
+    def test_extract(self):
+        """Теги приводятся к нижнему регистру, точка после имени — нет."""
+        text = 'Про #Django и #python_3, #django! Спасибо @leo. и @ann_1'
+        self.assertEqual(extract_tags(text), {'django', 'python_3'})
+        self.assertEqual(extract_mentions(text), {'leo', 'ann_1'})
+        self.assertEqual(extract_tags('a#b &#39; ##'), set())
+        self.assertEqual(extract_mentions('mail@example.com'), set())
+
+
+class TagPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='NoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, text=f'Пост {number} #Тест @reader'
+            )
+            for number in range(13)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_indexed_on_save(self):
+        """Теги и упоминания пишутся при сохранении и правке поста."""
+        tag = Tag.objects.get()
+        self.assertEqual(tag.name, 'тест')
+        self.assertEqual(PostTag.objects.filter(tag=tag).count(), 13)
+        self.assertEqual(Mention.objects.filter(user=self.reader).count(), 13)
+        post = self.posts[0]
+        post.text = 'Без тегов, но для @NoName'
+        post.save()
+        self.assertFalse(post.post_tags.exists())
+        self.assertFalse(post.mentions.exists())
+
+    def test_tag_feed_keyset(self):
+        """Лента тега листается курсором от новых к старым."""
+        url = reverse('posts:tag', args=('ТЕСТ',))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        first = response.context['posts']
+        self.assertEqual(first, self.posts[:-11:-1])
+        response = self.client.get(
+            url, {'before': response.context['next_cursor']}
+        )
+        self.assertEqual(response.context['posts'], self.posts[2::-1])
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            self.client.get(reverse('posts:tag', args=('нет',))).status_code,
+            HTTPStatus.NOT_FOUND,
+        )
+
+    def test_same_pub_date(self):
+        """Посты с одной датой не теряются на границе страниц."""
+        pub_date = self.posts[0].pub_date
+        PostTag.objects.update(pub_date=pub_date)
+        seen = []
+        cursor = None
+        while True:
+            posts, cursor = keyset_page(
+                PostTag.objects.all(), cursor, size=4
+            )
+            seen += posts
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.posts[::-1])
+
+    def test_mentions_inbox(self):
+        """Упоминания видит только упомянутый пользователь."""
+        url = reverse('posts:mentions')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['posts']), 10)
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).context['posts'], [])
+
+    def test_command(self):
+        """Команда разбирает посты, сохранённые без тегов."""
+        PostTag.objects.all().delete()
+        call_command('index_tags', stdout=StringIO())
+        self.assertEqual(PostTag.objects.count(), 13)
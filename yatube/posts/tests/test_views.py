@@ -1,13 +1,18 @@
 import shutil
 import tempfile
+from io import StringIO
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.shortcuts import render
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from core.paginator import FeedPaginator
 from ..models import Comment, Follow, Group, Post, User
 
 TEMP_NUMB_FIRST_PAGE = 10
@@ -35,6 +40,8 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        # Списки лент в кеше не откатываются вместе с транзакцией теста.
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostPagesTests.user)
 
@@ -334,6 +341,91 @@ class PostMediaTests(TestCase):
         expected = response.context['post']
         self.assertEqual(expected.image, self.post.image)
 
+    def test_image_preview_saved(self):
+        """Размеры и заглушка картинки сохраняются при загрузке."""
+        self.assertEqual(
+            (self.post.image_width, self.post.image_height), (2, 1)
+        )
+        self.assertTrue(
+            self.post.image_placeholder.startswith('data:image/jpeg;base64,')
+        )
+
+    def test_image_lazy_with_placeholder(self):
+        """Картинка грузится лениво поверх заглушки."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="2" height="1"')
+        self.assertContains(response, self.post.image_placeholder)
+
+    def test_thumbnail_manifest_built_on_upload(self):
+        """Миниатюра строится при загрузке и берётся из манифеста."""
+        self.assertIn('960x339 crop=center upscale=True',
+                      self.post.thumbnail_manifest)
+        with mock.patch('core.thumbnails.get_thumbnail') as get_thumbnail:
+            response = self.authorized_client.get(
+                reverse('posts:profile', args=(self.user.username,))
+            )
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, 'width="2" height="1"')
+
+    def test_thumbnail_manifest_filled_on_miss(self):
+        """При промахе миниатюра строится через sorl и дописывается."""
+        Post.objects.filter(pk=self.post.pk).update(thumbnail_manifest='')
+        cache.clear()
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertContains(response, 'width="2" height="1"')
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).thumbnail_manifest,
+            self.post.thumbnail_manifest,
+        )
+
+    def test_unreadable_image_read_once(self):
+        """Нечитаемая картинка не перечитывается при каждом сохранении."""
+        post = Post.objects.get(pk=self.post.pk)
+        with mock.patch('posts.models.image_preview', return_value=None):
+            post.image_width = None
+            post.save()
+        self.assertEqual((post.image_width, post.image_height), (0, 0))
+        with mock.patch('posts.models.image_preview') as image_preview:
+            post.text = 'Новый текст'
+            post.save()
+        image_preview.assert_not_called()
+
+    def test_group_page_uses_stored_size(self):
+        """Лента группы рисует картинку с сохранёнными размерами."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertContains(response, 'width="2" height="1"')
+        self.assertContains(response, self.post.image_placeholder)
+
+    def test_failed_thumbnail_not_retried(self):
+        """Неудачная миниатюра запоминается и больше не строится."""
+        Post.objects.filter(pk=self.post.pk).update(thumbnail_manifest='')
+        cache.clear()
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        with mock.patch(
+            'core.thumbnails.get_thumbnail', side_effect=OSError
+        ) as get_thumbnail, self.assertLogs('core.thumbnails', 'ERROR'):
+            self.authorized_client.get(url)
+            response = self.authorized_client.get(url)
+        get_thumbnail.assert_called_once()
+        self.assertNotContains(response, 'loading="lazy"')
+
+    def test_fill_image_previews(self):
+        """Команда заполняет заглушки постов, загруженных раньше."""
+        Post.objects.filter(pk=self.post.pk).update(
+            image_width=None, image_height=None, image_placeholder=''
+        )
+        call_command('fill_image_previews', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.image_width, 2)
+        self.assertEqual(post.image_placeholder, self.post.image_placeholder)
+
 
 class PaginatorViewsTest(TestCase):
     @classmethod
@@ -358,3 +450,175 @@ class PaginatorViewsTest(TestCase):
         response = self.authorized_client.get(reverse('posts:index'))
         expected = list(Post.objects.all()[:10])
         self.assertEqual(list(response.context['page_obj']), expected)
+
+    def test_count_reset_after_new_post(self):
+        """Число записей в ленте обновляется после публикации поста."""
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        count = response.context['page_obj'].paginator.count
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, count + 1
+        )
+
+    def test_count_reset_after_group_change(self):
+        """Перенос поста в другую группу обновляет число в обеих группах."""
+        cache.clear()
+        self.client.force_login(self.author)
+        other = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='-'
+        )
+        counts = {}
+        for group in (self.group, other):
+            response = self.client.get(
+                reverse('posts:group_list', args=(group.slug,))
+            )
+            counts[group] = response.context['page_obj'].paginator.count
+        post = Post.objects.filter(group=self.group).first()
+        post.group = other
+        post.save()
+        for group, delta in ((self.group, -1), (other, 1)):
+            with self.subTest(group=group.slug):
+                response = self.client.get(
+                    reverse('posts:group_list', args=(group.slug,))
+                )
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count,
+                    counts[group] + delta,
+                )
+
+    def test_elided_page_range(self):
+        """Длинная лента показывает сокращённый список страниц."""
+        paginator = FeedPaginator(list(range(200)), POSTS_PER_PAGE)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(10)),
+            [1, '…', 8, 9, 10, 11, 12, '…', 20]
+        )
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_cached_until_write(self):
+        """Страница поста кешируется для анонима до нового комментария."""
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+        Comment.objects.create(
+            author=self.user, post=self.post, text='Комментарий'
+        )
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Комментарий')
+
+    def test_write_during_render_not_cached(self):
+        """Страница, во время отрисовки которой сброшен тег, не кешируется."""
+        url = reverse('posts:post_detail', args=(self.post.id,))
+
+        def write_while_rendering(*args, **kwargs):
+            response = render(*args, **kwargs)
+            Comment.objects.create(
+                author=self.user, post=self.post, text='Комментарий'
+            )
+            return response
+
+        with mock.patch('posts.views.render', write_while_rendering):
+            self.assertEqual(self.client.get(url)['X-Page-Cache'], 'stale')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Комментарий')
+
+    def test_group_change_resets_old_group(self):
+        """Перенос поста сбрасывает страницу группы, откуда он ушёл."""
+        group = Group.objects.create(
+            title='Группа', slug='old', description=''
+        )
+        post = Post.objects.create(
+            author=self.user, text='Переносимый пост', group=group
+        )
+        url = reverse('posts:group_list', args=(group.slug,))
+        self.client.get(url)
+        post.group = None
+        post.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, 'Переносимый пост')
+
+    def test_authorized_page_not_served_from_cache(self):
+        """Авторизованный пользователь не получает страницу из кеша."""
+        self.client.get(reverse('posts:index'))
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('posts:index'))
+        self.assertNotEqual(response.get('X-Page-Cache'), 'hit')
+        self.assertIn('page_obj', response.context)
+
+    def test_authorized_render_not_cached(self):
+        """Страница вошедшего автора полная и не попадает в общий кеш."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:post_detail', args=(self.post.id,))
+        response = client.get(url)
+        self.assertContains(response, 'редактировать запись')
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertNotIn('X-Page-Cache', response)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertNotContains(response, 'редактировать запись')
+
+
+class FragmentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='NoName')
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_fragments_for_user(self):
+        """Дырки заполняются данными текущего пользователя."""
+        response = self.authorized_client.get(reverse('fragments'), {
+            'path': reverse('posts:index'),
+            'h': [
+                'header',
+                f'following:{self.author.username}',
+                f'post_actions:{self.post.id}',
+                'unknown',
+            ],
+        })
+        data = response.json()
+        self.assertIn(self.user.username, data['header'])
+        self.assertIn('Отписаться', data[f'following:{self.author}'])
+        self.assertIn('редактировать запись',
+                      data[f'post_actions:{self.post.id}'])
+        self.assertNotIn('unknown', data)
+
+    def test_fragments_empty_for_anonymous(self):
+        """Аноним получает пустой ответ: запасное содержимое уже на месте."""
+        response = self.client.get(reverse('fragments'), {'h': 'header'})
+        self.assertEqual(response.json(), {})
+
+    def test_page_contains_holes(self):
+        """Аноним получает дырки, вошедший — уже заполненные фрагменты."""
+        url = reverse('posts:profile', args=(self.author.username,))
+        response = self.client.get(url)
+        self.assertContains(response, 'data-hole="header"')
+        self.assertContains(response, f'data-hole="following:{self.author}"')
+        self.assertNotIn(settings.SESSION_MARKER_COOKIE, response.cookies)
+        response = self.authorized_client.get(url)
+        self.assertNotContains(response, 'data-hole=')
+        self.assertContains(response, 'Отписаться')
+        self.assertIn(settings.SESSION_MARKER_COOKIE, response.cookies)
@@ -1,21 +1,44 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.views.decorators.http import require_GET, require_POST
+
+from archive.archiving import (ArchiveChain, archived_count,
+                               get_archived_post_or_404)
+from core.page_cache import tag_response
+from core.paginator import FeedPaginator
+from core.timeline import Timeline
+from core.uploads import (finish_upload, streaming_uploads, upload_files,
+                          validate_uploads)
+
+from .autocomplete import INDEXES
+from .engagement import like, unlike, with_pending
 from .forms import CommentForm, PostForm
-from .models import Follow, Group, Post, User
+from .models import (Follow, Group, Mention, Post, PostTag, Tag, User,
+                     pending_deletion, visible_users)
+from .tags import keyset_page
+from .writes import comments, follows
 
 
 User = get_user_model()
 POSTS_PER_PAGE = 10
 
 
+def get_page(request, post_list, count_key=None, use_timeline=True):
+    timeline = None
+    if count_key is not None and use_timeline:
+        timeline = Timeline(count_key, post_list)
+    paginator = FeedPaginator(
+        post_list, POSTS_PER_PAGE, count_key=count_key, timeline=timeline
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
 def index(request):
-    all_posts = Post.objects.select_related('author', 'group')
-    paginator = Paginator(all_posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    all_posts = Post.objects.visible().select_related('author', 'group')
+    page_obj = get_page(request, all_posts, 'index')
+    tag_response(request, 'index')
     context = {
         'page_obj': page_obj,
         'title': 'Последние обновления',
@@ -25,10 +48,9 @@ def index(request):
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('author')
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.visible().select_related('author')
+    page_obj = get_page(request, posts, f'group:{group.pk}')
+    tag_response(request, f'group:{group.pk}')
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -37,52 +59,92 @@ def group_posts(request, slug):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(visible_users(), username=username)
     post_list = author.posts.select_related('group')
-    post_count = post_list.count()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = (request.user.is_authenticated
-                 and request.user.follower.filter(author=author).exists())
+    # Глубокие страницы авторов со старыми постами дочитываются из архива.
+    archived = archived_count(author)
+    if archived:
+        post_list = ArchiveChain(post_list, author, archived)
+    page_obj = get_page(
+        request, post_list, f'author:{author.pk}', use_timeline=not archived
+    )
+    tag_response(request, f'author:{author.pk}')
     context = {
         'author': author,
-        'following': following,
         'page_obj': page_obj,
-        'post_count': post_count,
+        'post_count': page_obj.paginator.count,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.select_related('group', 'author'),
+    post = Post.objects.visible().select_related('group', 'author').filter(
         id=post_id
-    )
+    ).first()
+    if post is not None:
+        comments = post.comments.exclude(author_id__in=pending_deletion())
+    else:
+        post = get_archived_post_or_404(post_id)
+        comments = post.archived_comments
+    with_pending([post])
     author = post.author
-    form = CommentForm(request.POST or None)
-    comments = post.comments.all()
-    post_count = post.author.posts.count()
+    post_count = author.posts.count() + archived_count(author)
+    tag_response(request, f'post:{post.pk}', f'author:{post.author_id}')
     context = {
         'author': author,
         'post': post,
-        'form': form,
         'comments': comments,
-        'post_count': post_count
+        'post_count': post_count,
+        'form': CommentForm(),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = keyset_page(
+        PostTag.objects.filter(tag=tag), request.GET.get('before')
+    )
+    context = {
+        'tag': tag,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/tag.html', context)
+
+
+@login_required
+def mentions(request):
+    posts, next_cursor = keyset_page(
+        Mention.objects.filter(user=request.user), request.GET.get('before')
+    )
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/mentions.html', context)
+
+
+@require_GET
+def autocomplete(request, kind):
+    if kind not in INDEXES:
+        raise Http404('Нет такого индекса')
+    results = INDEXES[kind].search(request.GET.get('q', ''))
+    return JsonResponse({'results': results})
+
+
 @login_required
+@streaming_uploads
 def post_create(request):
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None,
+        files=upload_files(request),
     )
-    if form.is_valid():
+    if validate_uploads(request, form):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        finish_upload(request)
         return redirect('posts:profile', request.user)
     context = {
         'form': form,
@@ -92,21 +154,23 @@ def post_create(request):
 
 
 @login_required
+@streaming_uploads
 def post_edit(request, post_id):
     is_edit = True
     post = get_object_or_404(
         Post.objects.select_related('group', 'author'),
         id=post_id
     )
+    if request.user.id != post.author.id:
+        return redirect('posts:post_detail', post.id)
     form = PostForm(
         request.POST or None,
         instance=post,
-        files=request.FILES or None,
+        files=upload_files(request),
     )
-    if request.user.id != post.author.id:
-        return redirect('posts:post_detail', post.id)
-    if form.is_valid():
+    if validate_uploads(request, form):
         form.save()
+        finish_upload(request)
         return redirect('posts:post_detail', post.id)
     context = {
         'form': form,
@@ -124,7 +188,21 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        comments.save(comment)
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@require_POST
+@login_required
+def like_post(request, post_id):
+    like(request.user, get_object_or_404(Post.objects.visible(), pk=post_id))
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@require_POST
+@login_required
+def unlike_post(request, post_id):
+    unlike(request.user, get_object_or_404(Post, pk=post_id))
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -133,12 +211,10 @@ def follow_index(request):
     follower = Follow.objects.filter(user=request.user).values_list(
         'author_id', flat=True
     )
-    post_list = Post.objects.select_related('author').filter(
+    post_list = Post.objects.visible().select_related('author').filter(
         author_id__in=follower
     )
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page(request, post_list)
     context = {
         'page_obj': page_obj,
     }
@@ -149,7 +225,7 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        follows.save(Follow(user=request.user, author=author))
     return redirect('posts:profile', username=username)
 
 
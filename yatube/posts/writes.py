@@ -0,0 +1,9 @@
+from core.group_commit import GroupCommit
+
+from .models import Comment, Follow
+
+# Комментарии и подписки во время прямых эфиров приходят сотнями в
+# секунду; каждая запись отдельной транзакцией упирается в блокировку
+# SQLite, поэтому они копятся и фиксируются пачками.
+comments = GroupCommit(Comment)
+follows = GroupCommit(Follow, unique=('user_id', 'author_id'))
@@ -0,0 +1,28 @@
+// Поиск вариантов для <select data-autocomplete> (core.widgets).
+(function () {
+  document.querySelectorAll('select[data-autocomplete]').forEach(function (select) {
+    var input = document.createElement('input');
+    var timer = null;
+    input.type = 'search';
+    input.className = 'form-control mb-2';
+    input.placeholder = 'Начните вводить название';
+    select.parentNode.insertBefore(input, select);
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        fetch(select.dataset.autocomplete + '?q=' + encodeURIComponent(input.value))
+          .then(function (response) { return response.json(); })
+          .then(function (data) {
+            var current = select.value;
+            Array.from(select.options).forEach(function (option) {
+              if (option.value && option.value !== current) option.remove();
+            });
+            data.results.forEach(function (item) {
+              if (String(item.id) === current) return;
+              select.add(new Option(item.label, item.id));
+            });
+          });
+      }, 150);
+    });
+  });
+})();
@@ -0,0 +1,25 @@
+// Подставляет персональные фрагменты в дырки закешированной страницы.
+// Адрес фрагментов и имя cookie-маркера сессии — в data-атрибутах тега.
+(function () {
+  var script = document.currentScript;
+  var holes = document.querySelectorAll('[data-hole]');
+  var marker = script.dataset.marker + '=';
+  var session = document.cookie.split('; ').some(function (cookie) {
+    return cookie.indexOf(marker) === 0;
+  });
+  // Аноним уже видит запасное содержимое дырок.
+  if (!holes.length || !session || !window.fetch) return;
+  var query = ['path=' + encodeURIComponent(location.pathname)];
+  holes.forEach(function (hole) {
+    query.push('h=' + encodeURIComponent(hole.dataset.hole));
+  });
+  fetch(script.dataset.fragments + '?' + query.join('&'), {credentials: 'same-origin'})
+    .then(function (response) { return response.json(); })
+    .then(function (fragments) {
+      holes.forEach(function (hole) {
+        if (hole.dataset.hole in fragments) {
+          hole.innerHTML = fragments[hole.dataset.hole];
+        }
+      });
+    });
+})();
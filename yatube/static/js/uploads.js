@@ -0,0 +1,53 @@
+// Докачка больших картинок по кускам (core.uploads).
+(function () {
+  var CHUNK = 1024 * 1024;
+  document.querySelectorAll('input[type=file][data-chunked]').forEach(function (input) {
+    var hidden = input.form.querySelector('input[name=upload]');
+    var submit = input.form.querySelector('[type=submit]');
+    function request(method, url, headers, body) {
+      headers['X-CSRFToken'] = input.dataset.csrf;
+      return fetch(url, {method: method, headers: headers, body: body, credentials: 'same-origin'})
+        .then(function (response) {
+          return response.json().then(function (data) {
+            if (response.status >= 500) throw data;
+            return data;
+          });
+        });
+    }
+    function resume(file, url, retries) {
+      // Обрыв связи: спрашиваем, что дошло, и продолжаем оттуда.
+      if (!retries) return Promise.reject(new Error('Связь потеряна, загрузка прервана.'));
+      return new Promise(function (resolve) { setTimeout(resolve, 1000); })
+        .then(function () { return request('GET', url, {}); })
+        .then(function (state) { return send(file, state, retries - 1); },
+              function () { return resume(file, url, retries - 1); });
+    }
+    function send(file, state, retries) {
+      if (state.offset >= state.length) return Promise.resolve(state);
+      var chunk = file.slice(state.offset, state.offset + CHUNK);
+      return request('PATCH', state.url, {'Upload-Offset': state.offset}, chunk)
+        .then(function (next) {
+          // Ошибка без продвижения — отказ; иначе сервер назвал позицию.
+          if (next.error && next.offset === state.offset) throw new Error(next.error);
+          return send(file, next, 5);
+        }, function () { return resume(file, state.url, retries); });
+    }
+    input.addEventListener('change', function () {
+      var file = input.files[0];
+      hidden.value = '';
+      if (!file || file.size <= CHUNK || !window.fetch) return;
+      submit.disabled = true;
+      request('POST', input.dataset.chunked, {'Upload-Length': file.size})
+        .then(function (state) {
+          if (state.error) throw new Error(state.error);
+          return send(file, state, 5);
+        })
+        .then(function (state) {
+          hidden.value = state.token;
+          input.value = '';
+        })
+        .catch(function (error) { alert(error.message); input.value = ''; })
+        .then(function () { submit.disabled = false; });
+    });
+  });
+})();
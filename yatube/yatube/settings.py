@@ -40,6 +40,8 @@ INSTALLED_APPS = [
     'posts.apps.PostsConfig',
     'about.apps.AboutConfig',
     'core.apps.CoreConfig',
+    'api.apps.ApiConfig',
+    'archive.apps.ArchiveConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -50,11 +52,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.PostViewsMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.SessionMarkerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,13 +92,23 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.db — sqlite3 с WAL и прагмами для одновременной работы; с
+# CONN_MAX_AGE подключение потока переиспользуется между запросами.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+    },
+    'archive': {
+        'ENGINE': 'core.db',
+        'NAME': os.path.join(BASE_DIR, 'archive.sqlite3'),
+        'CONN_MAX_AGE': 60,
+    },
 }
 
+DATABASE_ROUTERS = ['archive.routers.ArchiveRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -139,10 +156,85 @@ LOGOUT_REDIRECT_URL = 'posts:index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Предел размера картинки поста (core.uploads): больший файл бросается
+# на лету, не дожидаясь конца загрузки.
+IMAGE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+
 CACHES = {
     'default': {
+        'BACKEND': 'core.cache.TwoTierCache',
+        'OPTIONS': {
+            'SHARED_ALIAS': 'shared',
+            'LOCAL_MAX_ENTRIES': 1000,
+            'LOCAL_TIMEOUT': 5,
+        },
+    },
+    'shared': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    # Здесь — память процесса: при нескольких рабочих процессах каждый
+    # видит только свои несброшенные приращения. В продакшене укажите
+    # memcached, чтобы буфер был общим.
+    'engagement': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'engagement',
+    },
 }
 
+# Буфер лайков и просмотров (posts.engagement): кеш с атомарными incr
+# и decr. Локальный уровень TwoTierCache для него не подходит.
+ENGAGEMENT_CACHE = 'engagement'
+
+SITEMAP_ROOT = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_BASE_URL = 'http://localhost:8000'
+
+SNAPSHOT_ROOT = os.path.join(BASE_DIR, 'snapshot')
+SNAPSHOT_HOST = 'localhost'
+
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+# /metrics отдаётся сотрудникам и по заголовку
+# «Authorization: Bearer <METRICS_TOKEN>»; адрес клиента не проверяется:
+# за прокси на том же хосте все запросы приходят с 127.0.0.1. Пустой
+# токен оставляет доступ только сотрудникам.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'raw': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'raw',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+THUMBNAIL_BACKEND = 'core.thumbnails.CountingThumbnailBackend'
+
+# Cookie без HttpOnly, по которой скрипт страницы узнаёт, что есть
+# сессия и дырки ({% hole %}) нужно заполнить (core.middleware).
+SESSION_MARKER_COOKIE = 'logged_in'
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Тесты пишут медиа, метрики, копии страниц и журналы во временный
+# каталог (core.testing.RUNTIME_PATHS).
+TEST_RUNNER = 'core.testing.TempDirsRunner'
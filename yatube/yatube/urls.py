@@ -3,6 +3,9 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import fragments, metrics, upload_chunk, upload_start
+from posts.sitemaps import sitemap_chunk, sitemap_index
+
 app_name = 'posts'
 
 urlpatterns = [
@@ -10,7 +13,14 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('about/', include('about.urls', namespace='about')),
+    path('api/v1/', include('api.urls', namespace='api')),
     path('auth/', include('django.contrib.auth.urls')),
+    path('fragments/', fragments, name='fragments'),
+    path('metrics', metrics, name='metrics'),
+    path('uploads/', upload_start, name='upload_start'),
+    path('uploads/<uuid:token>/', upload_chunk, name='upload_chunk'),
+    path('sitemap.xml', sitemap_index, name='sitemap_index'),
+    path('sitemaps/<str:name>', sitemap_chunk, name='sitemap_chunk'),
 ]
 
 handler404 = 'core.views.page_not_found'
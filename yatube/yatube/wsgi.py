@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from posts.engagement import start_flusher  # noqa: E402
+
+# Поток сброса счётчиков запускается в каждом рабочем процессе при первом
+# приращении, поэтому вызов безопасен и при fork после импорта.
+start_flusher()